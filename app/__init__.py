@@ -4,15 +4,17 @@ from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from config import Config
+from .job_queue import job_queue
+from . import query_stats
 import logging
 
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     
     # Configuration du logging
     logging.basicConfig(level=logging.INFO)
@@ -21,6 +23,8 @@ def create_app():
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    job_queue.init_app(app)
+    query_stats.init_app(app, db)
     
     # Configuration CORS sécurisée
     CORS(app,
@@ -29,7 +33,7 @@ def create_app():
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin", "Cache-Control"],
             "supports_credentials": True,
-            "expose_headers": ["Content-Range", "X-Total-Count"]
+            "expose_headers": ["Content-Range", "X-Total-Count", "X-Next-Cursor"]
         }},
         supports_credentials=True)
     
@@ -43,4 +47,8 @@ def create_app():
         app.register_blueprint(auth_bp, url_prefix='/api')  # Ajoute le préfixe ici
         db.create_all()
 
+    # Après l'enregistrement des handlers (import des routes) : travaux laissés en file
+    if app.config.get('JOB_QUEUE_RESUME_ON_START', True):
+        job_queue.resume_pending()
+
     return app
\ No newline at end of file
@@ -31,12 +31,3 @@ SCORING_THRESHOLDS = {
     'AVERAGE': 40.0,
     'POOR': 20.0
 }
-
-# Poids des scores dans le calcul du score prédictif final
-SCORING_WEIGHTS = {
-    'SKILLS': 0.25,      # 25%
-    'EXPERIENCE': 0.20,  # 20%
-    'EDUCATION': 0.15,   # 15%
-    'CULTURE': 0.20,     # 20%
-    'INTERVIEW': 0.20    # 20%
-}
@@ -0,0 +1,443 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline d'ingestion d'un CV : extraction -> analyse LLM -> scoring -> rapport -> candidat
+
+Exécuté soit en ligne (mode synchrone), soit par un worker de la file
+d'attente (mode asynchrone, voir app.job_queue).
+
+Les fichiers sont dédoublonnés par SHA-256 (voir CvDocument) : le texte extrait
+et l'analyse LLM d'un fichier déjà reçu sont réutilisés, seul le score propre
+au brief est recalculé. Un même fichier envoyé deux fois pour le même brief
+renvoie le candidat existant.
+"""
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from . import db
+from .models import JobBrief, Candidate, CvDocument
+from .job_queue import job_queue
+from .scoring import brief_profile, profile_weights
+from .modules.brief_index import load_brief_embeddings
+from .modules.vector_index import index_candidates
+from .modules.pdf_extraction import extract_pdf, PdfExtractionResult
+from .modules.cv_storage import hash_file
+from .modules.llms import (
+    ANALYZE_CV_PROMPT_VERSION,
+    analyze_cv,
+    calculate_cv_score,
+    visualize_scores,
+    generate_final_report,
+    get_embeddings
+)
+
+logger = logging.getLogger(__name__)
+
+CV_PIPELINE_STAGES = ['extracting', 'analyzing', 'scoring', 'reporting', 'saving']
+
+class CvPipelineError(Exception):
+    """Erreur d'une étape du pipeline, avec la réponse JSON et le code HTTP associés"""
+
+    def __init__(self, payload, status_code=500):
+        super().__init__(payload.get('error', 'Erreur du pipeline CV'))
+        self.payload = payload
+        self.status_code = status_code
+
+
+def skill_names(cv_data):
+    """
+    Compétences exploitables d'une analyse : chaînes non vides, sans doublon.
+    Le LLM renvoie parfois des objets ou des listes à la place d'une chaîne ;
+    ils sont écartés plutôt que de faire échouer l'encodage de tout le lot.
+    """
+    skills = cv_data.get("Compétences") or []
+    if not isinstance(skills, list):
+        return []
+    return list(dict.fromkeys(skill.strip() for skill in skills if isinstance(skill, str) and skill.strip()))
+
+
+def _with_clean_skills(cv_data):
+    return dict(cv_data, **{"Compétences": skill_names(cv_data)})
+
+
+def _build_candidate(filename, cv_data, score_result, report, brief_id, user_id, cv_hash=None, profile=None):
+    return Candidate(
+        name=filename.split('.')[0],
+        cv_hash=cv_hash,
+        scoring_profile_id=profile.id if profile else None,
+        cv_analysis=cv_data,
+
+        # Scores de base depuis score_result
+        skills_score=score_result.get('skills_score', 0),
+        experience_score=score_result.get('experience_score', 0),
+        education_score=score_result.get('education_score', 0),
+        culture_score=0.0,  # Sera calculé plus tard
+        interview_score=0.0,  # Sera calculé plus tard
+        final_predictive_score=0.0,  # Sera calculé APRÈS l'évaluation finale
+
+        # Ancien système (rétrocompatibilité)
+        predictive_score=score_result.get('final_score', 0),
+
+        # Métadonnées
+        status="CV analysé",
+        process_stage="cv_analysis",
+        brief_id=brief_id,
+        user_id=user_id,
+
+        # Données détaillées
+        score_details=score_result,
+        recommendations=report.get('recommendations', []),
+        risks=report.get('risks', [])
+    )
+
+
+def _candidate_response(candidate, cv_data, score_result, report):
+    # Structure attendue par le frontend
+    return {
+        "id": candidate.id,
+        "name": candidate.name,
+        "cv_analysis": cv_data,
+        "predictive_score": candidate.predictive_score,
+        "status": candidate.status,
+        "brief_id": candidate.brief_id,
+        "score_details": score_result,
+        "report_summary": report.get('summary', ''),
+        "recommendations": report.get('recommendations', []),
+        "risks": report.get('risks', [])
+    }
+
+
+def _existing_candidate_response(candidate):
+    """Candidat déjà créé pour ce fichier et ce brief (envoi en double)"""
+    report = {"recommendations": candidate.recommendations or [], "risks": candidate.risks or []}
+    response = _candidate_response(candidate, candidate.cv_analysis or {}, candidate.score_details or {}, report)
+    response["duplicate"] = True
+    return response
+
+
+def find_duplicate_candidate(cv_hash, brief_id, user_id):
+    return Candidate.query.filter_by(cv_hash=cv_hash, brief_id=brief_id, user_id=user_id).first()
+
+
+def _new_cv_document(cv_hash, file_path, filename=None):
+    document = CvDocument(sha256=cv_hash, file_path=file_path, original_filename=filename,
+                          size=os.path.getsize(file_path) if os.path.exists(file_path) else None)
+    db.session.add(document)
+    return document
+
+
+def get_cv_document(cv_hash, file_path, filename=None):
+    """Document du fichier (créé dans la session s'il est nouveau)"""
+    return CvDocument.query.filter_by(sha256=cv_hash).first() or _new_cv_document(cv_hash, file_path, filename)
+
+
+def has_reusable_analysis(document, use_llm_cache=True):
+    """L'analyse stockée vient du gabarit de prompt courant (et le cache n'est pas contourné)"""
+    return bool(use_llm_cache and document.cv_analysis and document.analysis_version == ANALYZE_CV_PROMPT_VERSION)
+
+
+def store_document_results(document, extraction=None, cv_data=None):
+    if extraction is not None:
+        document.text = extraction.text
+        document.extraction = extraction.to_dict()
+    if cv_data is not None and "error" not in cv_data:
+        document.cv_analysis = cv_data
+        document.analysis_version = ANALYZE_CV_PROMPT_VERSION
+
+
+def save_documents():
+    """Enregistre les documents ; un envoi concurrent du même fichier a pu créer la ligne entre-temps"""
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        logger.info("📄 Document CV déjà enregistré par un envoi concurrent")
+
+
+def process_cv_upload(payload, progress=None, emit=None):
+    """
+    Exécute toutes les étapes pour un fichier déjà sauvegardé.
+    payload : {"file_path", "filename", "brief_id", "user_id", "cv_hash", "use_llm_cache" (optionnels)}
+    progress(étape) signale le début d'une étape ; emit(événement, données) publie
+    le résultat partiel de chaque étape terminée (extracted, analyzed, scored, reported).
+    Retourne la représentation du candidat attendue par le frontend.
+    """
+    progress = progress or (lambda stage: None)
+    emit = emit or (lambda event, data: None)
+
+    brief = JobBrief.query.filter_by(id=payload['brief_id'], user_id=payload['user_id']).first()
+    if not brief:
+        raise CvPipelineError({"error": "Brief non trouvé ou non autorisé"}, 404)
+
+    use_llm_cache = payload.get('use_llm_cache', True)
+    cv_hash = payload.get('cv_hash') or hash_file(payload['file_path'])
+    duplicate = find_duplicate_candidate(cv_hash, brief.id, payload['user_id'])
+    if duplicate:
+        logger.info(f"♻️ CV déjà reçu pour ce brief - candidat {duplicate.id}")
+        emit('duplicate', {"candidate_id": duplicate.id})
+        return _existing_candidate_response(duplicate)
+
+    document = get_cv_document(cv_hash, payload['file_path'], payload['filename'])
+
+    # Extraire le texte du PDF (une seule fois par fichier)
+    progress('extracting')
+    extraction = None
+    if not document.text:
+        extraction = extract_pdf(payload['file_path'])
+        if not extraction.ok:
+            raise CvPipelineError({"error": extraction.error}, 400)
+    cv_text = extraction.text if extraction else document.text
+    emit('extracted', {
+        "filename": payload['filename'],
+        "characters": len(cv_text),
+        "reused": extraction is None,
+        "extraction": extraction.to_dict() if extraction else (document.extraction or {})
+    })
+
+    # Analyser le CV (une seule fois par fichier, sauf contournement explicite du cache)
+    progress('analyzing')
+    reused_analysis = has_reusable_analysis(document, use_llm_cache)
+    cv_data = document.cv_analysis if reused_analysis else analyze_cv(cv_text, use_cache=use_llm_cache)
+    store_document_results(document, extraction, None if reused_analysis else cv_data)
+    save_documents()
+    if "error" in cv_data:
+        raise CvPipelineError(cv_data, 500)
+    cv_data = _with_clean_skills(cv_data)
+    emit('analyzed', {"cv_analysis": cv_data, "reused": reused_analysis})
+
+    # Récupérer les détails du poste
+    job_desc = json.loads(brief.full_data) if isinstance(brief.full_data, str) else brief.full_data
+
+    progress('scoring')
+    profile = brief_profile(payload['user_id'], brief.id)
+    score_result = calculate_cv_score(
+        cv_data, job_desc, job_embeddings=load_brief_embeddings(brief), weights=profile_weights(profile)
+    )
+    visualize_scores(score_result)
+    emit('scored', {"score_details": score_result})
+
+    progress('reporting')
+    report = generate_final_report(cv_text, cv_data, score_result, job_desc)
+    if "error" in report:
+        raise CvPipelineError(report, 500)
+    emit('reported', {
+        "report_summary": report.get('summary', ''),
+        "recommendations": report.get('recommendations', []),
+        "risks": report.get('risks', [])
+    })
+
+    progress('saving')
+    candidate = _build_candidate(payload['filename'], cv_data, score_result, report, brief.id, payload['user_id'], cv_hash, profile)
+
+    try:
+        db.session.add(candidate)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    index_candidates([candidate])
+
+    logger.info(f"🎯 Candidat créé - ID: {candidate.id}, Score final: {score_result.get('final_score', 0):.1f}%")
+    logger.info(f"   Skills: {score_result.get('skills_score', 0):.1f}% | Experience: {score_result.get('experience_score', 0):.1f}% | Education: {score_result.get('education_score', 0):.1f}%")
+
+    return _candidate_response(candidate, cv_data, score_result, report)
+
+
+@job_queue.task('cv_upload')
+def cv_upload_task(payload, progress):
+    return {"candidate": process_cv_upload(payload, progress, emit=progress.emit)}
+
+
+def process_cv_bulk(entries, brief, user_id, use_llm_cache=True):
+    """
+    Traite un lot de CV déjà sauvegardés pour un même brief.
+    entries : liste de {"file_path", "filename", "cv_hash"}
+    Générateur d'événements de progression (un dict par étape et par fichier) :
+    - fichiers déjà reçus pour ce brief ou en double dans le lot ignorés (événement duplicate)
+    - texte et analyse des fichiers déjà connus réutilisés
+    - extraction PDF répartie sur un pool de processus
+    - analyses Gemini concurrentes (nombre d'appels simultanés borné par le client LLM)
+    - un seul appel d'encodage pour toutes les compétences du lot
+    - tous les candidats écrits dans une seule transaction
+    """
+    config = current_app.config
+    job_desc = json.loads(brief.full_data) if isinstance(brief.full_data, str) else brief.full_data
+    job_desc = job_desc or {}
+    total = len(entries)
+    texts = {}
+    analyses = {}
+    extractions = {}
+    failed = 0
+    duplicates = 0
+
+    yield {"event": "started", "total": total, "brief_id": brief.id}
+
+    # 0. Dédoublonnage par empreinte : contre les candidats du brief, puis à l'intérieur du lot
+    for entry in entries:
+        entry.setdefault('cv_hash', hash_file(entry['file_path']))
+    hashes = {entry['cv_hash'] for entry in entries}
+    documents = {d.sha256: d for d in CvDocument.query.filter(CvDocument.sha256.in_(hashes))}
+    existing = {
+        c.cv_hash: c for c in Candidate.query.filter(
+            Candidate.cv_hash.in_(hashes), Candidate.brief_id == brief.id, Candidate.user_id == user_id
+        )
+    }
+    pending = []
+    seen = set()
+    for index, entry in enumerate(entries):
+        cv_hash = entry['cv_hash']
+        if cv_hash in existing or cv_hash in seen:
+            duplicates += 1
+            candidate = existing.get(cv_hash)
+            yield {"event": "duplicate", "file": entry['filename'], "candidate_id": candidate.id if candidate else None}
+            continue
+        seen.add(cv_hash)
+        pending.append(index)
+        if cv_hash not in documents:
+            documents[cv_hash] = _new_cv_document(cv_hash, entry['file_path'], entry['filename'])
+
+    to_extract = []
+    for index in pending:
+        document = documents[entries[index]['cv_hash']]
+        if document.text:
+            texts[index] = document.text
+            yield {"event": "extracted", "file": entries[index]['filename'], "reused": True}
+        else:
+            to_extract.append(index)
+
+    # 1. Extraction du texte (CPU) en parallèle sur plusieurs processus, un fichier par processus
+    workers = min(config.get('BULK_EXTRACT_WORKERS', os.cpu_count() or 1), max(len(to_extract), 1))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(extract_pdf, entries[i]['file_path'], workers=1): i for i in to_extract}
+        for future in as_completed(futures):
+            index = futures[future]
+            filename = entries[index]['filename']
+            try:
+                extraction = future.result()
+            except Exception as e:
+                extraction = PdfExtractionResult(error=f"Erreur lors de l'extraction du PDF : {str(e)}")
+            if not extraction.ok:
+                failed += 1
+                yield {"event": "failed", "file": filename, "stage": "extracted", "error": extraction.error}
+                continue
+            texts[index] = extraction.text
+            extractions[index] = extraction
+            yield {"event": "extracted", "file": filename, "engine": extraction.engine, "truncated": extraction.truncated}
+
+    to_analyze = {}
+    for index, text in texts.items():
+        document = documents[entries[index]['cv_hash']]
+        if has_reusable_analysis(document, use_llm_cache):
+            analyses[index] = _with_clean_skills(document.cv_analysis)
+            yield {"event": "analyzed", "file": entries[index]['filename'], "reused": True}
+        else:
+            to_analyze[index] = text
+
+    # 2. Analyses LLM concurrentes (I/O) ; le client LLM borne les appels simultanés du processus
+    concurrency = config.get('BULK_LLM_CONCURRENCY', 4)
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(to_analyze) or 1))) as pool:
+        app = current_app._get_current_object()
+
+        def run(text):
+            with app.app_context():
+                return analyze_cv(text, use_cache=use_llm_cache)
+
+        futures = {pool.submit(run, text): index for index, text in to_analyze.items()}
+        for future in as_completed(futures):
+            index = futures[future]
+            filename = entries[index]['filename']
+            try:
+                cv_data = future.result()
+            except Exception as e:
+                cv_data = {"error": f"Erreur lors de l'analyse avec Gemini : {str(e)}"}
+            if "error" in cv_data:
+                failed += 1
+                yield {"event": "failed", "file": filename, "stage": "analyzed", "error": cv_data["error"]}
+                continue
+            analyses[index] = _with_clean_skills(cv_data)
+            yield {"event": "analyzed", "file": filename}
+
+    # Texte et analyses conservés par fichier, réutilisables par les prochains envois
+    for index in pending:
+        store_document_results(
+            documents[entries[index]['cv_hash']],
+            extractions.get(index),
+            analyses.get(index) if index in to_analyze else None
+        )
+    save_documents()
+
+    # 3. Embeddings du brief précalculés ; compétences de tous les CV encodées en un seul appel
+    job_skills = job_desc.get("skills", [])
+    job_embeddings = load_brief_embeddings(brief)
+    unique_skills = list(dict.fromkeys(
+        skill for cv_data in analyses.values() for skill in cv_data["Compétences"]
+    ))
+    vectors = {}
+    if unique_skills and job_skills:
+        embeddings = get_embeddings(unique_skills)
+        vectors = dict(zip(unique_skills, embeddings))
+
+    # 4. Scoring, rapports et écriture de tous les candidats en une transaction
+    profile = brief_profile(user_id, brief.id)
+    weights = profile_weights(profile)
+    scored = []
+    for index, cv_data in analyses.items():
+        filename = entries[index]['filename']
+        cv_skills = cv_data["Compétences"]
+        cv_embeddings = [vectors[s] for s in cv_skills] if vectors and cv_skills else None
+        score_result = calculate_cv_score(cv_data, job_desc, cv_embeddings=cv_embeddings, job_embeddings=job_embeddings, weights=weights)
+        report = generate_final_report(texts[index], cv_data, score_result, job_desc)
+        if "error" in score_result or "error" in report:
+            failed += 1
+            error = score_result.get("error") or report.get("error")
+            yield {"event": "failed", "file": filename, "stage": "scored", "error": error}
+            continue
+        candidate = _build_candidate(filename, cv_data, score_result, report, brief.id, user_id, entries[index]['cv_hash'], profile)
+        scored.append((filename, candidate, cv_data, score_result, report))
+        yield {"event": "scored", "file": filename, "final_score": score_result.get('final_score', 0)}
+
+    try:
+        db.session.add_all([item[1] for item in scored])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erreur lors de l'enregistrement du lot de candidats: {str(e)}")
+        yield {"event": "error", "error": "Erreur lors de l'enregistrement des candidats", "details": str(e)}
+        return
+
+    index_candidates([item[1] for item in scored])
+
+    for filename, candidate, cv_data, score_result, report in scored:
+        yield {"event": "saved", "file": filename, "candidate": _candidate_response(candidate, cv_data, score_result, report)}
+
+    logger.info(f"📦 Upload en masse terminé - {len(scored)}/{total} candidats créés pour le brief {brief.id}")
+    yield {"event": "done", "total": total, "created": len(scored), "failed": failed, "duplicates": duplicates}
+
+
+@job_queue.task('cv_bulk')
+def cv_bulk_task(payload, progress):
+    """
+    Lot de CV sur un worker de la file : chaque événement de process_cv_bulk est
+    publié dans le journal du travail, relayé au client par /api/jobs/<id>/events.
+    payload : {"entries", "brief_id", "user_id", "use_llm_cache"}
+    """
+    brief = JobBrief.query.filter_by(id=payload['brief_id'], user_id=payload['user_id']).first()
+    if not brief:
+        raise CvPipelineError({"error": "Brief non trouvé ou non autorisé"}, 404)
+
+    progress('processing')
+    summary = {}
+    candidate_ids = []
+    for event in process_cv_bulk(payload['entries'], brief, payload['user_id'], use_llm_cache=payload.get('use_llm_cache', True)):
+        name = event.pop('event')
+        progress.emit(name, event)
+        if name == 'saved':
+            candidate_ids.append(event['candidate']['id'])
+        elif name == 'error':
+            raise CvPipelineError(event, 500)
+        elif name == 'done':
+            summary = event
+    return dict(summary, candidate_ids=candidate_ids)
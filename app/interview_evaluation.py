@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Évaluation des entretiens : scores culture / entretien et appréciations
+
+Les évaluations de tous les candidats d'un envoi (un candidat ou une journée
+d'entretiens complète) sont notées en une seule passe numpy, puis écrites en
+deux instructions : un INSERT groupé des appréciations et un UPDATE des
+candidats par clé primaire (executemany), dans la transaction de l'appelant.
+"""
+import logging
+
+import numpy as np
+from sqlalchemy import and_, func, insert, or_, update
+
+from . import db
+from .constants import CANDIDATE_STATUS, PROCESS_STAGES
+from .models import Appreciation, Candidate
+
+logger = logging.getLogger(__name__)
+
+# Échelle des appréciations saisies dans le frontend :
+# 1 = Très insatisfait, 2 = Insatisfait, 3 = Satisfait, 4 = Très satisfait
+SCALE_MIN = 1
+SCALE_MAX = 4
+
+CULTURE = 0
+INTERVIEW = 1
+
+
+def is_culture_category(category):
+    category = (category or '').lower()
+    return 'culture' in category or 'company' in category
+
+
+def culture_category_clause(column):
+    """Équivalent SQL de is_culture_category pour une colonne de catégorie"""
+    category = func.lower(func.coalesce(column, ''))
+    return or_(category.contains('culture'), category.contains('company'))
+
+
+def evaluated_clause():
+    """Candidats ayant au moins une appréciation culture et une appréciation entretien"""
+    culture = culture_category_clause(Appreciation.category)
+    answers = db.session.query(Appreciation.id).filter(Appreciation.candidate_id == Candidate.id)
+    return and_(answers.filter(culture).exists(), answers.filter(~culture).exists())
+
+
+def _score(evaluation):
+    """Note de l'évaluation sur l'échelle 1-4 ; ValueError si absente ou hors échelle"""
+    try:
+        score = float(evaluation.get('score'))
+    except (TypeError, ValueError):
+        raise ValueError(f"Score invalide : {evaluation.get('score')!r}")
+    if not SCALE_MIN <= score <= SCALE_MAX:
+        raise ValueError(f"Score hors échelle ({SCALE_MIN}-{SCALE_MAX}) : {evaluation.get('score')!r}")
+    return score
+
+
+def interview_scores(evaluations_by_candidate):
+    """
+    {candidate_id: [évaluations]} -> {candidate_id: (culture %, entretien %)}
+    Moyenne par catégorie (culture/entreprise ou entretien), ramenée de
+    l'échelle 1-4 à 0-100 ; une catégorie sans évaluation vaut 0 %.
+    """
+    candidate_ids = list(evaluations_by_candidate)
+    owners, kinds, scores = [], [], []
+    for position, candidate_id in enumerate(candidate_ids):
+        for evaluation in evaluations_by_candidate[candidate_id]:
+            owners.append(position)
+            kinds.append(CULTURE if is_culture_category(evaluation.get('category')) else INTERVIEW)
+            scores.append(_score(evaluation))
+
+    # Une case par (catégorie, candidat) : sommes et effectifs en deux bincount
+    count = len(candidate_ids)
+    cells = np.asarray(kinds, dtype=np.int64) * count + np.asarray(owners, dtype=np.int64)
+    sums = np.bincount(cells, weights=np.asarray(scores, dtype=np.float64), minlength=2 * count).reshape(2, count)
+    totals = np.bincount(cells, minlength=2 * count).reshape(2, count)
+    means = np.divide(sums, totals, out=np.zeros_like(sums), where=totals > 0)
+    # Case vide : 0 %, et non la moyenne nulle ramenée sous le bas de l'échelle
+    percentages = np.where(totals > 0, (means - SCALE_MIN) / (SCALE_MAX - SCALE_MIN) * 100, 0.0)
+
+    return {
+        candidate_id: (float(percentages[CULTURE, position]), float(percentages[INTERVIEW, position]))
+        for position, candidate_id in enumerate(candidate_ids)
+    }
+
+
+def appreciation_rows(candidate_id, evaluations):
+    return [
+        {
+            "candidate_id": candidate_id,
+            "question": evaluation.get('question', ''),
+            "category": evaluation.get('category', ''),
+            "appreciation": evaluation.get('appreciation', ''),
+            "score": _score(evaluation)
+        }
+        for evaluation in evaluations
+    ]
+
+
+def save_interview_evaluations(evaluations_by_candidate):
+    """
+    Note et enregistre les évaluations (sans commit) ; les candidats doivent
+    exister et appartenir à l'utilisateur. Retourne les scores par candidat.
+    """
+    scores = interview_scores(evaluations_by_candidate)
+    rows = [row for candidate_id, evaluations in evaluations_by_candidate.items()
+            for row in appreciation_rows(candidate_id, evaluations)]
+
+    if rows:
+        db.session.execute(insert(Appreciation), rows)
+    db.session.execute(update(Candidate), [
+        {
+            "id": candidate_id,
+            "culture_score": culture_score,
+            "interview_score": interview_score,
+            "process_stage": PROCESS_STAGES['INTERVIEW_EVALUATION'],
+            "status": CANDIDATE_STATUS['INTERVIEW_EVALUATED']
+        }
+        for candidate_id, (culture_score, interview_score) in scores.items()
+    ])
+    logger.info(f"📝 Entretiens évalués : {len(scores)} candidat(s), {len(rows)} appréciation(s)")
+    return scores
@@ -0,0 +1,499 @@
+# -*- coding: utf-8 -*-
+"""
+File d'attente des traitements de fond (analyse de CV, etc.)
+
+Les routes soumettent un travail et répondent immédiatement ; un pool de
+workers locaux (threads) exécute ensuite les étapes dans un contexte
+d'application Flask. Le broker est interchangeable :
+- ``memory`` : file en mémoire du processus (tests, développement)
+- ``sqlite`` : fichier SQLite partagé entre les workers gunicorn, qui
+  survit aux redémarrages provoqués par ``max_requests``
+
+Un travail en cours est renouvelé (heartbeat_at) toutes les
+JOB_QUEUE_HEARTBEAT_SECONDS par le processus qui l'exécute : seul un travail
+dont le renouvellement s'est arrêté depuis JOB_QUEUE_STALE_SECONDS (worker
+tué ou recyclé) est remis en file, quelle que soit la durée du travail.
+Les travaux terminés (réussis ou échoués) et leurs événements sont purgés
+JOB_RETENTION_SECONDS après leur dernière mise à jour.
+
+Un handler publie ses étapes (progress(stage)) et ses événements détaillés
+(progress.emit(événement, données)) dans le journal du travail : les routes
+les relaient au client (flux SSE ou interrogation de /api/jobs/<id>/events)
+sans exécuter elles-mêmes le traitement.
+"""
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUS = {
+    'QUEUED': 'queued',
+    'RUNNING': 'running',
+    'DONE': 'done',
+    'FAILED': 'failed'
+}
+
+
+def _now():
+    return datetime.utcnow().isoformat()
+
+
+class JobFailed(Exception):
+    """Échec métier d'un travail : réponse JSON et code HTTP conservés dans job['error']"""
+
+    def __init__(self, payload, status_code=500):
+        super().__init__(payload.get('error', 'Échec du travail'))
+        self.payload = payload
+        self.status_code = status_code
+
+
+class JobProgress:
+    """Second argument des handlers : progress(étape) et progress.emit(événement, données)"""
+
+    def __init__(self, broker, job_id):
+        self.broker = broker
+        self.job_id = job_id
+
+    def __call__(self, stage):
+        self.broker.update(self.job_id, stage=stage)
+        self.broker.add_event(self.job_id, 'stage', {"stage": stage})
+
+    def emit(self, event, data):
+        self.broker.add_event(self.job_id, event, data)
+
+
+class InMemoryBroker:
+    """Broker en mémoire, limité au processus courant"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._events = {}
+        self._event_seq = 0
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+
+    def enqueue(self, job):
+        with self._lock:
+            self._jobs[job['id']] = dict(job)
+        self._pending.put(job['id'])
+
+    def claim(self, timeout=1.0):
+        try:
+            job_id = self._pending.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job['status'] != JOB_STATUS['QUEUED']:
+                return None
+            job['status'] = JOB_STATUS['RUNNING']
+            job['updated_at'] = _now()
+            return dict(job)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields, updated_at=_now())
+
+    def heartbeat(self, job_ids):
+        # Un seul processus : ses travaux en cours ne sont jamais abandonnés
+        pass
+
+    def add_event(self, job_id, event, data):
+        with self._lock:
+            self._event_seq += 1
+            self._events.setdefault(job_id, []).append((self._event_seq, event, data))
+            return self._event_seq
+
+    def events(self, job_id, after=0):
+        with self._lock:
+            return [item for item in self._events.get(job_id, []) if item[0] > after]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def has_queued(self):
+        return not self._pending.empty()
+
+    def requeue_stale(self, max_age_seconds):
+        return 0
+
+    def purge_finished(self, max_age_seconds):
+        cutoff = datetime.utcfromtimestamp(time.time() - max_age_seconds).isoformat()
+        finished = (JOB_STATUS['DONE'], JOB_STATUS['FAILED'])
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job['status'] in finished and job['updated_at'] < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+                self._events.pop(job_id, None)
+        return len(expired)
+
+
+class SQLiteBroker:
+    """Broker persistant basé sur un fichier SQLite (aucun service externe requis)"""
+
+    def __init__(self, path, poll_interval=1.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    user_id TEXT,
+                    payload TEXT,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    heartbeat_at TEXT
+                )
+            """)
+            # Fichiers créés avant l'ajout du renouvellement
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'heartbeat_at' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    event TEXT NOT NULL,
+                    data TEXT,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events(job_id, id)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_to_job(row):
+        if row is None:
+            return None
+        job = dict(row)
+        for key in ('payload', 'result', 'error'):
+            if job.get(key):
+                job[key] = json.loads(job[key])
+        return job
+
+    def enqueue(self, job):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, name, user_id, payload, status, stage, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job['id'], job['name'], job.get('user_id'), json.dumps(job['payload']),
+                 job['status'], job.get('stage'), job['created_at'], job['updated_at'])
+            )
+        self._wakeup.set()
+
+    def claim(self, timeout=1.0):
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE : un seul worker (tous processus confondus) réserve le travail
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (JOB_STATUS['QUEUED'],)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+            else:
+                now = _now()
+                conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ?, heartbeat_at = ? WHERE id = ?",
+                    (JOB_STATUS['RUNNING'], now, now, row['id'])
+                )
+                conn.execute("COMMIT")
+                job = self._row_to_job(row)
+                job['status'] = JOB_STATUS['RUNNING']
+                return job
+        except sqlite3.OperationalError as e:
+            logger.warning(f"⚠️ Réservation de travail impossible: {str(e)}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+        finally:
+            conn.close()
+
+        self._wakeup.wait(min(timeout, self.poll_interval))
+        self._wakeup.clear()
+        return None
+
+    def update(self, job_id, **fields):
+        if not fields:
+            return
+        values = []
+        for key, value in fields.items():
+            if key in ('result', 'error', 'payload'):
+                value = json.dumps(value) if value is not None else None
+            values.append(value)
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._connection() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ?",
+                (*values, _now(), job_id)
+            )
+
+    def heartbeat(self, job_ids):
+        """Renouvelle le bail des travaux en cours du processus"""
+        if not job_ids:
+            return
+        placeholders = ", ".join("?" for _ in job_ids)
+        with self._connection() as conn:
+            conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND id IN ({placeholders})",
+                (_now(), JOB_STATUS['RUNNING'], *job_ids)
+            )
+
+    def add_event(self, job_id, event, data):
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO job_events (job_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, event, json.dumps(data, ensure_ascii=False, default=str), _now())
+            )
+            return cursor.lastrowid
+
+    def events(self, job_id, after=0):
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT id, event, data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+                (job_id, after)
+            ).fetchall()
+        return [(row['id'], row['event'], json.loads(row['data']) if row['data'] else None) for row in rows]
+
+    def get(self, job_id):
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def has_queued(self):
+        with self._connection() as conn:
+            row = conn.execute("SELECT 1 FROM jobs WHERE status = ? LIMIT 1", (JOB_STATUS['QUEUED'],)).fetchone()
+        return row is not None
+
+    def requeue_stale(self, max_age_seconds):
+        """Remet en file les travaux 'running' dont le bail n'est plus renouvelé (worker tué ou recyclé)"""
+        cutoff = datetime.utcfromtimestamp(time.time() - max_age_seconds).isoformat()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, heartbeat_at = NULL "
+                "WHERE status = ? AND COALESCE(heartbeat_at, updated_at) < ?",
+                (JOB_STATUS['QUEUED'], _now(), JOB_STATUS['RUNNING'], cutoff)
+            )
+            return cursor.rowcount
+
+    def purge_finished(self, max_age_seconds):
+        """Supprime les travaux terminés depuis plus de max_age_seconds, avec leurs événements"""
+        cutoff = datetime.utcfromtimestamp(time.time() - max_age_seconds).isoformat()
+        expired = "SELECT id FROM jobs WHERE status IN (?, ?) AND updated_at < ?"
+        params = (JOB_STATUS['DONE'], JOB_STATUS['FAILED'], cutoff)
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(f"DELETE FROM job_events WHERE job_id IN ({expired})", params)
+                cursor = conn.execute(f"DELETE FROM jobs WHERE id IN ({expired})", params)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return cursor.rowcount
+
+
+BROKERS = {
+    'memory': lambda app: InMemoryBroker(),
+    'sqlite': lambda app: SQLiteBroker(app.config['JOB_QUEUE_PATH']),
+}
+
+
+class JobQueue:
+    """Extension Flask : soumission des travaux et pool de workers locaux"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.broker = None
+        self.handlers = {}
+        self._threads = []
+        self._pid = None
+        self._running = set()
+        self._running_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        backend = app.config.get('JOB_QUEUE_BACKEND', 'sqlite')
+        if backend not in BROKERS:
+            raise ValueError(f"Broker de file d'attente inconnu : {backend}")
+        self.broker = BROKERS[backend](app)
+        self.num_workers = int(app.config.get('JOB_QUEUE_WORKERS', 2))
+        self.stale_after = int(app.config.get('JOB_QUEUE_STALE_SECONDS', 600))
+        self.heartbeat_interval = float(app.config.get('JOB_QUEUE_HEARTBEAT_SECONDS', 30))
+        if self.heartbeat_interval >= self.stale_after:
+            raise ValueError("JOB_QUEUE_HEARTBEAT_SECONDS doit être inférieur à JOB_QUEUE_STALE_SECONDS")
+        self.retention = int(app.config.get('JOB_RETENTION_SECONDS', 7 * 24 * 3600))
+        app.extensions['job_queue'] = self
+
+    def task(self, name):
+        """Décorateur d'enregistrement d'un handler : fn(payload, progress) -> résultat JSON"""
+        def decorator(fn):
+            self.handlers[name] = fn
+            return fn
+        return decorator
+
+    def submit(self, name, payload, user_id=None):
+        if name not in self.handlers:
+            raise ValueError(f"Aucun handler enregistré pour '{name}'")
+        self._ensure_workers()
+        now = _now()
+        job = {
+            'id': uuid.uuid4().hex,
+            'name': name,
+            'user_id': str(user_id) if user_id is not None else None,
+            'payload': payload,
+            'status': JOB_STATUS['QUEUED'],
+            'stage': 'queued',
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'updated_at': now
+        }
+        self.broker.enqueue(job)
+        logger.info(f"📥 Travail {job['id']} ({name}) mis en file")
+        return job['id']
+
+    def get_job(self, job_id):
+        return self.broker.get(job_id)
+
+    def get_events(self, job_id, after=0):
+        """Événements publiés par le travail après le numéro after : [(numéro, événement, données)]"""
+        return self.broker.events(job_id, after)
+
+    def resume_pending(self):
+        """
+        Démarre les workers si des travaux attendent (reliquat d'un arrêt, ou
+        travaux abandonnés remis en file) sans attendre la prochaine soumission.
+        À appeler une fois les handlers enregistrés, dans le processus qui exécute les travaux.
+        """
+        requeued = self.broker.requeue_stale(self.stale_after)
+        if requeued:
+            logger.warning(f"♻️ {requeued} travail(aux) abandonné(s) remis en file")
+        self.purge_finished()
+        if self.broker.has_queued():
+            logger.info("📥 Travaux en attente au démarrage : reprise")
+            self._ensure_workers()
+
+    def purge_finished(self):
+        """Supprime les travaux terminés depuis plus de JOB_RETENTION_SECONDS (0 : conservés)"""
+        if self.retention <= 0:
+            return 0
+        purged = self.broker.purge_finished(self.retention)
+        if purged:
+            logger.info(f"🧹 {purged} travail(aux) terminé(s) purgé(s)")
+        return purged
+
+    def _ensure_workers(self):
+        # Avec preload_app, create_app() tourne dans le master : les threads ne
+        # survivent pas au fork, on les démarre donc dans le processus qui soumet.
+        with self._start_lock:
+            if self._pid == os.getpid() and all(t.is_alive() for t in self._threads):
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            requeued = self.broker.requeue_stale(self.stale_after)
+            if requeued:
+                logger.warning(f"♻️ {requeued} travail(aux) abandonné(s) remis en file")
+            self._threads = []
+            for i in range(self.num_workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            logger.info(f"🚀 {self.num_workers} worker(s) de file d'attente démarré(s) (pid {self._pid})")
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            job = self.broker.claim(timeout=1.0)
+            if job:
+                self._run(job)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._running_lock:
+                job_ids = list(self._running)
+            try:
+                self.broker.heartbeat(job_ids)
+            except Exception as e:
+                logger.warning(f"⚠️ Renouvellement des travaux en cours impossible: {str(e)}")
+            try:
+                self.purge_finished()
+            except Exception as e:
+                logger.warning(f"⚠️ Purge des travaux terminés impossible: {str(e)}")
+
+    def _run(self, job):
+        job_id = job['id']
+        handler = self.handlers.get(job['name'])
+        with self._running_lock:
+            self._running.add(job_id)
+
+        progress = JobProgress(self.broker, job_id)
+
+        started = time.time()
+        with self.app.app_context():
+            try:
+                if handler is None:
+                    raise ValueError(f"Aucun handler enregistré pour '{job['name']}'")
+                result = handler(job['payload'], progress)
+                self.broker.update(job_id, status=JOB_STATUS['DONE'], stage='done', result=result)
+                logger.info(f"✅ Travail {job_id} terminé en {time.time() - started:.1f}s")
+            except Exception as e:
+                error = getattr(e, 'payload', None) or {"error": str(e)}
+                # Code HTTP de l'échec métier (JobFailed, CvPipelineError) conservé pour le relais
+                if hasattr(e, 'status_code'):
+                    error = dict(error, status=e.status_code)
+                self.broker.update(job_id, status=JOB_STATUS['FAILED'], error=error)
+                logger.error(f"❌ Travail {job_id} échoué: {str(e)}")
+            finally:
+                with self._running_lock:
+                    self._running.discard(job_id)
+
+    def shutdown(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+
+job_queue = JobQueue()
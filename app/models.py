@@ -1,8 +1,19 @@
 from . import db
 from datetime import datetime
 import json
+from sqlalchemy.dialects.postgresql import JSONB
+
+# JSON natif : JSONB sous PostgreSQL, JSON sous SQLite. Le pilote (dé)sérialise
+# les valeurs : les colonnes se lisent et s'écrivent en dict/list Python.
+# None reste un NULL SQL (et non le littéral JSON null).
+JsonType = db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), 'postgresql')
 
 class JobBrief(db.Model):
+    __table_args__ = (
+        db.Index('idx_job_brief_user', 'user_id'),
+        db.Index('idx_job_brief_context', 'context_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     skills = db.Column(db.String(200), nullable=False)
@@ -15,6 +26,10 @@ class JobBrief(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     context_id = db.Column(db.Integer, db.ForeignKey('company_context.id'), nullable=True)
     
+    # Embeddings précalculés des compétences (format .npy float32)
+    skills_embeddings = db.Column(db.LargeBinary, nullable=True)
+    embeddings_fingerprint = db.Column(db.String(64), nullable=True)
+    
     def to_dict(self):
         # Gestion sécurisée du parsing des skills
         skills_parsed = []
@@ -51,10 +66,26 @@ class JobBrief(db.Model):
             'status': self.status
         }
 
+@db.event.listens_for(JobBrief.full_data, 'set')
+def invalidate_brief_embeddings(target, value, oldvalue, initiator):
+    """Toute modification de full_data rend les embeddings précalculés périmés"""
+    if value != oldvalue:
+        target.embeddings_fingerprint = None
+
 class Candidate(db.Model):
+    # Index alignés sur les requêtes des listes : filtre user_id (+ brief_id ou
+    # process_stage) puis tri keyset (score, created_at, id) ou (created_at, id)
+    __table_args__ = (
+        db.Index('idx_candidate_user_score', 'user_id', 'final_predictive_score', 'created_at', 'id'),
+        db.Index('idx_candidate_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('idx_candidate_user_brief_score', 'user_id', 'brief_id', 'final_predictive_score', 'created_at', 'id'),
+        db.Index('idx_candidate_user_stage_score', 'user_id', 'process_stage', 'final_predictive_score', 'created_at', 'id'),
+        db.Index('idx_candidate_brief', 'brief_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    cv_analysis = db.Column(db.Text)  # JSON string
+    cv_analysis = db.Column(JsonType)
     
     # Score prédictif simple (pour rétrocompatibilité)
     predictive_score = db.Column(db.Float, default=0.0)
@@ -74,12 +105,14 @@ class Candidate(db.Model):
     process_stage = db.Column(db.String(50), default='cv_analysis')
     brief_id = db.Column(db.Integer, db.ForeignKey('job_brief.id'), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    cv_hash = db.Column(db.String(64), nullable=True, index=True)  # SHA-256 du fichier (CvDocument)
+    scoring_profile_id = db.Column(db.Integer, db.ForeignKey('scoring_profile.id', name='fk_candidate_scoring_profile'), nullable=True)  # pondération des scores stockés (NULL : défaut)
     
     # Données détaillées (JSON)
-    interview_questions = db.Column(db.Text)  # JSON string
-    score_details = db.Column(db.Text)  # JSON string
-    risks = db.Column(db.Text)  # JSON string
-    recommendations = db.Column(db.Text)  # JSON string
+    interview_questions = db.Column(JsonType)
+    score_details = db.Column(JsonType)
+    risks = db.Column(JsonType)
+    recommendations = db.Column(JsonType)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def to_dict(self):
@@ -87,7 +120,7 @@ class Candidate(db.Model):
         return {
             'id': self.id,
             'name': self.name,
-            'cv_analysis': json.loads(self.cv_analysis) if self.cv_analysis else None,
+            'cv_analysis': self.cv_analysis,
             'predictive_score': self.predictive_score,
             'final_predictive_score': self.final_predictive_score,
             'scores': {
@@ -101,13 +134,94 @@ class Candidate(db.Model):
             'process_stage': self.process_stage,
             'brief_id': self.brief_id,
             'user_id': self.user_id,
-            'score_details': json.loads(self.score_details) if self.score_details else {},
-            'risks': json.loads(self.risks) if self.risks else [],
-            'recommendations': json.loads(self.recommendations) if self.recommendations else [],
+            'score_details': self.score_details or {},
+            'risks': self.risks or [],
+            'recommendations': self.recommendations or [],
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class CvDocument(db.Model):
+    """Fichier CV adressé par son SHA-256 : texte extrait et analyse LLM partagés par tous ses envois"""
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    file_path = db.Column(db.String(255), nullable=False)
+    original_filename = db.Column(db.String(255))
+    size = db.Column(db.Integer)
+    text = db.Column(db.Text)
+    extraction = db.Column(JsonType)  # moteur, pages, troncature
+    cv_analysis = db.Column(JsonType)
+    analysis_version = db.Column(db.String(100))  # gabarit de prompt ayant produit cv_analysis
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CandidateMatch(db.Model):
+    """Score d'un candidat existant contre un brief (matching inversé), valable pour une version du brief"""
+    __table_args__ = (
+        db.UniqueConstraint('brief_id', 'candidate_id', name='uq_candidate_match_brief_candidate'),
+        db.Index('idx_candidate_match_brief_score', 'brief_id', 'final_score'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    brief_id = db.Column(db.Integer, db.ForeignKey('job_brief.id', ondelete='CASCADE'), nullable=False)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    brief_version = db.Column(db.String(64), nullable=False)
+    skills_score = db.Column(db.Float, default=0.0)
+    experience_score = db.Column(db.Float, default=0.0)
+    education_score = db.Column(db.Float, default=0.0)
+    final_score = db.Column(db.Float, default=0.0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    candidate = db.relationship('Candidate', lazy='joined')
+
+    def to_dict(self):
+        return {
+            'candidate_id': self.candidate_id,
+            'name': self.candidate.name if self.candidate else None,
+            'source_brief_id': self.candidate.brief_id if self.candidate else None,
+            'status': self.candidate.status if self.candidate else None,
+            'scores': {
+                'skills': self.skills_score,
+                'experience': self.experience_score,
+                'education': self.education_score
+            },
+            'final_score': self.final_score
+        }
+
+class ScoringProfile(db.Model):
+    """
+    Pondération versionnée des scores ({"cv": {...}, "final": {...}}) : d'un brief,
+    ou par défaut de l'utilisateur (brief_id NULL). La version la plus haute est
+    active ; une modification crée une nouvelle version plutôt que d'écraser.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'brief_id', 'version', name='uq_scoring_profile_user_brief_version'),
+        # NULL distinct de NULL dans une contrainte d'unicité : index partiel pour les profils par défaut
+        db.Index('uq_scoring_profile_user_default_version', 'user_id', 'version', unique=True,
+                 postgresql_where=db.text('brief_id IS NULL'), sqlite_where=db.text('brief_id IS NULL')),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    brief_id = db.Column(db.Integer, db.ForeignKey('job_brief.id', ondelete='CASCADE'), nullable=True)
+    version = db.Column(db.Integer, nullable=False)
+    weights = db.Column(JsonType, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'brief_id': self.brief_id,
+            'version': self.version,
+            'weights': self.weights,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
 class CompanyContext(db.Model):
+    __table_args__ = (
+        db.Index('idx_company_context_user', 'user_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     nom_entreprise = db.Column(db.String(200), nullable=True)
@@ -122,6 +236,10 @@ class InterviewQuestion(db.Model):
     purpose = db.Column(db.Text)
 
 class Appreciation(db.Model):
+    __table_args__ = (
+        db.Index('idx_appreciation_candidate', 'candidate_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id'), nullable=False)
     question = db.Column(db.Text, nullable=False)
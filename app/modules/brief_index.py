@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Index d'embeddings des fiches de poste
+
+Les embeddings des compétences d'un brief sont calculés une seule fois
+(création / modification) et stockés sous forme binaire (.npy float32) sur la
+ligne JobBrief. Une empreinte du contenu encodé (modèle, compétences) permet
+de détecter les embeddings périmés.
+"""
+import hashlib
+import io
+import json
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_full_data(full_data):
+    if not full_data:
+        return {}
+    if isinstance(full_data, str):
+        try:
+            return json.loads(full_data)
+        except (json.JSONDecodeError, TypeError):
+            return {}
+    return full_data
+
+
+def serialize_matrix(matrix):
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(matrix, dtype=np.float32), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def deserialize_matrix(blob):
+    if not blob:
+        return None
+    return np.load(io.BytesIO(blob), allow_pickle=False)
+
+
+def brief_fingerprint(full_data, model_name):
+    """Empreinte du contenu encodé : change dès que les compétences ou le modèle changent"""
+    data = _parse_full_data(full_data)
+    content = json.dumps({
+        "model": model_name,
+        "skills": data.get("skills", [])
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def refresh_brief_embeddings(brief):
+    """(Re)calcule les embeddings du brief si son contenu a changé. Retourne True si recalculés."""
+    from .llms import get_embeddings
+    from .embedding_backends import get_embedding_backend
+
+    fingerprint = brief_fingerprint(brief.full_data, get_embedding_backend().model_id)
+    # Un brief sans compétences a une empreinte à jour et aucun embedding : rien à recalculer
+    if brief.embeddings_fingerprint == fingerprint:
+        return False
+
+    skills = _parse_full_data(brief.full_data).get("skills", [])
+    brief.skills_embeddings = serialize_matrix(get_embeddings(skills)) if skills else None
+    brief.embeddings_fingerprint = fingerprint
+    logger.info(f"🧭 Embeddings du brief {brief.id} calculés ({len(skills)} compétences)")
+    return True
+
+
+def load_brief_embeddings(brief):
+    """
+    Embeddings des compétences du brief, prêts pour le scoring.
+    Recalculés (et enregistrés dans la session) s'ils sont absents ou périmés.
+    """
+    try:
+        refresh_brief_embeddings(brief)
+        return deserialize_matrix(brief.skills_embeddings)
+    except Exception as e:
+        logger.warning(f"⚠️ Embeddings du brief {brief.id} indisponibles: {str(e)}")
+        return None
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Stockage des CV adressé par contenu
+
+Chaque fichier est rangé sous uploads/<sha[:2]>/<sha256>.pdf : deux envois du
+même fichier pointent vers le même chemin (aucun écrasement entre fichiers
+homonymes, aucune copie en double), et l'empreinte sert de clé au texte
+extrait et à l'analyse du CV (voir CvDocument).
+"""
+import hashlib
+import os
+import tempfile
+
+DEFAULT_UPLOAD_ROOT = "uploads"
+CHUNK_SIZE = 1024 * 1024
+
+
+def content_path(sha256, root=DEFAULT_UPLOAD_ROOT, extension='.pdf'):
+    return os.path.join(root, sha256[:2], sha256 + extension)
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_upload(stream, root=DEFAULT_UPLOAD_ROOT, extension='.pdf'):
+    """
+    Copie le flux dans un fichier temporaire en calculant son SHA-256, puis le
+    range à son adresse de contenu. Retourne (sha256, chemin, taille, déjà présent).
+    """
+    os.makedirs(root, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=root, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        path = content_path(sha256, root, extension)
+        existed = os.path.exists(path)
+        if existed:
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Renommage atomique : un fichier présent à son adresse est toujours complet
+            os.replace(tmp_path, path)
+        return sha256, path, size, existed
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Backends d'encodage des embeddings, derrière get_embeddings
+
+- 'sentence-transformers' : modèle PyTorch complet (comportement historique)
+- 'onnx-int8' : même modèle (transformer + mean pooling + couche Dense) exporté
+  en ONNX et quantifié en int8, exécuté par ONNX Runtime sans torch ;
+  nettement moins de mémoire sur les petites instances CPU
+- 'hashing' : vecteurs de n-grammes de caractères hachés, sans modèle ni
+  réseau ; réservé aux tests et aux benchmarks hors ligne (similarité lexicale)
+
+Choix par la variable d'environnement EMBEDDING_BACKEND. Le modèle ONNX se
+génère une fois (torch requis uniquement pour l'export) :
+    python -m app.modules.embedding_backends export [dossier]
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = 'distiluse-base-multilingual-cased-v1'
+DEFAULT_ONNX_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'instance', 'onnx', DEFAULT_MODEL_NAME
+)
+ONNX_MODEL_FILE = 'model_int8.onnx'
+ONNX_METADATA_FILE = 'export.json'
+
+
+class EmbeddingBackend:
+    """Interface commune : encode(str) -> vecteur 1D, encode(list) -> matrice 2D (float32)"""
+
+    name = None
+    # Le modèle chargé dans le master gunicorn reste-t-il utilisable après le fork ?
+    fork_safe = True
+
+    def __init__(self, model_name=DEFAULT_MODEL_NAME):
+        self.model_name = model_name
+
+    @property
+    def model_id(self):
+        """Identifiant des vecteurs produits (clé du cache et des empreintes d'embeddings)"""
+        return f"{self.model_name}@{self.name}"
+
+    @property
+    def loaded(self):
+        raise NotImplementedError
+
+    def load(self):
+        raise NotImplementedError
+
+    def encode(self, texts):
+        raise NotImplementedError
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    name = 'sentence-transformers'
+
+    @property
+    def model_id(self):
+        # Identifiant historique : les caches et embeddings déjà calculés restent valides
+        return self.model_name
+
+    @property
+    def loaded(self):
+        from . import llms
+        return llms._model_instance is not None
+
+    def load(self):
+        from .llms import get_sentence_transformer
+        return get_sentence_transformer()
+
+    def encode(self, texts):
+        return np.asarray(self.load().encode(texts), dtype=np.float32)
+
+
+class OnnxInt8Backend(EmbeddingBackend):
+    name = 'onnx-int8'
+    # Les threads d'ONNX Runtime ne survivent pas au fork : une session par processus
+    fork_safe = False
+
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, model_dir=None, batch_size=32):
+        super().__init__(model_name)
+        self.model_dir = model_dir or DEFAULT_ONNX_DIR
+        self.batch_size = batch_size
+        self._session = None
+        self._tokenizer = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._session is not None and self._pid == os.getpid()
+
+    def load(self):
+        if self.loaded:
+            return self._session
+        with self._lock:
+            if self.loaded:
+                return self._session
+            try:
+                import onnxruntime as ort
+                from tokenizers import Tokenizer
+            except ImportError as e:
+                raise RuntimeError("Backend ONNX indisponible : installez onnxruntime et tokenizers") from e
+
+            model_path = os.path.join(self.model_dir, ONNX_MODEL_FILE)
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(
+                    f"Modèle ONNX introuvable ({model_path}) : lancez 'python -m app.modules.embedding_backends export'"
+                )
+            with open(os.path.join(self.model_dir, ONNX_METADATA_FILE), encoding='utf-8') as f:
+                metadata = json.load(f)
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.intra_op_num_threads = int(os.getenv('ONNX_NUM_THREADS', '0'))
+            session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+
+            tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, 'tokenizer.json'))
+            tokenizer.enable_truncation(max_length=metadata['max_seq_length'])
+            tokenizer.enable_padding(pad_id=metadata['pad_token_id'], pad_token=metadata['pad_token'])
+
+            self._session, self._tokenizer, self._pid = session, tokenizer, os.getpid()
+            logger.info(f"🧩 Modèle ONNX int8 chargé depuis {self.model_dir}")
+        return self._session
+
+    def encode(self, texts):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        session = self.load()
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Lots de longueurs voisines : moins de padding
+        order = np.argsort([len(t) for t in texts])
+        outputs = [None] * len(texts)
+        for start in range(0, len(texts), self.batch_size):
+            positions = order[start:start + self.batch_size]
+            encodings = self._tokenizer.encode_batch([texts[i] for i in positions])
+            feed = {
+                'input_ids': np.asarray([e.ids for e in encodings], dtype=np.int64),
+                'attention_mask': np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+            }
+            embeddings = session.run(['sentence_embedding'], feed)[0]
+            for position, embedding in zip(positions, embeddings):
+                outputs[position] = embedding
+        matrix = np.vstack(outputs).astype(np.float32)
+        return matrix[0] if single else matrix
+
+
+class HashingBackend(EmbeddingBackend):
+    name = 'hashing'
+
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, dimension=512, ngram=3):
+        super().__init__(model_name)
+        self.dimension = dimension
+        self.ngram = ngram
+
+    @property
+    def model_id(self):
+        return f"hashing-{self.ngram}gram-{self.dimension}@{self.name}"
+
+    @property
+    def loaded(self):
+        return True
+
+    def load(self):
+        return self
+
+    def _vector(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        padded = f" {text.lower().strip()} "
+        for i in range(max(len(padded) - self.ngram + 1, 1)):
+            # crc32 plutôt que hash() : stable d'un processus à l'autre
+            h = zlib.crc32(padded[i:i + self.ngram].encode('utf-8'))
+            vector[h % self.dimension] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts):
+        if isinstance(texts, str):
+            return self._vector(texts)
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.vstack([self._vector(t) for t in texts])
+
+
+EMBEDDING_BACKENDS = {
+    SentenceTransformerBackend.name: SentenceTransformerBackend,
+    OnnxInt8Backend.name: OnnxInt8Backend,
+    HashingBackend.name: HashingBackend,
+}
+
+_backend_instance = None
+_backend_lock = threading.Lock()
+
+
+def get_embedding_backend():
+    global _backend_instance
+    with _backend_lock:
+        if _backend_instance is None:
+            name = os.getenv('EMBEDDING_BACKEND', SentenceTransformerBackend.name)
+            if name not in EMBEDDING_BACKENDS:
+                raise ValueError(f"Backend d'embeddings inconnu : {name}")
+            options = {'model_dir': os.getenv('ONNX_MODEL_DIR') or None} if name == OnnxInt8Backend.name else {}
+            _backend_instance = EMBEDDING_BACKENDS[name](DEFAULT_MODEL_NAME, **options)
+    return _backend_instance
+
+
+def export_onnx_model(output_dir=DEFAULT_ONNX_DIR, model_name=DEFAULT_MODEL_NAME, opset=14):
+    """
+    Exporte le modèle SentenceTransformer complet (transformer + pooling + Dense tanh)
+    en ONNX, puis le quantifie en int8 (poids des couches linéaires). Nécessite torch.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    model = SentenceTransformer(model_name, device='cpu')
+    model.eval()
+
+    class _Exportable(torch.nn.Module):
+        def __init__(self, st_model):
+            super().__init__()
+            self.st_model = st_model
+
+        def forward(self, input_ids, attention_mask):
+            return self.st_model({'input_ids': input_ids, 'attention_mask': attention_mask})['sentence_embedding']
+
+    sample = model.tokenizer(["Exemple de compétence", "Python"], return_tensors='pt', padding=True)
+    fp32_path = os.path.join(output_dir, 'model_fp32.onnx')
+    with torch.no_grad():
+        torch.onnx.export(
+            _Exportable(model),
+            (sample['input_ids'], sample['attention_mask']),
+            fp32_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['sentence_embedding'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'sentence_embedding': {0: 'batch'}
+            },
+            opset_version=opset
+        )
+    quantize_dynamic(fp32_path, os.path.join(output_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+
+    model.tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, ONNX_METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            'model_name': model_name,
+            'max_seq_length': model.max_seq_length,
+            'pad_token_id': model.tokenizer.pad_token_id,
+            'pad_token': model.tokenizer.pad_token
+        }, f, indent=2)
+    logger.info(f"✅ Modèle ONNX int8 exporté dans {output_dir}")
+    return output_dir
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'export':
+        logging.basicConfig(level=logging.INFO)
+        print(export_onnx_model(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_ONNX_DIR))
+    else:
+        print("Usage : python -m app.modules.embedding_backends export [dossier]")
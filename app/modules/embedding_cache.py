@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Cache des embeddings de chaînes courtes (compétences, titres...)
+
+Clé : (nom du modèle, texte normalisé). Deux niveaux :
+- LRU en mémoire du processus
+- SQLite sur disque (vecteurs float32), partagé entre les workers gunicorn
+  et conservé quand ``max_requests`` recycle un worker
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'instance', 'embeddings.sqlite3'
+)
+
+
+def normalize_text(text):
+    """Normalisation de la clé : Unicode NFC et espaces compactés (la casse est conservée, modèle 'cased')"""
+    return " ".join(unicodedata.normalize('NFC', str(text)).split())
+
+
+class EmbeddingCache:
+    """Cache à deux niveaux, adressé par le contenu"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_memory_items=10000):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0}
+        self._disk_enabled = bool(path)
+        if self._disk_enabled:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with self._connection() as conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS embeddings (
+                            model TEXT NOT NULL,
+                            key TEXT NOT NULL,
+                            dim INTEGER NOT NULL,
+                            vector BLOB NOT NULL,
+                            PRIMARY KEY (model, key)
+                        )
+                    """)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Cache disque des embeddings désactivé: {str(e)}")
+                self._disk_enabled = False
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(text):
+        return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+    def _remember(self, model_name, key, vector):
+        self._memory[(model_name, key)] = vector
+        self._memory.move_to_end((model_name, key))
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model_name, texts):
+        """Retourne {index: vecteur} pour les textes déjà connus"""
+        found = {}
+        missing = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = self._key(text)
+                vector = self._memory.get((model_name, key))
+                if vector is not None:
+                    self._memory.move_to_end((model_name, key))
+                    found[i] = vector
+                    self.counters['memory_hits'] += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+        if missing and self._disk_enabled:
+            keys = list(missing)
+            rows = []
+            try:
+                with self._connection() as conn:
+                    # Requêtes par paquets pour rester sous la limite de paramètres SQLite
+                    for start in range(0, len(keys), 500):
+                        chunk = keys[start:start + 500]
+                        placeholders = ",".join("?" * len(chunk))
+                        rows.extend(conn.execute(
+                            f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                            (model_name, *chunk)
+                        ).fetchall())
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Lecture du cache disque impossible: {str(e)}")
+            with self._lock:
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(model_name, key, vector)
+                    for i in missing.pop(key):
+                        found[i] = vector
+                        self.counters['disk_hits'] += 1
+
+        with self._lock:
+            self.counters['misses'] += sum(len(indices) for indices in missing.values())
+        return found
+
+    def put_many(self, model_name, texts, vectors):
+        records = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                key = self._key(text)
+                self._remember(model_name, key, vector)
+                records.append((model_name, key, int(vector.shape[0]), vector.tobytes()))
+            self.counters['writes'] += len(records)
+        if records and self._disk_enabled:
+            try:
+                with self._connection() as conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model, key, dim, vector) VALUES (?, ?, ?, ?)",
+                        records
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Écriture du cache disque impossible: {str(e)}")
+
+    def encode(self, model_name, texts, encode_fn):
+        """
+        Retourne les embeddings (np.ndarray, un par texte, dans l'ordre) en n'appelant
+        encode_fn qu'une seule fois, sur les textes absents du cache (dédoublonnés).
+        """
+        texts = list(texts)
+        found = self.get_many(model_name, texts)
+        to_encode = list(dict.fromkeys(texts[i] for i in range(len(texts)) if i not in found))
+        if to_encode:
+            encoded = np.asarray(encode_fn(to_encode), dtype=np.float32)
+            self.put_many(model_name, to_encode, encoded)
+            by_text = dict(zip(to_encode, encoded))
+            for i, text in enumerate(texts):
+                if i not in found:
+                    found[i] = by_text[text]
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack([found[i] for i in range(len(texts))])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters['memory_hits'] + self.counters['disk_hits'] + self.counters['misses']
+            hits = self.counters['memory_hits'] + self.counters['disk_hits']
+            return {
+                **self.counters,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_items': len(self._memory),
+                'disk_enabled': self._disk_enabled
+            }
+
+
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            _cache_instance = EmbeddingCache(
+                path=os.getenv('EMBEDDING_CACHE_PATH', DEFAULT_CACHE_PATH),
+                max_memory_items=int(os.getenv('EMBEDDING_CACHE_MEMORY_ITEMS', '10000'))
+            )
+    return _cache_instance
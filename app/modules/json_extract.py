@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Extraction tolérante du JSON des réponses LLM
+
+Un seul parcours linéaire de la réponse (aucune expression régulière, donc
+aucun retour arrière sur les longues réponses) :
+- ignore les balises ```json, le texte avant et après l'objet
+- retire les virgules finales (`[1, 2,]`)
+- répare une réponse tronquée : ferme la chaîne et les conteneurs ouverts,
+  ou coupe après le dernier élément complet
+La valeur obtenue est validée contre un schéma propre à chaque appel ;
+les réparations appliquées sont listées dans le résultat.
+"""
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Réparations signalées dans ExtractionResult.repairs
+CODE_FENCE = 'code_fence'
+LEADING_TEXT = 'leading_text'
+TRAILING_TEXT = 'trailing_text'
+TRAILING_COMMA = 'trailing_comma'
+CLOSED_TRUNCATED = 'closed_truncated'
+CUT_TRUNCATED = 'cut_truncated'
+
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+class ExtractionResult:
+    def __init__(self, value=None, repairs=None, error=None):
+        self.value = value
+        self.repairs = repairs or []
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def repaired(self):
+        return bool(self.repairs)
+
+    def __repr__(self):
+        return f"ExtractionResult(ok={self.ok}, repairs={self.repairs}, error={self.error!r})"
+
+
+def _scan(text, start, repairs):
+    """
+    Parcourt le premier objet ou tableau JSON à partir de start.
+    Retourne (texte JSON, position de fin, pile ouverte, points de coupe) ; la
+    position de fin vaut None si la réponse est tronquée avant la fermeture de l'objet.
+    Un point de coupe (longueur du texte, pile ouverte) marque la fin d'un élément
+    complet (avant une virgule) ou l'ouverture d'un conteneur : on peut y couper
+    puis refermer la pile. Les coupes sont listées de la plus prometteuse à la
+    moins prometteuse : d'abord aux virgules (de la dernière à la première),
+    puis aux ouvertures de conteneurs (qui laissent un conteneur vide).
+    """
+    out = []
+    stack = []
+    cuts = []
+    openings = []
+    in_string = False
+    escaped = False
+    pending_comma = False
+
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch in ' \t\r\n':
+            if not pending_comma:
+                out.append(ch)
+            continue
+
+        if pending_comma:
+            pending_comma = False
+            if ch in '}]':
+                repairs.append(TRAILING_COMMA)
+            else:
+                # Élément complet avant la virgule : point de coupe possible
+                cuts.append((len(out), list(stack)))
+                out.append(',')
+
+        if ch == ',':
+            pending_comma = True
+            continue
+        out.append(ch)
+        if ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append(ch)
+            openings.append((len(out), list(stack)))
+        elif ch in '}]':
+            if not stack or _CLOSERS[stack[-1]] != ch:
+                return ''.join(out), i + 1, stack, []
+            stack.pop()
+            if not stack:
+                return ''.join(out), i + 1, stack, []
+
+    if in_string:
+        out.append('"')
+    return ''.join(out), None, stack, cuts[::-1] + openings[::-1]
+
+
+def _close(fragment, stack):
+    return fragment.rstrip().rstrip(',') + ''.join(_CLOSERS[c] for c in reversed(stack))
+
+
+def _parse_truncated(fragment, stack, cuts, repairs):
+    try:
+        value = json.loads(_close(fragment, stack))
+        repairs.append(CLOSED_TRUNCATED)
+        return value
+    except json.JSONDecodeError:
+        pass
+    # Élément final incomplet (clé sans valeur, littéral coupé) : on le retire
+    for length, open_stack in cuts:
+        try:
+            value = json.loads(_close(fragment[:length], open_stack))
+            repairs.append(CUT_TRUNCATED)
+            return value
+        except json.JSONDecodeError:
+            continue
+    raise json.JSONDecodeError("JSON tronqué irréparable", fragment, len(fragment))
+
+
+def validate(value, schema):
+    """
+    Schéma : {clé: type ou tuple de types} pour un objet attendu ;
+    retourne un message d'erreur, ou None si la valeur est conforme.
+    """
+    if not isinstance(value, dict):
+        return f"objet JSON attendu, {type(value).__name__} reçu"
+    for key, expected in schema.items():
+        if key not in value:
+            return f"clé manquante : {key}"
+        if not isinstance(value[key], expected):
+            return f"type invalide pour {key}"
+    return None
+
+
+def extract_json(text, schema=None, check=None):
+    """
+    Premier objet (ou tableau) JSON de la réponse, réparé si nécessaire.
+    schema : voir validate ; check(valeur) -> message d'erreur ou None,
+    pour les contraintes propres à l'appel (ex. exactement 5 questions).
+    """
+    repairs = []
+    if not text:
+        return ExtractionResult(error="réponse vide")
+
+    if schema:
+        # Un objet est attendu : un crochet dans le texte d'introduction n'est pas un début de JSON
+        start = text.find('{')
+    else:
+        start = next((i for i, ch in enumerate(text) if ch in '{['), -1)
+    if start < 0:
+        return ExtractionResult(error="aucun JSON dans la réponse")
+    if '```' in text:
+        repairs.append(CODE_FENCE)
+    if text[:start].replace('```json', '').replace('```', '').strip():
+        repairs.append(LEADING_TEXT)
+
+    fragment, end, stack, cuts = _scan(text, start, repairs)
+    try:
+        if end is None:
+            value = _parse_truncated(fragment, stack, cuts, repairs)
+        else:
+            value = json.loads(fragment)
+            if text[end:].replace('```', '').strip():
+                repairs.append(TRAILING_TEXT)
+    except json.JSONDecodeError as e:
+        return ExtractionResult(repairs=repairs, error=f"JSON invalide : {e.msg}")
+
+    repairs = list(dict.fromkeys(repairs))
+    error = validate(value, schema) if schema else None
+    if error is None and check is not None:
+        error = check(value)
+    if error:
+        return ExtractionResult(value=value, repairs=repairs, error=error)
+    if repairs:
+        logger.info(f"🩹 JSON réparé : {', '.join(repairs)}")
+    return ExtractionResult(value=value, repairs=repairs)
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Cache des réponses Gemini (analyse de CV, génération de fiche de poste)
+
+Clé : (modèle, version du gabarit de prompt, empreinte de l'entrée normalisée).
+Stockage SQLite local partagé entre les workers, avec durée de vie (TTL)
+et éviction des entrées les moins récemment utilisées au-delà d'une taille
+maximale. Seules les réponses valides sont conservées, jamais les erreurs.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'instance', 'llm_cache.sqlite3'
+)
+
+
+def cache_key(model, template_version, input_data):
+    if not isinstance(input_data, str):
+        input_data = json.dumps(input_data, sort_keys=True, ensure_ascii=False)
+    content = json.dumps([model, template_version, normalize_text(input_data)], ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=30 * 24 * 3600, max_bytes=100 * 1024 * 1024, enabled=True):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled and bool(path)
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'bypassed': 0}
+        if self.enabled:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with self._connection() as conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS responses (
+                            key TEXT PRIMARY KEY,
+                            model TEXT NOT NULL,
+                            template TEXT NOT NULL,
+                            value TEXT NOT NULL,
+                            size INTEGER NOT NULL,
+                            created_at REAL NOT NULL,
+                            last_access REAL NOT NULL
+                        )
+                    """)
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Cache des réponses LLM désactivé: {str(e)}")
+                self.enabled = False
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and now - row[1] <= self.ttl_seconds:
+                    conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    self._count('hits')
+                    return json.loads(row[0])
+                if row:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._count('evictions')
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ Lecture du cache LLM impossible: {str(e)}")
+        self._count('misses')
+        return None
+
+    def put(self, key, model, template_version, value):
+        if not self.enabled:
+            return
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, template, value, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, model, template_version, payload, len(payload.encode('utf-8')), now, now)
+                )
+                self._count('writes')
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Écriture du cache LLM impossible: {str(e)}")
+
+    def _evict(self, conn, now):
+        """Supprime les entrées expirées puis les moins récemment utilisées au-delà de max_bytes"""
+        evicted = conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            excess = total - self.max_bytes
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                if excess <= 0:
+                    break
+                victims.append((key,))
+                excess -= size
+            conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+            evicted += len(victims)
+        if evicted:
+            self._count('evictions', evicted)
+
+    def cached_call(self, model, template_version, input_data, compute, use_cache=True, cacheable=None):
+        """
+        Retourne la réponse en cache pour cette entrée, sinon appelle compute()
+        et conserve le résultat s'il est valide (cacheable(result), par défaut : pas d'erreur).
+        use_cache=False force l'appel au modèle (le résultat frais remplace l'entrée en cache).
+        """
+        if not self.enabled:
+            return compute()
+        cacheable = cacheable or (lambda result: isinstance(result, dict) and "error" not in result)
+        key = cache_key(model, template_version, input_data)
+        if use_cache:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+        else:
+            self._count('bypassed')
+        result = compute()
+        if cacheable(result):
+            self.put(key, model, template_version, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = counters['hits'] / lookups if lookups else 0.0
+        counters['enabled'] = self.enabled
+        return counters
+
+
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            _cache_instance = LLMResponseCache(
+                path=os.getenv('LLM_CACHE_PATH', DEFAULT_CACHE_PATH),
+                ttl_seconds=int(os.getenv('LLM_CACHE_TTL_SECONDS', str(30 * 24 * 3600))),
+                max_bytes=int(os.getenv('LLM_CACHE_MAX_BYTES', str(100 * 1024 * 1024))),
+                enabled=os.getenv('LLM_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+            )
+    return _cache_instance
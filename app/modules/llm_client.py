@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Client LLM unique pour tous les appels Gemini
+
+- fournisseur interchangeable (Gemini ou fournisseur local, voir llm_providers)
+- nouvelles tentatives sur erreurs transitoires, backoff exponentiel avec jitter
+- échéance par appel : le délai restant sert de timeout à la requête
+- disjoncteur : après plusieurs échecs consécutifs, les appels échouent
+  immédiatement (CircuitOpenError) pour basculer sur les générateurs de secours
+- limite du nombre d'appels simultanés, partagée par tout le processus
+"""
+import logging
+import os
+import random
+import threading
+import time
+
+from .llm_providers import GeminiProvider, get_llm_provider
+
+logger = logging.getLogger(__name__)
+
+# Erreurs google.api_core considérées comme transitoires (quota, surcharge, délai)
+TRANSIENT_ERRORS = {
+    'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'InternalServerError',
+    'DeadlineExceeded', 'GatewayTimeout', 'Aborted', 'RetryError'
+}
+
+
+class LLMError(Exception):
+    """Erreur d'appel au LLM"""
+
+
+class CircuitOpenError(LLMError):
+    """L'API est considérée dégradée : l'appel n'est pas tenté"""
+
+
+class LLMDeadlineExceeded(LLMError):
+    """L'échéance de l'appel est dépassée"""
+
+
+def is_transient(error):
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return type(error).__name__ in TRANSIENT_ERRORS
+
+
+class CircuitBreaker:
+    """Fermé -> ouvert après failure_threshold échecs consécutifs -> semi-ouvert après reset_timeout"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._probe_in_flight = False
+            if self.state == 'half_open' and not self._probe_in_flight:
+                # Un seul appel de test à la fois pendant la phase semi-ouverte
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def release_probe(self):
+        """L'appel autorisé n'a finalement pas eu lieu"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info("🟢 Disjoncteur LLM refermé")
+            self.state = 'closed'
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.warning(f"🔴 Disjoncteur LLM ouvert après {self.failures} échecs")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+class LLMClient:
+    def __init__(self, max_concurrency=4, max_attempts=3, timeout=60.0,
+                 base_delay=1.0, max_delay=10.0, breaker=None, provider=None):
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.provider = provider or GeminiProvider()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._counters_lock = threading.Lock()
+        self.counters = {'calls': 0, 'retries': 0, 'failures': 0, 'rejected_open_circuit': 0, 'deadline_exceeded': 0}
+
+    def _count(self, counter):
+        with self._counters_lock:
+            self.counters[counter] += 1
+
+    def backoff_delay(self, attempt):
+        """Délai avant la tentative attempt + 1 : exponentiel, plafonné, avec jitter"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    def deadline(self, timeout=None):
+        return time.monotonic() + (timeout if timeout is not None else self.timeout)
+
+    def generate(self, prompt, model="gemini-1.5-flash", deadline=None, max_attempts=None):
+        """
+        Texte généré pour le prompt. Lève CircuitOpenError, LLMDeadlineExceeded
+        ou la dernière erreur de l'API une fois les tentatives épuisées.
+        deadline : échéance absolue (time.monotonic()), par défaut maintenant + timeout.
+        """
+        deadline = deadline or self.deadline()
+        max_attempts = max_attempts or self.max_attempts
+        last_error = None
+
+        for attempt in range(max_attempts):
+            if not self.breaker.allow():
+                self._count('rejected_open_circuit')
+                raise CircuitOpenError("API Gemini indisponible (disjoncteur ouvert)")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._semaphore.acquire(timeout=remaining):
+                self._count('deadline_exceeded')
+                # La tentative autorisée n'a pas eu lieu : elle ne compte ni comme succès ni comme échec
+                self.breaker.release_probe()
+                raise LLMDeadlineExceeded("Échéance de l'appel LLM dépassée")
+            try:
+                self._count('calls')
+                remaining = max(deadline - time.monotonic(), 0.1)
+                text = self.provider.generate(prompt, model, remaining)
+            except Exception as e:
+                if not is_transient(e):
+                    # Erreur de la requête elle-même (prompt refusé, argument invalide) : inutile de réessayer
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                self._count('failures')
+                last_error = e
+                logger.warning(f"⚠️ Appel LLM en échec (tentative {attempt + 1}/{max_attempts}): {str(e)}")
+            else:
+                self.breaker.record_success()
+                return text
+            finally:
+                self._semaphore.release()
+
+            if attempt < max_attempts - 1:
+                delay = self.backoff_delay(attempt)
+                if time.monotonic() + delay >= deadline:
+                    break
+                self._count('retries')
+                time.sleep(delay)
+
+        if last_error is None or time.monotonic() >= deadline:
+            self._count('deadline_exceeded')
+            raise LLMDeadlineExceeded("Échéance de l'appel LLM dépassée")
+        raise last_error
+
+    def stats(self):
+        with self._counters_lock:
+            counters = dict(self.counters)
+        counters['circuit_state'] = self.breaker.state
+        counters['provider'] = self.provider.name
+        return counters
+
+
+_client_instance = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    global _client_instance
+    with _client_lock:
+        if _client_instance is None:
+            _client_instance = LLMClient(
+                max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '4')),
+                max_attempts=int(os.getenv('LLM_MAX_ATTEMPTS', '3')),
+                timeout=float(os.getenv('LLM_TIMEOUT_SECONDS', '60')),
+                breaker=CircuitBreaker(
+                    failure_threshold=int(os.getenv('LLM_BREAKER_THRESHOLD', '5')),
+                    reset_timeout=float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+                ),
+                provider=get_llm_provider()
+            )
+    return _client_instance
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Fournisseurs LLM derrière le client (voir llm_client)
+
+- 'gemini' : API Google Gemini (comportement historique)
+- 'stub' : fournisseur local déterministe, sans réseau, pour les tests et les
+  benchmarks ; rejoue des réponses enregistrées dans un dossier de fixtures
+  et peut simuler une latence et un taux d'erreurs transitoires
+
+Choix par la variable d'environnement LLM_PROVIDER.
+"""
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+
+DEFAULT_FIXTURES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'fixtures', 'llm'
+)
+
+_genai_module = None
+_genai_lock = threading.Lock()
+
+
+def get_genai():
+    """Module google.generativeai, importé et configuré une seule fois, à la première utilisation"""
+    global _genai_module
+    if _genai_module is None:
+        with _genai_lock:
+            if _genai_module is None:
+                if not GEMINI_API_KEY:
+                    raise ValueError("La clé API Gemini n'est pas définie dans le fichier .env")
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                logger.info("API Gemini configurée avec succès")
+                _genai_module = genai
+    return _genai_module
+
+
+class ServiceUnavailable(Exception):
+    """Erreur injectée par le fournisseur local (même nom que l'erreur transitoire de google.api_core)"""
+
+
+class LLMProvider:
+    """Interface commune : generate(prompt, model, timeout) -> texte de la réponse"""
+
+    name = None
+
+    def generate(self, prompt, model, timeout):
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    name = 'gemini'
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, name):
+        # Une instance GenerativeModel par nom de modèle et par processus
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = get_genai().GenerativeModel(name)
+            return self._models[name]
+
+    def generate(self, prompt, model, timeout):
+        return self._model(model).generate_content(prompt, request_options={"timeout": timeout}).text
+
+
+class StubProvider(LLMProvider):
+    """
+    Réponses lues dans fixtures_dir (<nom>.json ou <nom>.txt), choisies d'après
+    le gabarit du prompt (ROUTES). Latence et erreurs sont tirées d'un générateur
+    pseudo-aléatoire initialisé par (seed, empreinte du prompt, rang de l'appel) :
+    une même séquence d'appels donne toujours le même résultat, même en parallèle.
+    """
+
+    name = 'stub'
+
+    # Fragment caractéristique du prompt -> fixture (le premier fragment trouvé l'emporte)
+    ROUTES = [
+        ("Analyse le CV suivant", "analyze_cv"),
+        ("Générez une fiche de poste structurée", "job_description"),
+        ("Créez une description de poste professionnelle", "job_description_text"),
+        ('"category": "Job Description"', "questions_job_description"),
+        ('"category": "Company Culture"', "questions_company_culture"),
+        ('"category": "CV/Professional Life"', "questions_cv_professional_life"),
+        ("analyse des risques", "predictive_analysis"),
+    ]
+
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, latency_ms=(0.0, 0.0), error_rate=0.0, seed=0):
+        self.fixtures_dir = fixtures_dir
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.seed = seed
+        self._fixtures = {}
+        self._calls_per_prompt = {}
+        self._lock = threading.Lock()
+        self.counters = {'calls': 0, 'injected_errors': 0, 'timeouts': 0}
+
+    def route(self, prompt):
+        for marker, fixture in self.ROUTES:
+            if marker in prompt:
+                return fixture
+        raise ValueError("Aucune fixture ne correspond à ce prompt")
+
+    def fixture(self, name):
+        with self._lock:
+            if name not in self._fixtures:
+                for extension in ('.json', '.txt'):
+                    path = os.path.join(self.fixtures_dir, name + extension)
+                    if os.path.exists(path):
+                        with open(path, encoding='utf-8') as f:
+                            self._fixtures[name] = f.read()
+                        break
+                else:
+                    raise FileNotFoundError(f"Fixture LLM introuvable : {name} ({self.fixtures_dir})")
+            return self._fixtures[name]
+
+    def _rng(self, prompt):
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        with self._lock:
+            rank = self._calls_per_prompt.get(digest, 0)
+            self._calls_per_prompt[digest] = rank + 1
+            self.counters['calls'] += 1
+        return random.Random(f"{self.seed}:{digest}:{rank}")
+
+    def _count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def generate(self, prompt, model, timeout):
+        response = self.fixture(self.route(prompt))
+        rng = self._rng(prompt)
+        low, high = self.latency_ms
+        latency = rng.uniform(low, high) / 1000
+        if latency > timeout:
+            time.sleep(timeout)
+            self._count('timeouts')
+            raise TimeoutError(f"Délai de {timeout:.1f}s dépassé (fournisseur local)")
+        time.sleep(latency)
+        if rng.random() < self.error_rate:
+            self._count('injected_errors')
+            raise ServiceUnavailable("503 Service indisponible (erreur injectée)")
+        return response
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+def parse_latency(value):
+    """'200' -> (200, 200) ; '100-400' -> (100, 400), en millisecondes"""
+    low, _, high = str(value).partition('-')
+    low = float(low or 0)
+    return (low, float(high) if high else low)
+
+
+LLM_PROVIDERS = {
+    GeminiProvider.name: GeminiProvider,
+    StubProvider.name: StubProvider,
+}
+
+
+def get_llm_provider():
+    """Fournisseur choisi par LLM_PROVIDER (et LLM_STUB_* pour le fournisseur local)"""
+    name = os.getenv('LLM_PROVIDER', GeminiProvider.name)
+    if name not in LLM_PROVIDERS:
+        raise ValueError(f"Fournisseur LLM inconnu : {name}")
+    if name == StubProvider.name:
+        logger.info("🧪 Fournisseur LLM local (stub) actif : aucune requête réseau")
+        return StubProvider(
+            fixtures_dir=os.getenv('LLM_STUB_FIXTURES_DIR', DEFAULT_FIXTURES_DIR),
+            latency_ms=parse_latency(os.getenv('LLM_STUB_LATENCY_MS', '0')),
+            error_rate=float(os.getenv('LLM_STUB_ERROR_RATE', '0')),
+            seed=int(os.getenv('LLM_STUB_SEED', '0'))
+        )
+    return LLM_PROVIDERS[name]()
@@ -1,17 +1,29 @@
 # -*- coding: utf-8 -*-
+"""
+Fonctions IA : analyse de CV, scoring, génération de contenus (Gemini)
+
+Import léger : torch, sentence_transformers, matplotlib et google.generativeai
+ne sont chargés qu'à leur première utilisation, pour que les scripts CLI,
+migrations et processus CRUD ne paient jamais leur coût au démarrage.
+"""
 import os
+import sys
 import time
 import random
 from dotenv import load_dotenv
-import matplotlib.pyplot as plt
 import numpy as np
-import google.generativeai as genai
 import logging
-import torch
 import re
 import json
-from sentence_transformers import SentenceTransformer
 import gc
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from .embedding_cache import get_embedding_cache
+from .llm_cache import get_llm_cache
+from .llm_client import get_llm_client, CircuitOpenError, LLMDeadlineExceeded
+from .json_extract import extract_json
+from .embedding_backends import get_embedding_backend, DEFAULT_MODEL_NAME
+from .scoring_service import DEFAULT_WEIGHTS, ScoringService
 
 # Configuration des logs
 logging.basicConfig(level=logging.DEBUG)
@@ -21,27 +33,41 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-if not GEMINI_API_KEY:
-    raise ValueError("La clé API Gemini n'est pas définie dans le fichier .env")
+# Désactiver les avertissements de symlinks pour Hugging Face
+os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "true"
+
+def _pyplot():
+    """matplotlib.pyplot avec le backend non interactif (serveur sans affichage)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
 
 # Variable globale pour le modèle Sentence Transformer
+EMBEDDING_MODEL_NAME = DEFAULT_MODEL_NAME
 _model_instance = None
+_model_lock = threading.Lock()
 
 def get_sentence_transformer():
     global _model_instance
     if _model_instance is None:
-        # Libérer la mémoire cache CUDA si possible
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-        
-        # Forcer le garbage collector
-        gc.collect()
-        
-        # Charger le modèle avec des options d'optimisation mémoire
-        _model_instance = SentenceTransformer(
-            'distiluse-base-multilingual-cased-v1',  # Modèle plus léger
-            device='cpu'  # Forcer l'utilisation du CPU
-        )
+        with _model_lock:
+            if _model_instance is None:
+                import torch
+                from sentence_transformers import SentenceTransformer
+
+                # Libérer la mémoire cache CUDA si possible
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+                
+                # Forcer le garbage collector
+                gc.collect()
+                
+                # Charger le modèle avec des options d'optimisation mémoire
+                _model_instance = SentenceTransformer(
+                    EMBEDDING_MODEL_NAME,  # Modèle plus léger
+                    device='cpu'  # Forcer l'utilisation du CPU
+                )
     return _model_instance
 
 # Générateur intelligent de questions (fallback professionnel)
@@ -224,15 +250,6 @@ def generate_intelligent_questions(job_description, cv_data, score_result):
     logger.info(f"✅ Générateur intelligent: {len(all_questions)} questions créées")
     return {"questions": all_questions}
 
-try:
-    # Configuration de l'API Gemini
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    logger.info("API Gemini configurée avec succès")
-except Exception as e:
-    logger.error(f"Erreur lors de la configuration de l'API Gemini: {str(e)}")
-    raise
-
 def generate_job_description(data):
     try:
         logger.info("🚀 Début de la génération de description")
@@ -242,10 +259,6 @@ def generate_job_description(data):
             logger.error("❌ Clé API Gemini manquante")
             raise ValueError("Configuration API manquante")
 
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        logger.info("✅ API Gemini configurée")
-
         prompt = f"""
         Créez une description de poste professionnelle pour :
         - Poste : {data['title']}
@@ -255,11 +268,11 @@ def generate_job_description(data):
         """
         
         logger.info("📤 Envoi de la requête à Gemini")
-        response = model.generate_content(prompt)
+        text = get_llm_client().generate(prompt)
         
-        if response and response.text:
+        if text:
             logger.info("✅ Description générée avec succès")
-            return response.text
+            return text
         else:
             logger.error("❌ Aucune réponse de l'API")
             raise ValueError("Génération échouée")
@@ -269,31 +282,70 @@ def generate_job_description(data):
         raise
 
 # Fonctions utilitaires
-def cosine_similarity(a: torch.Tensor, b: torch.Tensor) -> float:
-    return torch.nn.functional.cosine_similarity(a.unsqueeze(0), b.unsqueeze(0), dim=1).item()
-
-# Désactiver les avertissements de symlinks pour Hugging Face
-os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "true"
-
-# Charger la clé API depuis .env
-load_dotenv()
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if not GEMINI_API_KEY:
-    raise ValueError("Clé API Gemini manquante. Vérifiez le fichier .env.")
-
-# Configurer Gemini
-genai.configure(api_key=GEMINI_API_KEY)
-
-# Utiliser la fonction get_sentence_transformer au lieu d'une instance globale
-def get_embeddings(text):
-    model = get_sentence_transformer()
-    return model.encode(text)
-
-print("Configuration initiale terminée avec succès !")
-
-def generate_job_description(brief, model="gemini-1.5-flash"):
+def _normalize_rows(embeddings):
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def similarity_matrix(cv_skills, job_skills, cv_embeddings=None, job_embeddings=None):
+    """
+    Similarité cosinus entre chaque compétence du CV et chaque compétence du poste,
+    calculée en un seul produit matriciel sur des embeddings normalisés.
+    Retourne la matrice (len(cv_skills) x len(job_skills)) et, pour chaque compétence
+    du CV, la compétence du poste la plus proche avec son score.
+    """
+    if not cv_skills or not job_skills:
+        return {"matrix": np.zeros((len(cv_skills or []), len(job_skills or [])), dtype=np.float32), "matches": []}
+
+    cv_matrix = _normalize_rows(cv_embeddings if cv_embeddings is not None else get_embeddings(cv_skills))
+    job_matrix = _normalize_rows(job_embeddings if job_embeddings is not None else get_embeddings(job_skills))
+
+    matrix = cv_matrix @ job_matrix.T
+    best_indices = matrix.argmax(axis=1)
+    best_scores = matrix[np.arange(matrix.shape[0]), best_indices]
+
+    matches = [
+        {"cv_skill": cv_skill, "job_skill": job_skills[int(j)], "score": float(score)}
+        for cv_skill, j, score in zip(cv_skills, best_indices, best_scores)
+    ]
+    return {"matrix": matrix, "matches": matches}
+
+def get_embeddings(text, use_cache=True):
+    """
+    Embeddings d'un texte ou d'une liste de textes, via le cache (mémoire + disque) :
+    seules les chaînes jamais vues sont encodées par le backend (voir embedding_backends).
+    use_cache=False pour les textes longs et uniques (sections de CV) qui pollueraient le cache.
+    """
+    backend = get_embedding_backend()
+    if not use_cache:
+        return backend.encode(text)
+    cache = get_embedding_cache()
+    if isinstance(text, str):
+        return cache.encode(backend.model_id, [text], backend.encode)[0]
+    return cache.encode(backend.model_id, text, backend.encode)
+
+# Versions des gabarits de prompt : à incrémenter à chaque modification du prompt (invalide le cache)
+JOB_DESCRIPTION_PROMPT_VERSION = 'job_description/v1'
+ANALYZE_CV_PROMPT_VERSION = 'analyze_cv/v1'
+
+# Schémas attendus des réponses JSON (voir json_extract.validate)
+JOB_DESCRIPTION_SCHEMA = {"title": str, "skills": list}
+ANALYZE_CV_SCHEMA = {"Compétences": list}
+QUESTIONS_SCHEMA = {"questions": list}
+PREDICTIVE_ANALYSIS_SCHEMA = {"risks": list, "recommendations": list}
+
+def generate_job_description(brief, model="gemini-1.5-flash", use_cache=True):
+    """Fiche de poste structurée ; un brief identique est servi depuis le cache des réponses LLM"""
+    return get_llm_cache().cached_call(
+        model, JOB_DESCRIPTION_PROMPT_VERSION, brief,
+        lambda: _generate_job_description(brief, model),
+        use_cache=use_cache
+    )
+
+def _generate_job_description(brief, model):
     try:
-        gen_model = genai.GenerativeModel(model)
         prompt = f"""
         Générez une fiche de poste structurée au format JSON à partir du brief suivant : "{brief}". La fiche doit contenir :
         - "title" : Titre du poste
@@ -305,35 +357,28 @@ def generate_job_description(brief, model="gemini-1.5-flash"):
         - "required_degree" : Diplôme requis (ex. "Bachelor", "Master")
         Retournez EXCLUSIVEMENT un seul objet JSON valide, sans texte explicatif, sans balises ```json, sans répétition.
         """
-        response = gen_model.generate_content(prompt)
-        text = response.text.strip()
-        json_match = re.search(r'\{[\s\S]*?\}(?=\s*\{|$)', text)
-        if json_match:
-            return json.loads(json_match.group(0))
+        text = get_llm_client().generate(prompt, model=model)
+        extraction = extract_json(text, JOB_DESCRIPTION_SCHEMA)
+        if extraction.ok:
+            return extraction.value
         else:
-            print("Erreur : Aucun JSON valide trouvé dans la réponse")
+            print(f"Erreur : Aucun JSON valide trouvé dans la réponse ({extraction.error})")
             return None
     except Exception as e:
         print(f"Erreur lors de la génération de la fiche de poste : {str(e)}")
         return None
 
-def extract_text_from_pdf(pdf_path):
-    try:
-        import pdfplumber
-        with pdfplumber.open(pdf_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + " "
-        text = re.sub(r'\s+', ' ', text.strip())
-        return text
-    except Exception as e:
-        return f"Erreur lors de l'extraction du PDF : {str(e)}"
+def analyze_cv(cv_text, model="gemini-1.5-flash", use_cache=True):
+    """Analyse structurée du CV ; un CV déjà analysé est servi depuis le cache des réponses LLM"""
+    return get_llm_cache().cached_call(
+        model, ANALYZE_CV_PROMPT_VERSION, cv_text,
+        lambda: _analyze_cv(cv_text, model),
+        use_cache=use_cache
+    )
 
-def analyze_cv(cv_text, model="gemini-1.5-flash"):
+def _analyze_cv(cv_text, model):
+    raw_response = None
     try:
-        gen_model = genai.GenerativeModel(model)
         prompt = f"""
         Analyse le CV suivant et extrais les informations clés sous forme de JSON structuré :
         - Compétences : liste de chaînes (ex. ["Python", "Java"])
@@ -342,15 +387,84 @@ def analyze_cv(cv_text, model="gemini-1.5-flash"):
         CV : {cv_text}
         Retourne UNIQUEMENT un JSON valide, sans texte supplémentaire, sans balises markdown.
         """
-        response = gen_model.generate_content(prompt)
-        cleaned_response = re.sub(r'^```json\n|```$', '', response.text, flags=re.MULTILINE).strip()
-        return json.loads(cleaned_response)
-    except json.JSONDecodeError as e:
-        return {"error": f"Impossible de parser la réponse en JSON : {str(e)}", "raw_response": response.text}
+        raw_response = get_llm_client().generate(prompt, model=model)
+        extraction = extract_json(raw_response, ANALYZE_CV_SCHEMA)
+        if not extraction.ok:
+            return {"error": f"Impossible de parser la réponse en JSON : {extraction.error}", "raw_response": raw_response}
+        return extraction.value
     except Exception as e:
         return {"error": f"Erreur lors de l'analyse avec Gemini : {str(e)}"}
 
-def calculate_cv_score(cv_data, job_description):
+DEGREE_LEVELS = {"Bac": 1, "Licence": 2, "Bachelor": 2, "Master": 3, "Doctorat": 4}
+
+def experience_years(cv_experiences):
+    """Nombre total d'années d'expérience déduit des durées du CV"""
+    total_years = 0
+    for exp in cv_experiences:
+        duration = exp.get("durée", "").lower()
+        if "ans" in duration or "an" in duration:
+            match = re.search(r'(\d+\.?\d*)', duration)
+            if match:
+                total_years += float(match.group(1))
+        elif "mois" in duration:
+            match = re.search(r'(\d+\.?\d*)', duration)
+            if match:
+                total_years += float(match.group(1)) / 12
+        elif "-" in duration:
+            months = 2
+            total_years += months / 12
+    return total_years
+
+def score_experience(cv_data, job_description):
+    """Score d'expérience entre 0 et 1"""
+    cv_experiences = cv_data.get("Expériences professionnelles", [])
+    required_years = job_description.get("required_experience_years", 0)
+
+    if cv_experiences:
+        total_years = experience_years(cv_experiences)
+        # Gestion spéciale pour les postes de stagiaire (0 ans requis)
+        if required_years == 0:
+            # Pour un poste de stagiaire, toute expérience est un bonus
+            # Score basé sur l'expérience existante (plafonné à 100%)
+            return min(total_years * 0.5, 1.0)  # 2 ans d'expérience = score maximum
+        # Calcul normal pour les postes avec expérience requise
+        return min(total_years / required_years, 1.0)
+
+    # Aucune expérience dans le CV
+    if required_years == 0:
+        # Pour un poste de stagiaire sans expérience requise, c'est acceptable
+        return 0.8  # Score de base pour un stagiaire sans expérience
+    return 0.0
+
+def score_education(cv_data, job_description):
+    """Score de formation entre 0 et 1 (niveau du diplôme le plus élevé / niveau requis)"""
+    cv_educations = cv_data.get("Formations", [])
+    required_degree = job_description.get("required_degree", "")
+    if not (cv_educations and required_degree):
+        return 0.0
+
+    max_cv_degree_level = 0
+    for edu in cv_educations:
+        degree = edu.get("diplôme", "")
+        for deg, level in DEGREE_LEVELS.items():
+            if deg.lower() in degree.lower():
+                max_cv_degree_level = max(max_cv_degree_level, level)
+    required_level = DEGREE_LEVELS.get(required_degree, 1)
+    return min(max_cv_degree_level / required_level, 1.0) if required_level > 0 else 0.0
+
+def combine_cv_scores(skills_score, experience_score, education_score, weights=None):
+    """Score final (en %) à partir des trois dimensions entre 0 et 1 ; weights : profil de pondération"""
+    return ScoringService.weighted_score(
+        {"skills": skills_score, "experience": experience_score, "education": education_score}, weights, stage="cv"
+    ) * 100
+
+def calculate_cv_score(cv_data, job_description, cv_embeddings=None, job_embeddings=None, weights=None):
+    """
+    Score CV vs fiche de poste (compétences, expérience, formation).
+    cv_embeddings / job_embeddings : embeddings déjà calculés des compétences
+    (ex. encodage groupé lors d'un upload en masse) ; sinon ils sont calculés ici.
+    weights : profil de pondération du brief (défaut : pondération par défaut)
+    """
     try:
         logger.info(f"🎯 Calcul du score CV - CV data: {cv_data}")
         logger.info(f"🎯 Calcul du score CV - Job desc: {job_description}")
@@ -364,90 +478,24 @@ def calculate_cv_score(cv_data, job_description):
         logger.info(f"🔧 CV skills: {cv_skills}")
         logger.info(f"🔧 Job skills: {job_skills}")
         
+        skill_matches = []
         if cv_skills and job_skills:
-            # Utiliser get_embeddings avec conversion en tenseur PyTorch
-            cv_embeddings = torch.tensor(get_embeddings(cv_skills))
-            job_embeddings = torch.tensor(get_embeddings(job_skills))
-            
-            logger.info(f"📊 CV embeddings shape: {cv_embeddings.shape}")
-            logger.info(f"📊 Job embeddings shape: {job_embeddings.shape}")
-            
-            # Calculer les similarités individuelles
-            similarities = []
-            for cv_emb in cv_embeddings:
-                skill_similarities = []
-                for job_emb in job_embeddings:
-                    similarity = cosine_similarity(cv_emb, job_emb)
-                    skill_similarities.append(similarity)
-                similarities.append(max(skill_similarities))
+            # Meilleure correspondance de chaque compétence CV (maximum par ligne de la matrice)
+            similarity = similarity_matrix(cv_skills, job_skills, cv_embeddings, job_embeddings)
+            skill_matches = similarity["matches"]
+            logger.info(f"📊 Matrice de similarité: {similarity['matrix'].shape}")
             
             # Calculer le score moyen
-            skills_score = sum(similarities) / len(similarities) if similarities else 0.0
+            skills_score = float(np.mean([m["score"] for m in skill_matches])) if skill_matches else 0.0
             logger.info(f"🎯 Skills score calculé: {skills_score}")
 
-        cv_experiences = cv_data.get("Expériences professionnelles", [])
-        required_years = job_description.get("required_experience_years", 0)
-        logger.info(f"💼 CV experiences: {cv_experiences}")
-        logger.info(f"💼 Required years: {required_years}")
-        
-        if cv_experiences:
-            total_years = 0
-            for exp in cv_experiences:
-                duration = exp.get("durée", "").lower()
-                if "ans" in duration or "an" in duration:
-                    match = re.search(r'(\d+\.?\d*)', duration)
-                    if match:
-                        total_years += float(match.group(1))
-                elif "mois" in duration:
-                    match = re.search(r'(\d+\.?\d*)', duration)
-                    if match:
-                        total_years += float(match.group(1)) / 12
-                elif "-" in duration:
-                    months = 2
-                    total_years += months / 12
-            
-            # Gestion spéciale pour les postes de stagiaire (0 ans requis)
-            if required_years == 0:
-                # Pour un poste de stagiaire, toute expérience est un bonus
-                # Score basé sur l'expérience existante (plafonné à 100%)
-                experience_score = min(total_years * 0.5, 1.0)  # 2 ans d'expérience = score maximum
-                logger.info(f"💼 Poste de stagiaire détecté - Bonus d'expérience appliqué")
-            else:
-                # Calcul normal pour les postes avec expérience requise
-                experience_score = min(total_years / required_years, 1.0)
-            
-            logger.info(f"💼 Total years calculated: {total_years}")
-            logger.info(f"💼 Experience score: {experience_score}")
-        else:
-            # Aucune expérience dans le CV
-            if required_years == 0:
-                # Pour un poste de stagiaire sans expérience requise, c'est acceptable
-                experience_score = 0.8  # Score de base pour un stagiaire sans expérience
-                logger.info(f"💼 Poste de stagiaire sans expérience - Score de base appliqué")
-            else:
-                experience_score = 0.0
-                logger.info(f"💼 Aucune expérience trouvée")
-
-        cv_educations = cv_data.get("Formations", [])
-        required_degree = job_description.get("required_degree", "")
-        logger.info(f"🎓 CV educations: {cv_educations}")
-        logger.info(f"🎓 Required degree: {required_degree}")
-        
-        if cv_educations and required_degree:
-            degree_levels = {"Bac": 1, "Licence": 2, "Bachelor": 2, "Master": 3, "Doctorat": 4}
-            max_cv_degree_level = 0
-            for edu in cv_educations:
-                degree = edu.get("diplôme", "")
-                for deg, level in degree_levels.items():
-                    if deg.lower() in degree.lower():
-                        max_cv_degree_level = max(max_cv_degree_level, level)
-            required_level = degree_levels.get(required_degree, 1)
-            education_score = min(max_cv_degree_level / required_level, 1.0) if required_level > 0 else 0.0
-            logger.info(f"🎓 Max degree level: {max_cv_degree_level}")
-            logger.info(f"🎓 Required level: {required_level}")
-            logger.info(f"🎓 Education score: {education_score}")
-
-        final_score = (0.5 * skills_score + 0.3 * experience_score + 0.2 * education_score) * 100
+        experience_score = score_experience(cv_data, job_description)
+        logger.info(f"💼 Experience score: {experience_score}")
+
+        education_score = score_education(cv_data, job_description)
+        logger.info(f"🎓 Education score: {education_score}")
+
+        final_score = combine_cv_scores(skills_score, experience_score, education_score, weights)
         
         logger.info(f"🏆 Final score components:")
         logger.info(f"   - Skills: {skills_score * 100}%")
@@ -459,7 +507,10 @@ def calculate_cv_score(cv_data, job_description):
             "skills_score": skills_score * 100,
             "experience_score": experience_score * 100,
             "education_score": education_score * 100,
-            "final_score": final_score
+            "final_score": final_score,
+            "skill_matches": skill_matches,
+            # Pondération appliquée, mise à jour avec final_score à chaque re-scoring
+            "weights": weights or DEFAULT_WEIGHTS
         }
         
         logger.info(f"🎯 Returning score result: {result}")
@@ -480,6 +531,7 @@ def visualize_scores(score_result):
         score_result["final_score"]
     ]
 
+    plt = _pyplot()
     plt.figure(figsize=(8, 6))
     plt.bar(labels, scores, color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728'])
     plt.ylim(0, 100)
@@ -521,13 +573,19 @@ def generate_final_report(cv_text, cv_data, score_result, job_description):
     except Exception as e:
         return {"error": f"Erreur lors de la génération du rapport : {str(e)}"}
 
-def generate_questions_for_category(prompt, category, model="gemini-1.5-flash", max_attempts=3):
-    gen_model = genai.GenerativeModel(model)
+def generate_questions_for_category(prompt, category, model="gemini-1.5-flash", max_attempts=3, deadline=None):
+    """
+    5 questions pour une catégorie. Les erreurs transitoires de l'API sont réessayées
+    par le client LLM ; max_attempts borne les nouvelles demandes sur réponse irréparable.
+    deadline : échéance absolue (time.monotonic()) au-delà de laquelle on abandonne.
+    Retourne None en cas d'échec (disjoncteur ouvert, échéance, réponse invalide).
+    """
+    client = get_llm_client()
+    deadline = deadline or client.deadline()
     for attempt in range(max_attempts):
         try:
             logger.info(f"🎯 Génération questions pour {category} (tentative {attempt + 1})")
-            response = gen_model.generate_content(prompt)
-            raw_response = response.text.strip()
+            raw_response = client.generate(prompt, model=model, deadline=deadline).strip()
             
             # Sauvegarder la réponse pour debug
             with open(f"debug_response_{category}.txt", "w", encoding="utf-8") as f:
@@ -535,55 +593,81 @@ def generate_questions_for_category(prompt, category, model="gemini-1.5-flash",
             
             logger.info(f"📝 Réponse brute pour {category}: {raw_response[:200]}...")
 
-            # Nettoyer la réponse en supprimant les balises markdown
-            cleaned_response = re.sub(r'^```json\n|```$', '', raw_response, flags=re.MULTILINE).strip()
-            
-            # Chercher le JSON
-            json_match = re.search(r'\{[\s\S]*\}', cleaned_response)
-            if not json_match:
-                logger.warning(f"⚠️ Tentative {attempt + 1} ({category}): Aucun JSON valide trouvé")
-                if attempt < max_attempts - 1:
-                    time.sleep(2)
-                    continue
-                logger.error(f"❌ Échec final pour {category}: Aucun JSON valide")
-                return None
-
-            # Parser le JSON
-            questions_data = json.loads(json_match.group(0))
-            questions = questions_data.get("questions", [])
-            
-            logger.info(f"📊 {len(questions)} questions trouvées pour {category}")
-            
-            if len(questions) != 5:
-                logger.warning(f"⚠️ Tentative {attempt + 1} ({category}): {len(questions)} questions au lieu de 5")
-                if attempt < max_attempts - 1:
-                    time.sleep(2)
-                    continue
-                logger.error(f"❌ Échec final pour {category}: Nombre incorrect de questions")
-                return None
+            # Extraire le JSON (balises markdown, texte parasite et troncature tolérés) :
+            # on ne redemande que si la réponse est irréparable
+            extraction = extract_json(
+                raw_response, QUESTIONS_SCHEMA,
+                check=lambda data: None if len(data["questions"]) == 5 else f"{len(data['questions'])} questions au lieu de 5"
+            )
+            if not extraction.ok:
+                logger.warning(f"⚠️ Tentative {attempt + 1} ({category}): {extraction.error}")
+                continue
 
+            questions = extraction.value["questions"]
             logger.info(f"✅ Questions générées avec succès pour {category}")
             return questions
             
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ Tentative {attempt + 1} ({category}): Erreur JSON : {str(e)}")
-            if attempt < max_attempts - 1:
-                time.sleep(2)
-                continue
-            logger.error(f"❌ Échec final pour {category}: Erreur JSON")
+        except (CircuitOpenError, LLMDeadlineExceeded) as e:
+            logger.error(f"❌ Abandon pour {category}: {str(e)}")
             return None
         except Exception as e:
-            logger.error(f"❌ Tentative {attempt + 1} ({category}): Erreur générale : {str(e)}")
-            if attempt < max_attempts - 1:
-                time.sleep(2)
-                continue
-            logger.error(f"❌ Échec final pour {category}: Erreur générale")
+            logger.error(f"❌ Échec final pour {category}: Erreur générale : {str(e)}")
             return None
     
     logger.error(f"❌ Échec complet pour {category} après {max_attempts} tentatives")
     return None
 
-def generate_interview_questions(job_description, cv_data, score_result, model="gemini-1.5-flash"):
+# Catégories de questions d'entretien (clé du prompt -> libellé des questions)
+QUESTION_CATEGORY_LABELS = {
+    "Job_Description": "Job Description",
+    "Company_Culture": "Company Culture",
+    "CV_Professional_Life": "CV/Professional Life"
+}
+
+# Échéance globale de la génération des trois catégories (secondes)
+INTERVIEW_QUESTIONS_DEADLINE_SECONDS = float(os.getenv('INTERVIEW_QUESTIONS_DEADLINE_SECONDS', '45'))
+
+def _generate_categories_concurrently(prompts, model, timeout, on_result=None):
+    """
+    Lance generate_questions_for_category pour toutes les catégories en parallèle.
+    Retourne {catégorie: questions ou None} ; une catégorie non terminée à l'échéance vaut None.
+    on_result(catégorie, questions ou None) est appelé dès qu'une catégorie se termine.
+    """
+    deadline = time.monotonic() + timeout
+    executor = ThreadPoolExecutor(max_workers=len(prompts), thread_name_prefix="questions")
+    futures = {
+        executor.submit(generate_questions_for_category, prompt, category, model, deadline=deadline): category
+        for category, prompt in prompts.items()
+    }
+    results = {}
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            category = futures[future]
+            try:
+                results[category] = future.result()
+            except Exception as e:
+                logger.error(f"❌ Erreur pour {category}: {str(e)}")
+                results[category] = None
+            if on_result:
+                on_result(category, results[category])
+    except FuturesTimeoutError:
+        pass
+    # Ne pas attendre les appels en retard : ils s'arrêtent d'eux-mêmes à l'échéance
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    for category in futures.values():
+        if category not in results:
+            logger.error(f"⏱️ Échéance de {timeout:.0f}s dépassée pour {category}")
+            results[category] = None
+    return results
+
+def generate_interview_questions(job_description, cv_data, score_result, model="gemini-1.5-flash", on_category=None):
+    """
+    15 questions d'entretien (5 par catégorie). on_category(libellé, questions, source)
+    est appelé pour chaque catégorie prête : dès sa réponse API (source 'api'), ou
+    après basculement sur le générateur intelligent (source 'fallback').
+    """
+    on_category = on_category or (lambda label, questions, source: None)
     try:
         if not job_description or "error" in cv_data or "error" in score_result:
             return {"error": "Données manquantes ou invalides."}
@@ -650,26 +734,29 @@ def generate_interview_questions(job_description, cv_data, score_result, model="
 
         all_questions = []
         
-        # Tentative de génération avec l'API Gemini
+        # Tentative de génération avec l'API Gemini : les trois catégories en parallèle, sous une échéance commune
         try:
             logger.info("🚀 Tentative de génération avec l'API Gemini")
+            def publish(category, questions):
+                if questions is not None:
+                    on_category(QUESTION_CATEGORY_LABELS[category], questions, 'api')
+
+            results = _generate_categories_concurrently(prompts, model, INTERVIEW_QUESTIONS_DEADLINE_SECONDS, on_result=publish)
+
+            fallback = None
             for category in prompts:
-                questions = generate_questions_for_category(prompts[category], category.replace("/", "_"), model)
+                questions = results.get(category)
                 if questions is None:
-                    logger.warning(f"⚠️ Échec API pour {category}, utilisation du générateur intelligent")
-                    # En cas d'échec d'une catégorie, utiliser le générateur intelligent
-                    intelligent_result = generate_intelligent_questions(job_description, cv_data, score_result)
-                    logger.info("✅ Questions intelligentes générées avec succès")
-                    return intelligent_result
+                    # Seule la catégorie en échec bascule sur le générateur intelligent
+                    logger.warning(f"⚠️ Échec API pour {category}, utilisation du générateur intelligent pour cette catégorie")
+                    if fallback is None:
+                        fallback = generate_intelligent_questions(job_description, cv_data, score_result)["questions"]
+                    questions = [q for q in fallback if q["category"] == QUESTION_CATEGORY_LABELS[category]]
+                    on_category(QUESTION_CATEGORY_LABELS[category], questions, 'fallback')
                 all_questions.extend(questions)
 
-            if len(all_questions) != 15:
-                logger.warning(f"⚠️ Nombre incorrect de questions ({len(all_questions)}), utilisation du générateur intelligent")
-                intelligent_result = generate_intelligent_questions(job_description, cv_data, score_result)
-                logger.info("✅ Questions intelligentes générées avec succès")
-                return intelligent_result
-                
-            logger.info("✅ Questions API générées avec succès")
+            api_categories = sum(1 for category in prompts if results.get(category) is not None)
+            logger.info(f"✅ Questions générées ({api_categories}/{len(prompts)} catégories via l'API)")
             
         except Exception as api_error:
             logger.error(f"❌ Erreur API Gemini: {str(api_error)}")
@@ -721,13 +808,11 @@ def collect_rh_appreciations(questions_data):
 
     return appreciations
 
-def generate_predictive_analysis(job_description, cv_data, score_result, questions_data, appreciations_data=None, model="gemini-1.5-flash", max_attempts=3):
+def generate_predictive_analysis(job_description, cv_data, score_result, questions_data, appreciations_data=None, model="gemini-1.5-flash", max_attempts=3, weights=None):
     try:
         if not job_description or "error" in cv_data or "error" in score_result or not questions_data:
             return {"error": "Données manquantes ou invalides."}
 
-        gen_model = genai.GenerativeModel(model)
-
         # Utiliser les appréciations transmises ou les collecter interactivement
         if appreciations_data:
             appreciations = appreciations_data
@@ -760,51 +845,39 @@ def generate_predictive_analysis(job_description, cv_data, score_result, questio
         JSON valide uniquement.
         """
 
+        # Les erreurs transitoires de l'API sont réessayées par le client LLM ;
+        # max_attempts borne les nouvelles demandes sur réponse irréparable
+        client = get_llm_client()
+        deadline = client.deadline()
         for attempt in range(max_attempts):
             try:
-                response = gen_model.generate_content(prompt)
-                raw_response = response.text.strip()
+                raw_response = client.generate(prompt, model=model, deadline=deadline).strip()
                 with open("debug_analysis_response.txt", "w", encoding="utf-8") as f:
                     f.write(raw_response)
                 print(f"Réponse brute de l’API (tentative {attempt + 1}) : {raw_response[:500]}...")
 
-                json_match = re.search(r'\{[\s\S]*\}', raw_response)
-                if not json_match:
-                    print(f"Tentative {attempt + 1} : Aucun JSON valide.")
-                    if attempt < max_attempts - 1:
-                        time.sleep(2)
-                        continue
-                    return {"error": "Aucun JSON valide après plusieurs tentatives."}
-
-                analysis = json.loads(json_match.group(0))
-                if not all(key in analysis for key in ["risks", "recommendations"]):
-                    print(f"Tentative {attempt + 1} : JSON incomplet.")
+                extraction = extract_json(raw_response, PREDICTIVE_ANALYSIS_SCHEMA)
+                if not extraction.ok:
+                    print(f"Tentative {attempt + 1} : JSON inexploitable ({extraction.error}).")
                     if attempt < max_attempts - 1:
-                        time.sleep(2)
                         continue
-                    return {"error": "JSON incomplet après plusieurs tentatives."}
+                    return {"error": f"Aucun JSON valide après {max_attempts} tentatives : {extraction.error}"}
 
+                analysis = extraction.value
                 break
-            except json.JSONDecodeError as e:
-                print(f"Tentative {attempt + 1} : Erreur JSON : {str(e)}")
-                if attempt < max_attempts - 1:
-                    time.sleep(2)
-                    continue
-                return {"error": f"Erreur JSON après {max_attempts} tentatives : {str(e)}"}
+            except (CircuitOpenError, LLMDeadlineExceeded) as e:
+                return {"error": f"API indisponible : {str(e)}"}
             except Exception as e:
                 print(f"Tentative {attempt + 1} : Erreur : {str(e)}")
-                if attempt < max_attempts - 1:
-                    time.sleep(2)
-                    continue
-                return {"error": f"Erreur API après {max_attempts} tentatives : {str(e)}"}
-
-        predictive_score = (
-            0.30 * scores.get("skills_score", 0) +
-            0.25 * scores.get("experience_score", 0) +
-            0.25 * interview_avg +
-            0.10 * scores.get("education_score", 0) +
-            0.10 * culture_avg
-        )
+                return {"error": f"Erreur API : {str(e)}"}
+
+        predictive_score = ScoringService.weighted_score({
+            "skills": scores.get("skills_score", 0),
+            "experience": scores.get("experience_score", 0),
+            "education": scores.get("education_score", 0),
+            "culture": culture_avg,
+            "interview": interview_avg
+        }, weights)
 
         radar_data = {
             "Compétences": scores.get("skills_score", 0),
@@ -818,6 +891,7 @@ def generate_predictive_analysis(job_description, cv_data, score_result, questio
         ideal_values = [100] * len(radar_labels) + [100]
         angles = np.linspace(0, 2 * np.pi, len(radar_labels), endpoint=False).tolist()
         angles += angles[:1]
+        plt = _pyplot()
         plt.figure(figsize=(8, 8))
         ax = plt.subplot(111, polar=True)
         ax.fill(angles, ideal_values, color='lightgray', alpha=0.3, label='Profil idéal')
@@ -854,8 +928,9 @@ def cleanup_memory():
         del _model_instance
         _model_instance = None
     
-    # Libérer la mémoire CUDA si disponible
-    if torch.cuda.is_available():
+    # Libérer la mémoire CUDA si disponible (torch n'est jamais importé ici s'il ne l'a pas déjà été)
+    torch = sys.modules.get('torch')
+    if torch is not None and torch.cuda.is_available():
         torch.cuda.empty_cache()
     
     # Forcer le garbage collector
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Extraction du texte des CV PDF
+
+- pages traitées une à une (le texte n'est jamais reconstruit par concaténation)
+  et réparties sur un pool de processus pour les documents longs
+- arrêt au-delà d'un budget de pages ou de caractères
+- pdfplumber par défaut ; bascule sur la couche texte de pypdfium2, bien plus
+  rapide, si pdfplumber est lent sur une page, échoue ou n'est pas installé
+- résultat structuré (texte, temps par page, moteur utilisé, erreur éventuelle)
+
+pdfminer est en pur Python et pdfium n'est pas thread-safe : le parallélisme
+passe par des processus, jamais par des threads.
+Réglages : PDF_MAX_PAGES, PDF_MAX_CHARS, PDF_EXTRACT_WORKERS,
+PDF_PARALLEL_MIN_PAGES, PDF_SLOW_PAGE_SECONDS.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+PDFPLUMBER = 'pdfplumber'
+PYPDFIUM2 = 'pypdfium2'
+
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', '20'))
+PDF_MAX_CHARS = int(os.getenv('PDF_MAX_CHARS', '60000'))
+PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', '1'))
+# En dessous de ce nombre de pages, le coût de démarrage du pool dépasse le gain
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '6'))
+# Une page plus lente que ce seuil avec pdfplumber fait passer la suite du document sur pypdfium2
+PDF_SLOW_PAGE_SECONDS = float(os.getenv('PDF_SLOW_PAGE_SECONDS', '1.5'))
+
+
+class PdfExtractionResult:
+    def __init__(self, text='', pages=None, page_count=0, truncated=False, error=None, seconds=0.0):
+        self.text = text
+        self.pages = pages or []
+        self.page_count = page_count
+        self.truncated = truncated
+        self.error = error
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def engine(self):
+        """Moteur utilisé : pdfplumber, pypdfium2, ou 'mixed' si le document a basculé en cours de route"""
+        engines = {page['engine'] for page in self.pages}
+        if not engines:
+            return None
+        return engines.pop() if len(engines) == 1 else 'mixed'
+
+    def to_dict(self):
+        return {
+            "engine": self.engine,
+            "page_count": self.page_count,
+            "pages_extracted": len(self.pages),
+            "characters": len(self.text),
+            "truncated": self.truncated,
+            "seconds": self.seconds,
+            "pages": self.pages,
+            "error": self.error
+        }
+
+    def __repr__(self):
+        return f"PdfExtractionResult(engine={self.engine}, pages={len(self.pages)}/{self.page_count}, chars={len(self.text)}, error={self.error!r})"
+
+
+def _normalize(text):
+    # Espaces multiples et retours à la ligne réduits à un seul espace, sans expression régulière
+    return ' '.join(text.split()) if text else ''
+
+
+class _Pdfium:
+    def __init__(self, path):
+        import pypdfium2 as pdfium
+        self.document = pdfium.PdfDocument(path)
+
+    def __len__(self):
+        return len(self.document)
+
+    def page_text(self, index):
+        page = self.document[index]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+
+    def close(self):
+        self.document.close()
+
+
+class _Plumber:
+    def __init__(self, path):
+        import pdfplumber
+        self.document = pdfplumber.open(path)
+
+    def __len__(self):
+        return len(self.document.pages)
+
+    def page_text(self, index):
+        page = self.document.pages[index]
+        try:
+            return page.extract_text()
+        finally:
+            # Libère le cache de mise en page : mémoire bornée sur les longs documents
+            page.close()
+
+    def close(self):
+        self.document.close()
+
+
+def _open(engine, path):
+    return _Plumber(path) if engine == PDFPLUMBER else _Pdfium(path)
+
+
+def engine_available(engine):
+    try:
+        __import__(engine)
+        return True
+    except ImportError:
+        return False
+
+
+def page_count(path):
+    for engine in (PYPDFIUM2, PDFPLUMBER):
+        try:
+            document = _open(engine, path)
+        except ImportError:
+            continue
+        try:
+            return len(document)
+        finally:
+            document.close()
+    raise RuntimeError("Aucun moteur PDF disponible : installez pypdfium2 ou pdfplumber")
+
+
+def _extract_pages(path, indexes, max_chars, slow_page_seconds, engine=PDFPLUMBER):
+    """
+    Extrait les pages demandées, dans l'ordre ; s'arrête dès que max_chars est atteint.
+    Exécuté en ligne ou dans un processus du pool. Retourne une liste de
+    {"page", "text", "chars", "seconds", "engine"}.
+    """
+    pages = []
+    documents = {}
+    total = 0
+    try:
+        for index in indexes:
+            started = time.perf_counter()
+            try:
+                if engine not in documents:
+                    documents[engine] = _open(engine, path)
+                text = documents[engine].page_text(index)
+            except Exception as e:
+                if engine != PDFPLUMBER or not engine_available(PYPDFIUM2):
+                    raise
+                logger.warning(f"⚠️ pdfplumber en échec page {index + 1} ({str(e)}), bascule sur pypdfium2")
+                engine = PYPDFIUM2
+                documents[engine] = _open(engine, path)
+                text = documents[engine].page_text(index)
+            seconds = time.perf_counter() - started
+
+            text = _normalize(text)
+            pages.append({"page": index + 1, "text": text, "chars": len(text), "seconds": round(seconds, 4), "engine": engine})
+            total += len(text)
+
+            if engine == PDFPLUMBER and seconds > slow_page_seconds and engine_available(PYPDFIUM2):
+                logger.info(f"🐢 pdfplumber lent page {index + 1} ({seconds:.1f}s), suite du document avec pypdfium2")
+                engine = PYPDFIUM2
+            if max_chars and total >= max_chars:
+                break
+    finally:
+        for document in documents.values():
+            document.close()
+    return pages
+
+
+def extract_pdf(path, max_pages=None, max_chars=None, workers=None, slow_page_seconds=None):
+    """
+    Texte d'un PDF sous forme de PdfExtractionResult (jamais d'exception :
+    les erreurs sont dans result.error). Budgets et pool par défaut : variables PDF_*.
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    max_chars = PDF_MAX_CHARS if max_chars is None else max_chars
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    slow_page_seconds = PDF_SLOW_PAGE_SECONDS if slow_page_seconds is None else slow_page_seconds
+    started = time.perf_counter()
+
+    try:
+        total_pages = page_count(path)
+        indexes = list(range(min(total_pages, max_pages) if max_pages else total_pages))
+        engine = PDFPLUMBER if engine_available(PDFPLUMBER) else PYPDFIUM2
+
+        if workers > 1 and len(indexes) >= PDF_PARALLEL_MIN_PAGES:
+            chunk_size = -(-len(indexes) // workers)
+            chunks = [indexes[i:i + chunk_size] for i in range(0, len(indexes), chunk_size)]
+            with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+                results = pool.map(
+                    _extract_pages, [path] * len(chunks), chunks,
+                    [max_chars] * len(chunks), [slow_page_seconds] * len(chunks), [engine] * len(chunks)
+                )
+                pages = [page for chunk in results for page in chunk]
+        else:
+            pages = _extract_pages(path, indexes, max_chars, slow_page_seconds, engine)
+    except Exception as e:
+        logger.error(f"❌ Extraction PDF impossible ({path}): {str(e)}")
+        return PdfExtractionResult(error=f"Erreur lors de l'extraction du PDF : {str(e)}", seconds=time.perf_counter() - started)
+
+    text = ' '.join(filter(None, [page.pop('text') for page in pages]))
+    truncated = len(pages) < total_pages
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars]
+        truncated = True
+
+    result = PdfExtractionResult(
+        text=text, pages=pages, page_count=total_pages, truncated=truncated,
+        seconds=round(time.perf_counter() - started, 4)
+    )
+    if not text:
+        result.error = "Aucun texte extractible dans le PDF (document scanné ?)"
+    if truncated:
+        logger.info(f"✂️ Extraction PDF tronquée : {len(pages)}/{total_pages} pages, {len(text)} caractères")
+    return result
@@ -1,24 +1,93 @@
 """
 Service de calcul des scores pour le système de recrutement TheRecruit
 Gère les 5 dimensions de scoring : Compétences, Expérience, Formation, Culture, Entretien
+
+Seule source des pondérations : le score CV (compétences, expérience,
+formation) et le score prédictif final (5 dimensions) sont des moyennes
+pondérées des scores bruts par dimension (0-100) conservés sur le candidat.
+Un profil de pondération ({"cv": {...}, "final": {...}}) peut remplacer
+DEFAULT_WEIGHTS pour un brief (app.scoring) ; les scores finaux se recalculent
+alors par produit matriciel, sans nouvel appel LLM ni embedding.
 """
 import json
 import logging
 from typing import Dict, List, Any, Tuple
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+DIMENSIONS = ('skills', 'experience', 'education', 'culture', 'interview')
+
+# Pondérations par défaut : étape -> dimension -> poids (somme 1)
+DEFAULT_WEIGHTS = {
+    'cv': {'skills': 0.5, 'experience': 0.3, 'education': 0.2},
+    'final': {'skills': 0.25, 'experience': 0.20, 'education': 0.15, 'culture': 0.20, 'interview': 0.20}
+}
+
+# Dimensions que chaque étape peut pondérer
+STAGE_DIMENSIONS = {
+    'cv': DIMENSIONS[:3],
+    'final': DIMENSIONS
+}
+
 class ScoringService:
     """Service centralisé pour tous les calculs de scores"""
     
     # Poids pour le calcul du score prédictif final
-    FINAL_WEIGHTS = {
-        'skills': 0.30,      # 30% - Compétences techniques
-        'experience': 0.25,   # 25% - Expérience professionnelle
-        'education': 0.15,    # 15% - Formation
-        'culture': 0.15,      # 15% - Adéquation culturelle
-        'interview': 0.15     # 15% - Performance en entretien
-    }
+    FINAL_WEIGHTS = DEFAULT_WEIGHTS['final']
+    
+    @staticmethod
+    def normalize_weights(weights: Dict) -> Dict[str, Dict[str, float]]:
+        """
+        Valide un profil {"cv": {dimension: poids}, "final": {...}} et ramène
+        chaque étape à une somme de 1. Une étape absente garde les poids par
+        défaut, une dimension absente vaut 0. ValueError si le profil est invalide.
+        """
+        if not isinstance(weights, dict):
+            raise ValueError('weights doit être un objet {"cv": {...}, "final": {...}}')
+        unknown = [stage for stage in weights if stage not in STAGE_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Étapes inconnues : {', '.join(unknown)} (disponibles : {', '.join(STAGE_DIMENSIONS)})")
+        
+        normalized = {}
+        for stage, dimensions in STAGE_DIMENSIONS.items():
+            stage_weights = weights.get(stage, DEFAULT_WEIGHTS[stage])
+            if not isinstance(stage_weights, dict):
+                raise ValueError(f"weights.{stage} doit être un objet {{dimension: poids}}")
+            unknown = [dimension for dimension in stage_weights if dimension not in dimensions]
+            if unknown:
+                raise ValueError(f"Dimensions inconnues pour {stage} : {', '.join(unknown)} (disponibles : {', '.join(dimensions)})")
+            values = {}
+            for dimension, weight in stage_weights.items():
+                if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not np.isfinite(weight) or weight < 0:
+                    raise ValueError(f"Poids invalide pour {stage}.{dimension} : {weight!r}")
+                values[dimension] = float(weight)
+            total = sum(values.values())
+            if total <= 0:
+                raise ValueError(f"Les poids de {stage} doivent avoir une somme positive")
+            normalized[stage] = {dimension: values.get(dimension, 0.0) / total for dimension in dimensions}
+        return normalized
+    
+    @staticmethod
+    def weight_vector(weights: Dict, stage: str) -> np.ndarray:
+        """Poids d'une étape dans l'ordre de DIMENSIONS (0 pour les dimensions non pondérées)"""
+        stage_weights = (weights or DEFAULT_WEIGHTS)[stage]
+        return np.array([stage_weights.get(dimension, 0.0) for dimension in DIMENSIONS], dtype=np.float64)
+    
+    @staticmethod
+    def weighted_score(scores: Dict[str, float], weights: Dict = None, stage: str = 'final') -> float:
+        """Score pondéré d'une étape ; scores : {dimension: score 0-100}, None compté 0"""
+        values = np.array([scores.get(dimension) or 0.0 for dimension in DIMENSIONS], dtype=np.float64)
+        return float(values @ ScoringService.weight_vector(weights, stage))
+    
+    @staticmethod
+    def weighted_scores(scores: np.ndarray, weight_rows: np.ndarray) -> np.ndarray:
+        """
+        Version vectorisée : scores (n, 5) dans l'ordre de DIMENSIONS (NaN compté 0),
+        weight_rows (n, 5) poids de chaque ligne (ou (5,) pour tous). Retourne (n,).
+        """
+        return np.einsum('ij,ij->i', np.nan_to_num(scores), np.broadcast_to(weight_rows, scores.shape))
     
     @staticmethod
     def calculate_cv_scores(cv_data: Dict, job_description: Dict) -> Dict[str, float]:
@@ -105,16 +174,14 @@ class ScoringService:
         return interview_score
     
     @staticmethod
-    def calculate_final_predictive_score(scores: Dict[str, float]) -> float:
+    def calculate_final_predictive_score(scores: Dict[str, float], weights: Dict = None) -> float:
         """
         Calcule le score prédictif final basé sur les 5 dimensions
+        scores : {"skills_score": ..., ...} ; weights : profil de pondération (défaut : DEFAULT_WEIGHTS)
         """
-        final_score = 0.0
-        
-        for dimension, weight in ScoringService.FINAL_WEIGHTS.items():
-            score_key = f"{dimension}_score"
-            score = scores.get(score_key, 0.0)
-            final_score += score * weight
+        final_score = ScoringService.weighted_score(
+            {dimension: scores.get(f"{dimension}_score", 0.0) for dimension in DIMENSIONS}, weights
+        )
         
         logger.info(f"🏆 Score prédictif final: {final_score}%")
         logger.info(f"   Détail: {scores}")
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+Index vectoriel local pour la recherche sémantique de candidats
+
+Chaque CV est découpé en sections (compétences, chaque expérience, formations),
+une section = un vecteur normalisé. Une recherche renvoie les candidats dont
+la meilleure section est la plus proche de la requête.
+
+Un index par utilisateur, persisté en .npz et mis à jour incrémentalement
+(upload / suppression). Le fichier fait foi entre les workers gunicorn :
+chaque processus recharge l'index quand le fichier a été modifié ailleurs.
+Un index absent est construit par le travail 'search_index' de la file
+d'attente, jamais pendant une requête.
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from ..job_queue import JOB_STATUS, job_queue
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'instance', 'vector_index'
+)
+
+
+def cv_sections(cv_analysis):
+    """Textes indexés pour un CV : [(libellé, texte), ...]"""
+    if isinstance(cv_analysis, str):
+        try:
+            cv_analysis = json.loads(cv_analysis)
+        except (json.JSONDecodeError, TypeError):
+            return []
+    if not isinstance(cv_analysis, dict):
+        return []
+
+    sections = []
+    skills = [str(s) for s in cv_analysis.get("Compétences", []) if s]
+    if skills:
+        sections.append(("Compétences", ", ".join(skills)))
+    for exp in cv_analysis.get("Expériences professionnelles", []) or []:
+        if isinstance(exp, dict):
+            text = " - ".join(str(exp.get(k)) for k in ("poste", "entreprise", "description") if exp.get(k))
+            if text:
+                sections.append(("Expérience", text))
+    formations = [
+        " - ".join(str(edu.get(k)) for k in ("diplôme", "institution") if edu.get(k))
+        for edu in cv_analysis.get("Formations", []) or [] if isinstance(edu, dict)
+    ]
+    formations = [f for f in formations if f]
+    if formations:
+        sections.append(("Formations", "; ".join(formations)))
+    return sections
+
+
+class FlatIndex:
+    """Recherche exacte par produit scalaire sur une matrice NumPy de vecteurs normalisés"""
+
+    def __init__(self, dim=None):
+        self.dim = dim
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.labels = np.zeros(0, dtype=object)
+        self.vectors = np.zeros((0, dim or 0), dtype=np.float32)
+
+    def __len__(self):
+        return int(np.unique(self.ids).shape[0])
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def add(self, item_id, vectors, labels):
+        """Ajoute (ou remplace) toutes les sections d'un candidat"""
+        self.add_many([(item_id, vectors, labels)])
+
+    def add_many(self, items):
+        """
+        Ajoute (ou remplace) les sections de plusieurs candidats : [(id, vecteurs, libellés), ...]
+        Un seul retrait et une seule concaténation pour tout le lot (coût linéaire).
+        """
+        items = [(item_id, self._normalize(vectors), labels) for item_id, vectors, labels in items]
+        if not items:
+            return
+        vectors = np.vstack([item_vectors for _, item_vectors, _ in items])
+        if self.dim is None or self.vectors.shape[0] == 0:
+            self.dim = vectors.shape[1]
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self.remove([item_id for item_id, _, _ in items])
+        new_ids = np.concatenate([np.full(item_vectors.shape[0], item_id, dtype=np.int64) for item_id, item_vectors, _ in items])
+        new_labels = np.asarray([label for _, _, labels in items for label in labels], dtype=object)
+        self.ids = np.concatenate([self.ids, new_ids])
+        self.labels = np.concatenate([self.labels, new_labels])
+        self.vectors = np.vstack([self.vectors, vectors])
+
+    def remove(self, item_ids):
+        if self.ids.shape[0] == 0:
+            return
+        keep = ~np.isin(self.ids, np.asarray(list(item_ids), dtype=np.int64))
+        self.ids, self.labels, self.vectors = self.ids[keep], self.labels[keep], self.vectors[keep]
+
+    def search(self, query_vector, k=10, allowed_ids=None):
+        """Top-k des identifiants : [(id, score, libellé de la meilleure section)]"""
+        if self.ids.shape[0] == 0:
+            return []
+        scores = self.vectors @ self._normalize(query_vector)[0]
+        if allowed_ids is not None:
+            scores = np.where(np.isin(self.ids, np.asarray(list(allowed_ids), dtype=np.int64)), scores, -np.inf)
+
+        # Meilleure section par candidat
+        unique_ids, inverse = np.unique(self.ids, return_inverse=True)
+        best = np.full(unique_ids.shape[0], -np.inf, dtype=np.float32)
+        np.maximum.at(best, inverse, scores)
+        k = min(k, unique_ids.shape[0])
+        top = np.argpartition(-best, k - 1)[:k]
+        top = top[np.argsort(-best[top])]
+
+        results = []
+        for position in top:
+            if not np.isfinite(best[position]):
+                continue
+            rows = np.where(inverse == position)[0]
+            best_row = rows[np.argmax(scores[rows])]
+            results.append((int(unique_ids[position]), float(best[position]), self.labels[best_row]))
+        return results
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, ids=self.ids, labels=self.labels.astype(str), vectors=self.vectors)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            index = cls(dim=data['vectors'].shape[1] if data['vectors'].ndim == 2 else None)
+            index.ids = data['ids']
+            index.labels = data['labels'].astype(object)
+            index.vectors = data['vectors']
+        return index
+
+
+# Backends disponibles ; un index approximatif (HNSW) pourra s'ajouter ici avec la même interface
+INDEX_BACKENDS = {
+    'flat': FlatIndex,
+}
+
+
+class CandidateSearchIndex:
+    """Index par utilisateur, chargé à la demande et synchronisé avec le fichier sur disque"""
+
+    def __init__(self, directory=DEFAULT_INDEX_DIR, backend='flat'):
+        if backend not in INDEX_BACKENDS:
+            raise ValueError(f"Backend d'index vectoriel inconnu : {backend}")
+        self.directory = directory
+        self.index_class = INDEX_BACKENDS[backend]
+        self._indexes = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, user_id):
+        return os.path.join(self.directory, f"user_{int(user_id)}.npz")
+
+    @contextmanager
+    def _file_lock(self, user_id):
+        with open(self._path(user_id) + ".lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def exists(self, user_id):
+        return os.path.exists(self._path(int(user_id)))
+
+    def _get(self, user_id):
+        """Index à jour du fichier (rechargé si un autre worker l'a modifié)"""
+        path = self._path(user_id)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        cached = self._indexes.get(user_id)
+        if cached and cached[1] == mtime:
+            return cached[0]
+        index = self.index_class.load(path) if mtime else self.index_class()
+        self._indexes[user_id] = (index, mtime)
+        return index
+
+    def _save(self, user_id, index):
+        path = self._path(user_id)
+        index.save(path)
+        self._indexes[user_id] = (index, os.path.getmtime(path))
+
+    @staticmethod
+    def _encode(documents):
+        """Sections de tous les documents encodées en un seul appel au modèle : [(id, vecteurs, libellés), ...]"""
+        from .llms import get_embeddings
+
+        documents = [(cid, sections) for cid, sections in documents if sections]
+        texts = [text for _, sections in documents for _, text in sections]
+        vectors = get_embeddings(texts, use_cache=False) if texts else None
+        items = []
+        offset = 0
+        for candidate_id, sections in documents:
+            count = len(sections)
+            items.append((candidate_id, vectors[offset:offset + count], [label for label, _ in sections]))
+            offset += count
+        return items
+
+    def update(self, user_id, documents=(), removed_ids=()):
+        """
+        documents : [(candidate_id, [(libellé, texte), ...]), ...] à (ré)indexer
+        removed_ids : candidats à retirer
+        """
+        user_id = int(user_id)
+        items = self._encode(documents)
+
+        with self._lock, self._file_lock(user_id):
+            index = self._get(user_id)
+            if removed_ids:
+                index.remove(removed_ids)
+            index.add_many(items)
+            self._save(user_id, index)
+        return len(items)
+
+    def rebuild(self, user_id, documents):
+        """Remplace l'index de l'utilisateur par celui des documents fournis (tous ses CV)"""
+        user_id = int(user_id)
+        items = self._encode(documents)
+        index = self.index_class()
+        index.add_many(items)
+
+        with self._lock, self._file_lock(user_id):
+            self._save(user_id, index)
+        return len(items)
+
+    def search(self, user_id, query, k=10, allowed_ids=None):
+        from .llms import get_embeddings
+
+        user_id = int(user_id)
+        query_vector = get_embeddings(query)
+        with self._lock:
+            index = self._get(user_id)
+        return index.search(query_vector, k=k, allowed_ids=allowed_ids)
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+
+def get_candidate_search_index():
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = CandidateSearchIndex(
+                directory=os.getenv('VECTOR_INDEX_DIR', DEFAULT_INDEX_DIR),
+                backend=os.getenv('VECTOR_INDEX_BACKEND', 'flat')
+            )
+    return _search_index
+
+
+_build_jobs = {}
+_build_jobs_lock = threading.Lock()
+
+
+def submit_index_build(user_id):
+    """
+    Met en file la construction de l'index de l'utilisateur ; un travail encore
+    en attente pour cet utilisateur est réutilisé. Retourne l'identifiant du travail.
+    """
+    user_id = int(user_id)
+    with _build_jobs_lock:
+        job_id = _build_jobs.get(user_id)
+        job = job_queue.get_job(job_id) if job_id else None
+        if not job or job['status'] != JOB_STATUS['QUEUED']:
+            # Un travail déjà démarré a pu lire les candidats avant le dernier ajout : nouveau travail
+            job_id = job_queue.submit('search_index', {"user_id": user_id}, user_id=user_id)
+            _build_jobs[user_id] = job_id
+    return job_id
+
+
+@job_queue.task('search_index')
+def build_index_task(payload, progress):
+    """Construit l'index de tous les CV de l'utilisateur, hors requête"""
+    from ..models import Candidate
+
+    progress('indexing')
+    user_id = payload['user_id']
+    rows = Candidate.query.with_entities(Candidate.id, Candidate.cv_analysis).filter_by(user_id=user_id).all()
+    indexed = get_candidate_search_index().rebuild(user_id, [(row.id, cv_sections(row.cv_analysis)) for row in rows])
+    logger.info(f"🧭 Index sémantique construit pour l'utilisateur {user_id}: {indexed} CV")
+    return {"user_id": user_id, "indexed": indexed}
+
+
+def index_candidates(candidates):
+    """
+    Indexe (ou réindexe) des objets Candidate ; un échec n'interrompt pas l'appelant.
+    Sans index existant, la construction complète est mise en file plutôt que
+    de créer un index ne contenant que ces candidats.
+    """
+    by_user = {}
+    for candidate in candidates:
+        by_user.setdefault(candidate.user_id, []).append((candidate.id, cv_sections(candidate.cv_analysis)))
+    for user_id, documents in by_user.items():
+        try:
+            if get_candidate_search_index().exists(user_id):
+                get_candidate_search_index().update(user_id, documents=documents)
+            else:
+                submit_index_build(user_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Indexation sémantique impossible pour l'utilisateur {user_id}: {str(e)}")
+
+
+def unindex_candidates(user_id, candidate_ids):
+    try:
+        if candidate_ids and get_candidate_search_index().exists(user_id):
+            get_candidate_search_index().update(user_id, removed_ids=list(candidate_ids))
+    except Exception as e:
+        logger.warning(f"⚠️ Désindexation impossible pour l'utilisateur {user_id}: {str(e)}")
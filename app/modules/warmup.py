@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Préchargement du modèle d'embeddings
+
+Mode 'eager' : le modèle est chargé une seule fois dans le master gunicorn
+(preload_app), avant le fork des workers ; les workers, y compris ceux
+recréés par max_requests, le partagent en copy-on-write au lieu de le
+recharger à leur première requête. Un encodage factice initialise les
+noyaux de calcul.
+Mode 'lazy' : comportement historique, chargement à la première utilisation.
+Les backends non partageables après fork (ONNX Runtime) sont préchargés
+dans chaque worker plutôt que dans le master.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+from .embedding_backends import get_embedding_backend
+
+logger = logging.getLogger(__name__)
+
+_state = {
+    "status": "pending",
+    "duration_seconds": None,
+    "error": None
+}
+_state_lock = threading.Lock()
+
+
+def warm_up_model():
+    """Charge le modèle et exécute un encodage factice. Retourne True si le modèle est prêt."""
+    with _state_lock:
+        if _state["status"] == "ready":
+            return True
+        _state["status"] = "loading"
+
+    started = time.perf_counter()
+    try:
+        backend = get_embedding_backend()
+        if backend.name == 'sentence-transformers':
+            import torch
+            # Un seul thread dans le master : pas de pool OpenMP actif au moment du fork
+            torch.set_num_threads(1)
+        backend.encode(["préchauffage du modèle"])
+    except Exception as e:
+        with _state_lock:
+            _state.update(status="failed", error=str(e))
+        logger.error(f"❌ Préchargement du modèle impossible: {str(e)}")
+        return False
+
+    with _state_lock:
+        _state.update(status="ready", error=None, duration_seconds=round(time.perf_counter() - started, 2))
+    logger.info(f"🔥 Modèle d'embeddings préchargé en {_state['duration_seconds']}s")
+    return True
+
+
+def configure_worker_threads(num_threads=None):
+    """À appeler dans chaque worker après le fork : rétablit le parallélisme de torch"""
+    torch = sys.modules.get('torch')
+    if torch is None:
+        return
+    num_threads = num_threads or int(os.getenv('TORCH_NUM_THREADS', str(os.cpu_count() or 1)))
+    torch.set_num_threads(num_threads)
+
+
+def preload_in_master():
+    """Le modèle peut-il être chargé avant le fork et partagé par les workers ?"""
+    return get_embedding_backend().fork_safe
+
+
+def readiness(mode):
+    """État du préchargement pour la sonde de disponibilité (toujours prêt en mode 'lazy')"""
+    backend = get_embedding_backend()
+    with _state_lock:
+        state = dict(_state)
+    state["mode"] = mode
+    state["backend"] = backend.name
+    state["model_loaded"] = backend.loaded
+    state["ready"] = mode == 'lazy' or state["status"] == "ready"
+    return state
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Pagination par curseur et sélection des champs des listes
+
+- une page est délimitée par les valeurs de tri de sa dernière ligne (curseur
+  opaque renvoyé dans X-Next-Cursor) et non par OFFSET : la base reprend
+  directement à la bonne position de l'index, quel que soit le rang de la page
+- fields=a,b limite les colonnes chargées (load_only) et les clés renvoyées ;
+  les relations demandées sont chargées en une requête groupée (selectinload)
+- X-Total-Count donne le nombre total de lignes du filtre
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import tuple_
+from sqlalchemy.orm import RelationshipProperty, load_only, selectinload
+
+
+class PaginationError(ValueError):
+    """Paramètre de pagination ou de sélection invalide (réponse 400)"""
+
+
+class Page:
+    def __init__(self, items, total, next_cursor=None):
+        self.items = items
+        self.total = total
+        self.next_cursor = next_cursor
+
+    def headers(self):
+        headers = {'X-Total-Count': str(self.total)}
+        if self.next_cursor:
+            headers['X-Next-Cursor'] = self.next_cursor
+        return headers
+
+
+def column_field(name, empty=None):
+    """Champ renvoyant directement une colonne : (colonnes à charger, lecture)"""
+    return (name,), lambda obj: _or_empty(getattr(obj, name), empty)
+
+
+def _or_empty(value, empty):
+    return empty if value is None and empty is not None else value
+
+
+def encode_cursor(sort, values):
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    token = json.dumps({"s": sort, "v": payload}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort, columns):
+    """Valeurs de tri du curseur, converties selon le type des colonnes"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        values = data['v']
+    except (ValueError, TypeError, KeyError):
+        raise PaginationError("Curseur invalide")
+    if data.get('s') != sort or not isinstance(values, list) or len(values) != len(columns):
+        raise PaginationError("Curseur invalide pour ce tri")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        if value is None:
+            raise PaginationError("Curseur invalide")
+        try:
+            decoded.append(datetime.fromisoformat(value) if column.type.python_type is datetime else value)
+        except (TypeError, ValueError):
+            raise PaginationError("Curseur invalide")
+    return decoded
+
+
+def page_limit(default=None):
+    """limit de la requête, borné par CANDIDATES_MAX_PAGE_SIZE ; default=None : pas de limite"""
+    raw = request.args.get('limit')
+    if raw is None:
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError("limit doit être un entier")
+    if limit < 1:
+        raise PaginationError("limit doit être positif")
+    return min(limit, current_app.config.get('CANDIDATES_MAX_PAGE_SIZE', 200))
+
+
+def requested_fields(spec):
+    """Champs demandés par fields=a,b (tous les champs du spec par défaut)"""
+    raw = request.args.get('fields')
+    if not raw:
+        return list(spec)
+    names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in names if name not in spec]
+    if unknown:
+        raise PaginationError(f"Champs inconnus : {', '.join(unknown)} (disponibles : {', '.join(spec)})")
+    return names
+
+
+def load_fields(query, model, spec, names, sort_columns=()):
+    """
+    Ne charge que les colonnes utiles aux champs demandés (plus la clé et les
+    colonnes de tri). Une relation citée parmi les colonnes d'un champ est
+    chargée pour toute la page en une seule requête supplémentaire (pas de N+1).
+    """
+    columns = {'id'} | {column.key for column in sort_columns}
+    for name in names:
+        columns.update(spec[name][0])
+    attributes = [getattr(model, column) for column in sorted(columns)]
+    relations = [attribute for attribute in attributes if isinstance(attribute.property, RelationshipProperty)]
+    plain = [attribute for attribute in attributes if not isinstance(attribute.property, RelationshipProperty)]
+    return query.options(load_only(*plain), *[selectinload(relation) for relation in relations])
+
+
+def serialize(obj, spec, names):
+    return {name: spec[name][1](obj) for name in names}
+
+
+def paginate(query, sort, sort_columns, cursor=None, limit=None):
+    """
+    Page de la requête triée par sort_columns (décroissant, la dernière colonne
+    doit être unique). Le curseur reprend après la dernière ligne de la page précédente.
+    """
+    total = query.order_by(None).count()
+    if cursor:
+        values = decode_cursor(cursor, sort, sort_columns)
+        query = query.filter(tuple_(*sort_columns) < tuple_(*values))
+    query = query.order_by(*[column.desc() for column in sort_columns])
+    if limit is None:
+        return Page(query.all(), total)
+
+    # Une ligne de plus que la page : indique s'il reste une page suivante sans second comptage
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, [getattr(rows[-1], column.key) for column in sort_columns])
+    return Page(rows, total, next_cursor)
@@ -3,14 +3,28 @@
 Service de gestion du processus de recrutement
 """
 
-from .constants import CANDIDATE_STATUS, PROCESS_STAGES, SCORING_THRESHOLDS, SCORING_WEIGHTS
+from .constants import PROCESS_STAGES, SCORING_THRESHOLDS
 from .models import Candidate
+from .interview_evaluation import evaluated_clause
+from .modules.scoring_service import ScoringService
+from .scoring import SCORE_COLUMNS, active_profiles, profile_for, score_matrix, weight_rows
 from . import db
+from sqlalchemy import update
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Dimension -> (colonne du candidat, risque signalé sous RISK_THRESHOLD)
+SCORE_DIMENSIONS = {
+    'skills': ('skills_score', "Compétences techniques insuffisantes"),
+    'experience': ('experience_score', "Expérience professionnelle limitée"),
+    'education': ('education_score', "Formation académique inadéquate"),
+    'culture': ('culture_score', "Inadéquation culturelle avec l'entreprise"),
+    'interview': ('interview_score', "Performance d'entretien décevante"),
+}
+RISK_THRESHOLD = 60
+
 class ProcessManager:
     """Gestionnaire du processus de recrutement"""
     
@@ -35,41 +49,78 @@ class ProcessManager:
             return {"error": str(e)}
     
     @staticmethod
-    def calculate_final_predictive_score(candidate_id):
-        """Calcule le score prédictif final après évaluation complète"""
-        try:
-            candidate = Candidate.query.get(candidate_id)
-            if not candidate:
-                return {"error": "Candidat non trouvé"}
-            
-            # Vérifier que tous les scores sont disponibles
-            if candidate.culture_score == 0 or candidate.interview_score == 0:
-                return {"error": "Évaluation incomplète"}
-            
-            # Calculer le score prédictif final
-            final_score = (
-                candidate.skills_score * SCORING_WEIGHTS['SKILLS'] +
-                candidate.experience_score * SCORING_WEIGHTS['EXPERIENCE'] +
-                candidate.education_score * SCORING_WEIGHTS['EDUCATION'] +
-                candidate.culture_score * SCORING_WEIGHTS['CULTURE'] +
-                candidate.interview_score * SCORING_WEIGHTS['INTERVIEW']
-            )
-            
-            # Mettre à jour le candidat
-            candidate.final_predictive_score = final_score
-            candidate.predictive_score = final_score  # Rétrocompatibilité
-            candidate.process_stage = PROCESS_STAGES['FINAL_EVALUATION']
-            candidate.status = CANDIDATE_STATUS['FULLY_EVALUATED']
-            
-            db.session.commit()
-            
-            logger.info(f"Score prédictif final calculé pour candidat {candidate_id}: {final_score:.2f}%")
-            return {"success": True, "final_score": final_score}
-            
-        except Exception as e:
-            logger.error(f"Erreur calcul score final candidat {candidate_id}: {str(e)}")
-            db.session.rollback()
-            return {"error": str(e)}
+    def final_status(final_score):
+        """Statut après finalisation, selon le score prédictif"""
+        if final_score >= SCORING_THRESHOLDS['EXCELLENT']:  # >= 80
+            return "Recommandé"
+        elif final_score >= SCORING_THRESHOLDS['GOOD']:      # >= 60
+            return "En évaluation"
+        return "À revoir"
+    
+    @staticmethod
+    def score_risks(scores):
+        """Risques associés aux dimensions sous le seuil ; scores : {dimension: score}"""
+        return [risk for dimension, (_, risk) in SCORE_DIMENSIONS.items()
+                if (scores.get(dimension) or 0) < RISK_THRESHOLD]
+    
+    @staticmethod
+    def finalize_candidates(user_id, brief_id=None, candidate_ids=None):
+        """
+        Finalise en une passe tous les candidats éligibles (appréciations culture
+        et entretien enregistrées) de
+        l'utilisateur, filtrés par brief et/ou par identifiants : une requête
+        charge les profils de pondération actifs, une autre les scores bruts ;
+        le score pondéré est calculé en un produit matriciel et une seule
+        instruction UPDATE (executemany) écrit scores, statuts, risques et
+        recommandations.
+        Sans commit : l'appelant valide la transaction.
+        Retourne {candidate_id: résultat} avec scores, risques et recommandation.
+        """
+        profiles = active_profiles(user_id)
+        query = db.session.query(
+            Candidate.id, Candidate.brief_id, *[getattr(Candidate, column) for column in SCORE_COLUMNS]
+        ).filter(
+            Candidate.user_id == user_id,
+            # Culture et entretien réellement évalués : au moins une appréciation de chaque catégorie
+            evaluated_clause()
+        )
+        if brief_id is not None:
+            query = query.filter(Candidate.brief_id == brief_id)
+        if candidate_ids is not None:
+            query = query.filter(Candidate.id.in_(candidate_ids))
+        
+        rows = query.all()
+        brief_ids = [row.brief_id for row in rows]
+        final_scores = ScoringService.weighted_scores(score_matrix(rows), weight_rows(profiles, brief_ids, 'final'))
+        
+        results = {}
+        for row, final_score in zip(rows, final_scores.tolist()):
+            scores = {dimension: getattr(row, column) for dimension, (column, _) in SCORE_DIMENSIONS.items()}
+            results[row.id] = {
+                "final_score": final_score,
+                "scores": scores,
+                "risks": ProcessManager.score_risks(scores),
+                "recommendation": ProcessManager.get_recommendation_from_score(final_score),
+                "status": ProcessManager.final_status(final_score),
+                "scoring_profile_id": getattr(profile_for(profiles, row.brief_id), 'id', None)
+            }
+        
+        if results:
+            db.session.execute(update(Candidate), [
+                {
+                    "id": candidate_id,
+                    "final_predictive_score": result["final_score"],
+                    "predictive_score": result["final_score"],  # Rétrocompatibilité
+                    "process_stage": PROCESS_STAGES['FINAL_EVALUATION'],
+                    "status": result["status"],
+                    "risks": result["risks"],
+                    "recommendations": result["recommendation"],
+                    "scoring_profile_id": result["scoring_profile_id"]
+                }
+                for candidate_id, result in results.items()
+            ])
+        logger.info(f"🏁 Finalisation groupée : {len(results)} candidat(s) (utilisateur {user_id}, brief {brief_id})")
+        return results
     
     @staticmethod
     def get_candidate_stage_info(candidate_id):
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Comptage des requêtes SQL
+
+Un écouteur before_cursor_execute compte les requêtes réellement envoyées à
+la base :
+- count_queries() encadre un bloc de code (tests : plafond de requêtes par
+  route, indépendant du nombre de lignes)
+- avec QUERY_COUNT_LOG_THRESHOLD > 0, chaque requête HTTP qui dépasse le
+  seuil est journalisée avec son nombre de requêtes (repérage des N+1), et
+  l'en-tête X-Query-Count est ajouté à la réponse
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def record(self, statement):
+        with self._lock:
+            self.count += 1
+            self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine):
+    """Compte les requêtes émises sur engine pendant le bloc (tous threads confondus)"""
+    counter = QueryCounter()
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        counter.record(statement)
+
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+
+
+def init_app(app, db):
+    threshold = app.config.get('QUERY_COUNT_LOG_THRESHOLD', 0)
+    if not threshold:
+        return
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count_request_query(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g.query_count = g.get('query_count', 0) + 1
+
+    @app.after_request
+    def report_query_count(response):
+        count = g.get('query_count', 0)
+        response.headers['X-Query-Count'] = str(count)
+        if count > threshold:
+            logger.warning(f"🐌 {request.method} {request.path} : {count} requêtes SQL (seuil {threshold})")
+        return response
+
+    logger.info(f"📊 Comptage des requêtes SQL actif (seuil de journalisation : {threshold})")
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Matching inversé : classement des candidats déjà enregistrés face à un brief
+
+Les trois dimensions de calculate_cv_score (compétences, expérience, formation)
+sont recalculées sans nouvel upload ni appel LLM :
+- toutes les compétences des CV sont encodées en un seul lot (cache d'embeddings)
+  et comparées aux compétences du brief en un seul produit matriciel
+- expérience et formation sont réparties sur un pool de processus pour les gros volumes
+Les résultats sont conservés dans CandidateMatch pour une version donnée du brief.
+La pondération n'entre pas dans la version : un changement de profil de
+pondération recalcule final_score sur place (voir app.scoring).
+"""
+import hashlib
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from . import db
+from .models import Candidate, CandidateMatch
+from .scoring import brief_profile, profile_weights
+from .modules.brief_index import load_brief_embeddings
+from .modules.embedding_backends import get_embedding_backend
+from .modules.llms import (
+    get_embeddings,
+    similarity_matrix,
+    score_experience,
+    score_education,
+    combine_cv_scores
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_json(value):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return {}
+    return value or {}
+
+
+def brief_match_version(job_description):
+    """Empreinte de tout ce qui influence les scores bruts : compétences, exigences et modèle"""
+    content = json.dumps({
+        "model": get_embedding_backend().model_id,
+        "skills": job_description.get("skills", []),
+        "required_experience_years": job_description.get("required_experience_years", 0),
+        "required_degree": job_description.get("required_degree", "")
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _score_structured(job_description, cv_datas):
+    """Scores expérience / formation d'un paquet de CV (exécuté dans un processus du pool)"""
+    return [(score_experience(cv_data, job_description), score_education(cv_data, job_description)) for cv_data in cv_datas]
+
+
+def _structured_scores(job_description, cv_datas):
+    config = current_app.config
+    workers = config.get('REVERSE_MATCH_WORKERS', 1)
+    if workers <= 1 or len(cv_datas) < config.get('REVERSE_MATCH_POOL_MIN_ITEMS', 200):
+        return _score_structured(job_description, cv_datas)
+
+    chunk_size = -(-len(cv_datas) // workers)
+    chunks = [cv_datas[i:i + chunk_size] for i in range(0, len(cv_datas), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_score_structured, [job_description] * len(chunks), chunks)
+        return [scores for chunk in results for scores in chunk]
+
+
+def _skills_scores(job_skills, job_embeddings, cv_skill_lists):
+    """Score compétences de chaque CV : moyenne, sur ses compétences, de la meilleure similarité avec le brief"""
+    unique_skills = list(dict.fromkeys(skill for skills in cv_skill_lists for skill in skills))
+    if not unique_skills or not job_skills:
+        return [0.0] * len(cv_skill_lists)
+
+    cv_embeddings = get_embeddings(unique_skills)
+    matrix = similarity_matrix(unique_skills, job_skills, cv_embeddings, job_embeddings)["matrix"]
+    best = dict(zip(unique_skills, matrix.max(axis=1)))
+    return [float(np.mean([best[s] for s in skills])) if skills else 0.0 for skills in cv_skill_lists]
+
+
+def score_candidates_for_brief(brief, candidates, weights=None):
+    """
+    Calcule les scores des candidats donnés face au brief ; retourne une liste de CandidateMatch non enregistrés
+    weights : profil de pondération (défaut : celui du brief)
+    """
+    job_desc = _parse_json(brief.full_data)
+    weights = weights or profile_weights(brief_profile(brief.user_id, brief.id))
+    version = brief_match_version(job_desc)
+    cv_datas = [_parse_json(c.cv_analysis) for c in candidates]
+
+    job_skills = job_desc.get("skills", [])
+    job_embeddings = load_brief_embeddings(brief) if job_skills else None
+    skills_scores = _skills_scores(job_skills, job_embeddings, [cv.get("Compétences", []) or [] for cv in cv_datas])
+    structured = _structured_scores(job_desc, cv_datas)
+
+    matches = []
+    for candidate, skills_score, (experience_score, education_score) in zip(candidates, skills_scores, structured):
+        matches.append(CandidateMatch(
+            brief_id=brief.id,
+            candidate_id=candidate.id,
+            user_id=brief.user_id,
+            brief_version=version,
+            skills_score=skills_score * 100,
+            experience_score=experience_score * 100,
+            education_score=education_score * 100,
+            final_score=combine_cv_scores(skills_score, experience_score, education_score, weights)
+        ))
+    return matches
+
+
+def refresh_brief_matches(brief, include_own=False):
+    """
+    Met à jour le cache des scores du brief : seuls les candidats sans score
+    pour la version courante du brief sont (re)calculés. Retourne le nombre de candidats calculés.
+    Un appel concurrent peut enregistrer les mêmes scores entre-temps : la
+    transaction est alors annulée et les candidats encore manquants relus.
+    """
+    try:
+        return _refresh_brief_matches(brief, include_own)
+    except IntegrityError:
+        db.session.rollback()
+        logger.info(f"🔁 Scores du brief {brief.id} enregistrés par un appel concurrent, relecture")
+        return _refresh_brief_matches(brief, include_own)
+
+
+def _refresh_brief_matches(brief, include_own):
+    version = brief_match_version(_parse_json(brief.full_data))
+
+    # Les scores d'une ancienne version du brief sont périmés
+    CandidateMatch.query.filter(
+        CandidateMatch.brief_id == brief.id,
+        CandidateMatch.brief_version != version
+    ).delete(synchronize_session=False)
+
+    scored_ids = db.session.query(CandidateMatch.candidate_id).filter_by(brief_id=brief.id)
+    query = Candidate.query.filter(
+        Candidate.user_id == brief.user_id,
+        ~Candidate.id.in_(scored_ids)
+    )
+    if not include_own:
+        query = query.filter(db.or_(Candidate.brief_id.is_(None), Candidate.brief_id != brief.id))
+    candidates = query.all()
+
+    if candidates:
+        db.session.add_all(score_candidates_for_brief(brief, candidates))
+    db.session.commit()
+
+    if candidates:
+        logger.info(f"🔁 Matching inversé du brief {brief.id}: {len(candidates)} candidats calculés")
+    return len(candidates)
+
+
+def get_brief_matches(brief, page=1, per_page=20, include_own=False):
+    """Scores paginés, meilleurs d'abord"""
+    computed = refresh_brief_matches(brief, include_own=include_own)
+    query = CandidateMatch.query.filter_by(brief_id=brief.id)
+    if not include_own:
+        query = query.join(Candidate, Candidate.id == CandidateMatch.candidate_id).filter(
+            db.or_(Candidate.brief_id.is_(None), Candidate.brief_id != brief.id)
+        )
+    pagination = query.order_by(CandidateMatch.final_score.desc(), CandidateMatch.candidate_id).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+    return {
+        "brief_id": brief.id,
+        "items": [match.to_dict() for match in pagination.items],
+        "page": pagination.page,
+        "per_page": pagination.per_page,
+        "total": pagination.total,
+        "pages": pagination.pages,
+        "computed": computed
+    }
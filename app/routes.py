@@ -1,23 +1,29 @@
 import os
 import json
 import logging
+import time
 import tempfile
+import zipfile
 from io import BytesIO
 from datetime import datetime
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, current_app
 from flask_cors import CORS, cross_origin
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
 from . import db
-from .models import JobBrief, CompanyContext, InterviewQuestion, Candidate, Appreciation, User
-from .constants import CANDIDATE_STATUS, PROCESS_STAGES, SCORING_THRESHOLDS, SCORING_WEIGHTS
+from .models import JobBrief, CompanyContext, InterviewQuestion, Candidate, Appreciation, User, ScoringProfile
+from .constants import CANDIDATE_STATUS, PROCESS_STAGES
 from .process_manager import ProcessManager
+from .job_queue import JobFailed, job_queue
+from .cv_pipeline import process_cv_upload, CvPipelineError
+from .reverse_matching import get_brief_matches
+from .interview_evaluation import save_interview_evaluations
+from .scoring import brief_profile, create_profile, profile_weights
+from .streaming import wants_event_stream, job_event_response, last_event_id
+from .pagination import PaginationError, column_field, load_fields, page_limit, paginate, requested_fields, serialize
 from .modules.llms import (
     generate_job_description,
-    extract_text_from_pdf,
-    analyze_cv,
     calculate_cv_score,
-    visualize_scores,
-    generate_final_report,
     generate_interview_questions,
     generate_predictive_analysis
 )
@@ -27,6 +33,14 @@ from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from app.utils.therecruit_pdf_template import create_therecruit_pdf
+from .modules.embedding_cache import get_embedding_cache
+from .modules.llm_cache import get_llm_cache
+from .modules.llm_client import get_llm_client
+from .modules.brief_index import refresh_brief_embeddings, load_brief_embeddings
+from .modules.vector_index import get_candidate_search_index, submit_index_build, unindex_candidates
+from .modules.warmup import readiness
+from .modules.cv_storage import store_upload
+from .modules.scoring_service import DEFAULT_WEIGHTS, ScoringService
 
 
 
@@ -66,6 +80,19 @@ def create_context():
     db.session.commit()
     return jsonify({"message": "Contexte créé", "context_id": context.id}), 201
 
+def _use_llm_cache():
+    """Contournement du cache des réponses LLM : ?no_cache=1 ou en-tête Cache-Control: no-cache"""
+    if request.args.get('no_cache', '').lower() in ('1', 'true', 'yes'):
+        return False
+    return 'no-cache' not in request.headers.get('Cache-Control', '').lower()
+
+def _index_brief_embeddings(brief):
+    """Précalcule les embeddings du brief ; un échec ne bloque pas l'enregistrement (recalcul au scoring)"""
+    try:
+        refresh_brief_embeddings(brief)
+    except Exception as e:
+        logger.warning(f"Embeddings du brief non calculés: {str(e)}")
+
 @bp.route('/job-briefs', methods=['POST'])
 @jwt_required() # Réactiver le décorateur JWT
 @cross_origin(supports_credentials=True, origins=["http://localhost:8080", "https://technova-frontend.vercel.app"], allow_headers=["Content-Type", "Authorization"])
@@ -80,7 +107,7 @@ def create_brief():
             "title": data["title"],
             "experience": data.get("experience", "3-5 ans"),
             "description": data.get("description", "")
-        })
+        }, use_cache=_use_llm_cache())
         # Suppression du patch inutile sur full_data
         if not full_data or not isinstance(full_data, dict) or not all(k in full_data for k in ["title", "description", "skills", "responsibilities", "qualifications", "required_experience_years", "required_degree"]):
             logger.error(f"Fiche de poste LLM invalide ou vide : {full_data}")
@@ -98,6 +125,7 @@ def create_brief():
             updated_at=datetime.utcnow()
         )
         db.session.add(brief)
+        _index_brief_embeddings(brief)
         db.session.commit()
         return jsonify({"message": "Fiche créée avec succès", "brief": brief.to_dict()}), 201
     except Exception as e:
@@ -152,7 +180,7 @@ def update_brief(brief_id):
                     'title': data.get('title', brief.title),
                     'experience': data.get('experience', brief.experience),
                     'description': data.get('description', brief.description)
-                })
+                }, use_cache=_use_llm_cache())
                 if full_description:
                     # Patch robustesse expérience (stagiaire, 0-1 ans, etc.)
                     # Suppression du patch inutile sur full_description
@@ -170,6 +198,7 @@ def update_brief(brief_id):
             brief.description = data['description']
         brief.full_data = json.dumps(data.get('full_data', json.loads(brief.full_data) if brief.full_data else {}))
         brief.updated_at = datetime.utcnow()
+        _index_brief_embeddings(brief)
 
         db.session.commit()
 
@@ -194,10 +223,12 @@ def delete_brief(brief_id):
 
         # Suppression en cascade des candidats liés à ce brief
         from app.models import Candidate
+        candidate_ids = [row.id for row in Candidate.query.with_entities(Candidate.id).filter_by(brief_id=brief_id)]
         Candidate.query.filter_by(brief_id=brief_id).delete()
 
         db.session.delete(brief)
         db.session.commit()
+        unindex_candidates(current_user_id, candidate_ids)
 
         return jsonify({"status": "success", "message": "Fiche de poste supprimée"}), 200
     except Exception as e:
@@ -205,6 +236,29 @@ def delete_brief(brief_id):
         logger.error(f"Erreur lors de la suppression: {str(e)}")
         return jsonify({"error": "Erreur lors de la suppression", "details": str(e)}), 500
 
+@bp.route('/job-briefs/<int:brief_id>/matches', methods=['GET'])
+@jwt_required()
+def get_brief_matches_api(brief_id):
+    """
+    Matching inversé : candidats déjà enregistrés (autres briefs) classés face à ce brief
+    Paramètres : page, per_page (20 par défaut, 100 max), include_own (inclure les candidats du brief)
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        brief = JobBrief.query.filter_by(id=brief_id, user_id=current_user_id).first()
+        if not brief:
+            return jsonify({"error": "Fiche de poste non trouvée", "brief_id": brief_id}), 404
+
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
+        include_own = request.args.get('include_own', 'false').lower() in ('1', 'true', 'yes')
+
+        return jsonify(get_brief_matches(brief, page=page, per_page=per_page, include_own=include_own)), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erreur lors du matching inversé du brief {brief_id}: {str(e)}")
+        return jsonify({"error": "Erreur serveur", "details": str(e)}), 500
+
 @bp.route('/job-briefs/<int:brief_id>/export-pdf', methods=['GET'])
 @jwt_required()
 def export_pdf(brief_id):
@@ -261,88 +315,77 @@ def export_pdf(brief_id):
         logger.error(f"Erreur lors de l'export PDF: {str(e)}")
         return jsonify({"error": "Erreur lors de la génération du PDF", "details": str(e)}), 500
 
+# Tris des listes de candidats : colonnes du keyset, la dernière (id) départage les ex æquo
+CANDIDATE_SORTS = {
+    'score': (Candidate.final_predictive_score, Candidate.created_at, Candidate.id),
+    'created_at': (Candidate.created_at, Candidate.id),
+}
+
+def _appreciation_dicts(candidate):
+    return [
+        {
+            "id": a.id,
+            "candidate_id": a.candidate_id,
+            "question": a.question,
+            "category": a.category,
+            "appreciation": a.appreciation,
+            "score": a.score
+        }
+        for a in candidate.appreciations
+    ]
+
+# Champs de /candidates : nom -> (colonnes à charger, lecture)
+CANDIDATE_FIELDS = {
+    'id': column_field('id'),
+    'name': column_field('name'),
+    'cv_analysis': column_field('cv_analysis'),
+    'predictive_score': column_field('predictive_score'),
+    'status': column_field('status'),
+    'brief_id': column_field('brief_id'),
+    'user_id': column_field('user_id'),
+    'score_details': column_field('score_details', {}),
+    'interview_questions': column_field('interview_questions', []),
+    'appreciations': (('appreciations',), _appreciation_dicts),
+    'risks': column_field('risks', []),
+    'recommendations': column_field('recommendations', []),
+}
+
+def _candidate_page(query, spec, default_sort, default_limit=None):
+    """
+    Page de candidats selon les paramètres de la requête : sort (score ou
+    created_at), cursor, limit et fields. Retourne (page, champs demandés).
+    """
+    sort = request.args.get('sort', default_sort)
+    if sort not in CANDIDATE_SORTS:
+        raise PaginationError(f"Tri inconnu : {sort} (disponibles : {', '.join(CANDIDATE_SORTS)})")
+    sort_columns = CANDIDATE_SORTS[sort]
+    if default_limit is None and request.args.get('cursor'):
+        default_limit = current_app.config.get('CANDIDATES_PAGE_SIZE', 50)
+    names = requested_fields(spec)
+    query = load_fields(query, Candidate, spec, names, sort_columns)
+    page = paginate(query, sort, sort_columns, cursor=request.args.get('cursor'), limit=page_limit(default_limit))
+    return page, names
+
 @bp.route('/candidates', methods=['GET'])
 @jwt_required()
 def get_candidates():
+    """
+    Candidats de l'utilisateur. Sans limit ni cursor, tous les candidats sont
+    renvoyés (compatibilité) ; sinon pagination par curseur (X-Next-Cursor).
+    """
     try:
         current_user_id = get_jwt_identity()
         logger.info(f"Récupération des candidats pour l'utilisateur {current_user_id}")
-        candidates = Candidate.query.filter_by(user_id=current_user_id).all()
-        logger.info(f"Nombre de candidats trouvés: {len(candidates)}")
-        
-        candidates_data = []
-        for c in candidates:
-            # Correction parsing interview_questions, score_details, risks, recommendations
-            questions = c.interview_questions
-            if isinstance(questions, str):
-                try:
-                    questions = json.loads(questions)
-                except Exception:
-                    questions = []
-            elif questions is None:
-                questions = []
-                
-            # Parsing score_details
-            score_details = c.score_details
-            if isinstance(score_details, str):
-                try:
-                    score_details = json.loads(score_details)
-                except Exception:
-                    score_details = {}
-            elif score_details is None:
-                score_details = {}
-                
-            # Parsing risks - gestion des types PostgreSQL JSON
-            risks = c.risks
-            if isinstance(risks, str):
-                try:
-                    risks = json.loads(risks)
-                except Exception:
-                    risks = []
-            elif risks is None:
-                risks = []
-            # Si c'est déjà une liste/dict (PostgreSQL JSON), on la garde telle quelle
-            elif not isinstance(risks, list):
-                risks = []
-                
-            # Parsing recommendations - gestion des types PostgreSQL JSON
-            recommendations = c.recommendations
-            if isinstance(recommendations, str):
-                try:
-                    recommendations = json.loads(recommendations)
-                except Exception:
-                    recommendations = []
-            elif recommendations is None:
-                recommendations = []
-            # Si c'est déjà une liste/dict (PostgreSQL JSON), on la garde telle quelle
-            elif not isinstance(recommendations, list):
-                recommendations = []
-                
-            candidates_data.append({
-                "id": c.id,
-                "name": c.name,
-                "cv_analysis": json.loads(c.cv_analysis) if c.cv_analysis else None,
-                "predictive_score": c.predictive_score,
-                "status": c.status,
-                "brief_id": c.brief_id,
-                "user_id": c.user_id,
-                "score_details": score_details,  # <-- Objet parsé
-                "interview_questions": questions,  # <-- Toujours une liste
-                "appreciations": [
-                    {
-                        "id": a.id,
-                        "candidate_id": a.candidate_id,
-                        "question": a.question,
-                        "category": a.category,
-                        "appreciation": a.appreciation,
-                        "score": a.score
-                    }
-                    for a in c.appreciations
-                ] if c.appreciations else [],
-                "risks": risks,  # <-- Liste parsée
-                "recommendations": recommendations  # <-- Liste parsée
-            })
-        return jsonify(candidates_data), 200
+        page, names = _candidate_page(
+            Candidate.query.filter_by(user_id=current_user_id), CANDIDATE_FIELDS, 'created_at'
+        )
+        logger.info(f"Nombre de candidats trouvés: {page.total}")
+        
+        # Colonnes JSON natives : valeurs déjà désérialisées par le pilote
+        candidates_data = [serialize(c, CANDIDATE_FIELDS, names) for c in page.items]
+        return jsonify(candidates_data), 200, page.headers()
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des candidats: {str(e)}")
         return jsonify({
@@ -427,80 +470,49 @@ def upload_cv():
                 return jsonify({"error": "Aucun brief trouvé pour cet utilisateur"}), 404
             brief_id = brief.id
         
-        # Sauvegarder le fichier
-        file_path = os.path.join("uploads", file.filename)
-        os.makedirs("uploads", exist_ok=True)
-        file.save(file_path)
-        
-        # Extraire le texte du PDF
-        cv_text = extract_text_from_pdf(file_path)
-        if cv_text.startswith("Erreur"):
-            return jsonify({"error": cv_text}), 400
-        
-        # Analyser le CV
-        cv_data = analyze_cv(cv_text)
-        if "error" in cv_data:
-            return jsonify(cv_data), 500
-        
-        # Récupérer les détails du poste
-        job_desc = json.loads(brief.full_data) if isinstance(brief.full_data, str) else brief.full_data
-        
-        # Ancien système pour rétrocompatibilité
-        score_result = calculate_cv_score(cv_data, job_desc)
-        visualize_scores(score_result)
-        report = generate_final_report(cv_text, cv_data, score_result, job_desc)
-        if "error" in report:
-            return jsonify(report), 500
-        
-        # Créer le candidat avec un système simplifié
-        candidate = Candidate(
-            name=file.filename.split('.')[0],
-            cv_analysis=json.dumps(cv_data),
-            
-            # Scores de base depuis score_result
-            skills_score=score_result.get('skills_score', 0),
-            experience_score=score_result.get('experience_score', 0),
-            education_score=score_result.get('education_score', 0),
-            culture_score=0.0,  # Sera calculé plus tard
-            interview_score=0.0,  # Sera calculé plus tard
-            final_predictive_score=0.0,  # Sera calculé APRÈS l'évaluation finale
-            
-            # Ancien système (rétrocompatibilité)
-            predictive_score=score_result.get('final_score', 0),
-            
-            # Métadonnées
-            status="CV analysé",
-            process_stage="cv_analysis",
-            brief_id=brief_id,
-            user_id=current_user_id,
-            
-            # Données détaillées
-            score_details=json.dumps(score_result),
-            recommendations=json.dumps(report.get('recommendations', [])),
-            risks=json.dumps(report.get('risks', []))
-        )
+        # Sauvegarder le fichier à son adresse de contenu (un même CV n'est stocké qu'une fois)
+        cv_hash, file_path, size, existed = store_upload(file.stream)
+        if existed:
+            logger.info(f"Upload CV - Fichier déjà connu ({cv_hash[:12]}), copie existante réutilisée")
+        
+        payload = {
+            "file_path": file_path,
+            "filename": file.filename,
+            "cv_hash": cv_hash,
+            "brief_id": brief_id,
+            "user_id": current_user_id,
+            "use_llm_cache": _use_llm_cache()
+        }
         
-        db.session.add(candidate)
-        db.session.commit()
+        # Mode flux (SSE) : le pipeline tourne sur la file, chaque étape terminée est relayée dès qu'elle est prête
+        if wants_event_stream():
+            job_id = job_queue.submit('cv_upload', payload, user_id=current_user_id)
+            logger.info(f"Upload CV - Travail {job_id} mis en file pour {file.filename} (flux)")
+            return job_event_response(job_id)
         
-        logger.info(f"🎯 Candidat créé - ID: {candidate.id}, Score final: {score_result.get('final_score', 0):.1f}%")
-        logger.info(f"   Skills: {score_result.get('skills_score', 0):.1f}% | Experience: {score_result.get('experience_score', 0):.1f}% | Education: {score_result.get('education_score', 0):.1f}%")
+        # Mode synchrone conservé pour les clients qui attendent le candidat directement
+        sync_param = request.args.get('sync')
+        if sync_param is None:
+            run_async = current_app.config.get('CV_UPLOAD_ASYNC', True)
+        else:
+            run_async = sync_param.lower() not in ('1', 'true', 'yes')
+
+        if run_async:
+            job_id = job_queue.submit('cv_upload', payload, user_id=current_user_id)
+            logger.info(f"Upload CV - Travail {job_id} mis en file pour {file.filename}")
+            return jsonify({
+                "message": "CV reçu, analyse en cours",
+                "job_id": job_id,
+                "status_url": f"/api/jobs/{job_id}",
+                "success": True
+            }), 202
         
-        logger.info(f"Candidat créé avec succès - ID: {candidate.id}, nom: {candidate.name}, brief_id: {candidate.brief_id}")
+        try:
+            candidate_response = process_cv_upload(payload)
+        except CvPipelineError as e:
+            return jsonify(e.payload), e.status_code
         
-        # Préparer la réponse avec la structure attendue par le frontend
-        candidate_response = {
-            "id": candidate.id,
-            "name": candidate.name,
-            "cv_analysis": cv_data,  # Déjà un dict, pas besoin de parser
-            "predictive_score": candidate.predictive_score,
-            "status": candidate.status,
-            "brief_id": candidate.brief_id,
-            "score_details": score_result,  # Déjà un dict, pas besoin de parser
-            "report_summary": report.get('summary', ''),
-            "recommendations": report.get('recommendations', []),
-            "risks": report.get('risks', [])
-        }
+        logger.info(f"Candidat créé avec succès - ID: {candidate_response['id']}, nom: {candidate_response['name']}, brief_id: {candidate_response['brief_id']}")
         
         response_data = {
             "message": "CV analysé avec succès",
@@ -510,12 +522,68 @@ def upload_cv():
         
         logger.info(f"Réponse d'upload envoyée: {json.dumps(candidate_response, indent=2)}")
         
-        return jsonify(response_data), 201
+        # CV déjà déposé sur ce brief : le candidat existant est renvoyé, rien n'est créé
+        return jsonify(response_data), 200 if candidate_response.get('duplicate') else 201
         
     except Exception as e:
         logger.error(f"Erreur lors de l'upload du CV: {str(e)}")
         return jsonify({"error": "Erreur lors de l'analyse du CV", "details": str(e)}), 500
 
+@bp.route('/api/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job_status(job_id):
+    """Suivi d'un traitement de fond (upload de CV asynchrone, etc.)"""
+    try:
+        current_user_id = get_jwt_identity()
+        job = job_queue.get_job(job_id)
+        if not job or job.get('user_id') != str(current_user_id):
+            return jsonify({"error": "Travail non trouvé"}), 404
+        
+        return jsonify({
+            "job_id": job['id'],
+            "name": job['name'],
+            "status": job['status'],
+            "stage": job.get('stage'),
+            "result": job.get('result'),
+            "error": job.get('error'),
+            "created_at": job['created_at'],
+            "updated_at": job['updated_at']
+        }), 200
+    except Exception as e:
+        logger.error(f"Erreur récupération travail {job_id}: {str(e)}")
+        return jsonify({"error": "Erreur serveur", "details": str(e)}), 500
+
+@bp.route('/api/jobs/<job_id>/events', methods=['GET'])
+@jwt_required()
+def get_job_events(job_id):
+    """
+    Événements publiés par un traitement de fond après ?after= (ou Last-Event-ID) :
+    flux SSE relayé jusqu'à la fin du travail (?stream=1), sinon liste JSON à interroger.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        job = job_queue.get_job(job_id)
+        if not job or job.get('user_id') != str(current_user_id):
+            return jsonify({"error": "Travail non trouvé"}), 404
+        
+        after = last_event_id()
+        if wants_event_stream():
+            return job_event_response(job_id, after)
+        
+        events = [{"id": seq, "event": event, "data": data} for seq, event, data in job_queue.get_events(job_id, after)]
+        return jsonify({
+            "job_id": job['id'],
+            "status": job['status'],
+            "stage": job.get('stage'),
+            "events": events,
+            "next_after": events[-1]["id"] if events else after,
+            "result": job.get('result'),
+            "error": job.get('error')
+        }), 200
+    except Exception as e:
+        logger.error(f"Erreur récupération des événements du travail {job_id}: {str(e)}")
+        return jsonify({"error": "Erreur serveur", "details": str(e)}), 500
+
 # Route OPTIONS explicite pour l'upload de CV
 @bp.route('/api/cv/upload', methods=['OPTIONS'])
 @cross_origin(
@@ -528,6 +596,113 @@ def upload_cv_options():
     logger.info("Requête OPTIONS reçue pour /api/cv/upload")
     return '', 200
 
+def _zip_pdf_members(archive):
+    """Membres PDF d'une archive (hors dossiers et fichiers cachés) : [(ZipInfo, nom)]"""
+    members = []
+    for info in archive.infolist():
+        name = os.path.basename(info.filename)
+        if not info.is_dir() and name.lower().endswith('.pdf') and not name.startswith('.'):
+            members.append((info, name))
+    return members
+
+@bp.route('/api/cv/bulk-upload', methods=['POST'])
+@cross_origin(
+    supports_credentials=True, 
+    origins=["http://localhost:8080", "https://technova-frontend.vercel.app"], 
+    allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin", "Cache-Control"],
+    methods=["POST", "OPTIONS"]
+)
+@jwt_required()
+def bulk_upload_cv():
+    """
+    Upload de plusieurs CV (archive zip ou liste multipart 'files') traité par la file d'attente.
+    Réponse 202 avec le travail à suivre, ou flux SSE de sa progression (?stream=1).
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        # Limite de taille propre à cette route (un lot dépasse vite MAX_CONTENT_LENGTH)
+        request.max_content_length = current_app.config.get('BULK_UPLOAD_MAX_CONTENT_LENGTH')
+        
+        brief_id = request.form.get('brief_id')
+        if not brief_id:
+            return jsonify({"error": "brief_id requis"}), 400
+        brief = JobBrief.query.filter_by(id=brief_id, user_id=current_user_id).first()
+        if not brief:
+            return jsonify({"error": "Brief non trouvé ou non autorisé"}), 404
+        
+        max_files = current_app.config.get('BULK_UPLOAD_MAX_FILES', 200)
+        max_file_size = current_app.config.get('BULK_UPLOAD_MAX_FILE_SIZE', 16 * 1024 * 1024)
+        max_total_size = current_app.config.get('BULK_UPLOAD_MAX_UNCOMPRESSED_SIZE', 500 * 1024 * 1024)
+        uploads = [upload for upload in request.files.getlist('files') + request.files.getlist('file') if upload.filename]
+        
+        # Lot vérifié avant toute écriture : nombre de fichiers, taille de chaque fichier
+        # (décompressée pour les membres d'archive) et taille totale ; un lot hors limites est refusé
+        batch = []  # (envoi, [(membre, nom)] pour une archive, None pour un PDF)
+        selected = 0
+        total_size = 0
+        for upload in uploads:
+            if upload.filename.lower().endswith('.zip'):
+                archive = zipfile.ZipFile(upload.stream)
+                members = _zip_pdf_members(archive)
+                batch.append((archive, members))
+                files = [(name, info.file_size) for info, name in members]
+            else:
+                upload.stream.seek(0, os.SEEK_END)
+                files = [(upload.filename, upload.stream.tell())]
+                upload.stream.seek(0)
+                batch.append((upload, None))
+            for name, size in files:
+                selected += 1
+                if selected > max_files:
+                    return jsonify({"error": f"Trop de fichiers dans le lot (maximum {max_files})"}), 413
+                if size > max_file_size:
+                    return jsonify({"error": f"Fichier {name} trop volumineux"}), 413
+                total_size += size
+                if total_size > max_total_size:
+                    return jsonify({"error": "Lot trop volumineux (taille décompressée des archives comprise)"}), 413
+        
+        entries = []
+        for source, members in batch:
+            if members is None:
+                cv_hash, file_path, _, _ = store_upload(source.stream)
+                entries.append({"file_path": file_path, "filename": source.filename, "cv_hash": cv_hash})
+                continue
+            with source:
+                for info, name in members:
+                    # La lecture d'un membre s'arrête à sa taille déclarée (contrôle CRC)
+                    with source.open(info) as src:
+                        cv_hash, file_path, _, _ = store_upload(src)
+                    entries.append({"file_path": file_path, "filename": name, "cv_hash": cv_hash})
+        
+        if not entries:
+            return jsonify({"error": "Aucun fichier PDF fourni"}), 400
+        
+        job_id = job_queue.submit('cv_bulk', {
+            "entries": entries,
+            "brief_id": brief.id,
+            "user_id": current_user_id,
+            "use_llm_cache": _use_llm_cache()
+        }, user_id=current_user_id)
+        logger.info(f"Upload en masse - {len(entries)} fichier(s) pour le brief {brief.id}, travail {job_id}")
+        
+        if wants_event_stream():
+            return job_event_response(job_id)
+        
+        return jsonify({
+            "message": f"{len(entries)} CV reçu(s), analyse en cours",
+            "job_id": job_id,
+            "total": len(entries),
+            "status_url": f"/api/jobs/{job_id}",
+            "events_url": f"/api/jobs/{job_id}/events",
+            "success": True
+        }), 202
+    
+    except zipfile.BadZipFile:
+        return jsonify({"error": "Archive zip invalide"}), 400
+    except Exception as e:
+        logger.error(f"Erreur lors de l'upload en masse: {str(e)}")
+        return jsonify({"error": "Erreur lors de l'upload en masse", "details": str(e)}), 500
+
 @bp.route('/api/cv/scores', methods=['GET'])
 def get_cv_scores():
     return send_file("cv_scores.png", mimetype='image/png')
@@ -554,12 +729,13 @@ def evaluate_candidate(candidate_id):
     candidate = Candidate.query.get(candidate_id)
     if not candidate:
         return jsonify({"error": "Candidat non trouvé"}), 404
-    cv_data = json.loads(candidate.cv_analysis)
+    cv_data = candidate.cv_analysis or {}
     brief = JobBrief.query.first()
     if not brief:
         return jsonify({"error": "Aucun brief trouvé"}), 404
     job_desc = json.loads(brief.full_data)
-    score_result = calculate_cv_score(cv_data, job_desc)
+    weights = profile_weights(brief_profile(brief.user_id, brief.id))
+    score_result = calculate_cv_score(cv_data, job_desc, job_embeddings=load_brief_embeddings(brief), weights=weights)
     questions = {"questions": [{"question": q.question, "category": q.category, "purpose": q.purpose} for q in InterviewQuestion.query.all()]}
     
     # Préparer les appréciations pour l'analyse prédictive
@@ -572,13 +748,13 @@ def evaluate_candidate(candidate_id):
             "score": app['score']
         })
     
-    analysis = generate_predictive_analysis(job_desc, cv_data, score_result, questions, appreciations_for_analysis)
+    analysis = generate_predictive_analysis(job_desc, cv_data, score_result, questions, appreciations_for_analysis, weights=weights)
     if "error" in analysis:
         return jsonify(analysis), 500
     
     # Sauvegarder les risques et recommandations générées
-    candidate.risks = json.dumps(analysis.get('risks', []))
-    candidate.recommendations = json.dumps(analysis.get('recommendations', []))
+    candidate.risks = analysis.get('risks', [])
+    candidate.recommendations = analysis.get('recommendations', [])
     candidate.predictive_score = analysis['predictive_score']
     candidate.status = "Évalué"
     db.session.commit()
@@ -588,97 +764,93 @@ def evaluate_candidate(candidate_id):
 def get_radar():
     return send_file("predictive_radar.png", mimetype='image/png')
 
+def _api_score_details(c):
+    # Copie : les scores des colonnes ne doivent pas modifier la valeur chargée par l'ORM
+    score_details = dict(c.score_details or {})
+    
+    # Construire les score_details à partir des colonnes individuelles de la base
+    # Ceci remplace les valeurs obsolètes stockées en JSON par les vraies valeurs
+    for column in ('skills_score', 'experience_score', 'education_score', 'culture_score', 'interview_score'):
+        if getattr(c, column) is not None:
+            score_details[column] = getattr(c, column)
+    return score_details
+
+# Champs de /api/candidates : nom -> (colonnes à charger, lecture)
+API_CANDIDATE_FIELDS = {
+    'id': column_field('id'),
+    'name': column_field('name'),
+    'cv_analysis': column_field('cv_analysis'),
+    'predictive_score': column_field('predictive_score'),
+    'status': column_field('status'),
+    'brief_id': column_field('brief_id'),
+    'user_id': column_field('user_id'),
+    'culture_score': column_field('culture_score'),
+    'interview_score': column_field('interview_score'),
+    'score_details': (
+        ('score_details', 'skills_score', 'experience_score', 'education_score', 'culture_score', 'interview_score'),
+        _api_score_details
+    ),
+    'risks': column_field('risks', []),
+    'recommendations': column_field('recommendations', []),
+    'appreciations': (('appreciations',), lambda c: [
+        {"question": a.question, "category": a.category, "appreciation": a.appreciation, "score": a.score}
+        for a in c.appreciations
+    ]),
+}
+
 @bp.route('/api/candidates', methods=['GET'])
 @jwt_required()
 def get_candidates_api():
+    """Mêmes paramètres que /candidates (sort, cursor, limit, fields)"""
     try:
         current_user_id = get_jwt_identity()
         logger.info(f"API - Récupération des candidats pour l'utilisateur {current_user_id}")
-        candidates = Candidate.query.filter_by(user_id=current_user_id).all()
-        logger.info(f"API - Nombre de candidats trouvés: {len(candidates)}")
-        
-        candidates_data = []
-        for c in candidates:
-            # Parsing score_details
-            score_details = c.score_details
-            if isinstance(score_details, str):
-                try:
-                    score_details = json.loads(score_details)
-                except Exception:
-                    score_details = {}
-            elif score_details is None:
-                score_details = {}
-            
-            # S'assurer que les scores directs sont inclus dans score_details
-            if not score_details:
-                score_details = {}
-            
-            # Construire les score_details à partir des colonnes individuelles de la base
-            # Ceci remplace les valeurs obsolètes stockées en JSON par les vraies valeurs
-            if hasattr(c, 'skills_score') and c.skills_score is not None:
-                score_details['skills_score'] = c.skills_score
-            if hasattr(c, 'experience_score') and c.experience_score is not None:
-                score_details['experience_score'] = c.experience_score
-            if hasattr(c, 'education_score') and c.education_score is not None:
-                score_details['education_score'] = c.education_score
-            if c.culture_score is not None:
-                score_details['culture_score'] = c.culture_score
-            if c.interview_score is not None:
-                score_details['interview_score'] = c.interview_score
-            
-            # Parsing risks
-            risks = c.risks
-            if isinstance(risks, str):
-                try:
-                    risks = json.loads(risks)
-                except Exception:
-                    risks = []
-            elif risks is None:
-                risks = []
-                
-            # Parsing recommendations
-            recommendations = c.recommendations
-            if isinstance(recommendations, str):
-                try:
-                    recommendations = json.loads(recommendations)
-                except Exception:
-                    recommendations = []
-            elif recommendations is None:
-                recommendations = []
-            
-            candidates_data.append({
-                "id": c.id,
-                "name": c.name,
-                "cv_analysis": json.loads(c.cv_analysis) if c.cv_analysis else None,
-                "predictive_score": c.predictive_score,
-                "status": c.status,
-                "brief_id": c.brief_id,
-                "user_id": c.user_id,
-                "culture_score": c.culture_score,
-                "interview_score": c.interview_score,
-                "score_details": score_details,
-                "risks": risks,
-                "recommendations": recommendations,
-                "appreciations": [{"question": a.question, "category": a.category, "appreciation": a.appreciation, "score": a.score} for a in c.appreciations]
-            })
+        page, names = _candidate_page(
+            Candidate.query.filter_by(user_id=current_user_id), API_CANDIDATE_FIELDS, 'created_at'
+        )
+        logger.info(f"API - Nombre de candidats trouvés: {page.total}")
+        
+        candidates_data = [serialize(c, API_CANDIDATE_FIELDS, names) for c in page.items]
         
         logger.info(f"API - Candidats retournés: {len(candidates_data)}")
         
         # Log détaillé des scores pour debug
         for candidate_data in candidates_data:
-            logger.info(f"API - Candidat {candidate_data['name']} - Culture: {candidate_data.get('culture_score')}, Interview: {candidate_data.get('interview_score')}, Score details: {candidate_data.get('score_details')}")
+            logger.debug(f"API - Candidat {candidate_data.get('name')} - Culture: {candidate_data.get('culture_score')}, Interview: {candidate_data.get('interview_score')}, Score details: {candidate_data.get('score_details')}")
         
-        return jsonify(candidates_data), 200
+        return jsonify(candidates_data), 200, page.headers()
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"API - Erreur lors de la récupération des candidats: {str(e)}")
         return jsonify({"error": "Erreur serveur", "details": str(e)}), 500
 
 # NOUVELLE API: Candidats avec système de scoring avancé
+def _recommendation_label(c):
+    if c.final_predictive_score >= 80:
+        return "Excellent candidat"
+    elif c.final_predictive_score >= 60:
+        return "Bon candidat"
+    return "À revoir"
+
+# Champs de /api/v2/candidates : nom -> (colonnes à charger, lecture)
+V2_CANDIDATE_FIELDS = {
+    name: column_field(name) for name in (
+        'id', 'name', 'status', 'process_stage', 'brief_id', 'user_id',
+        'skills_score', 'experience_score', 'education_score', 'culture_score', 'interview_score',
+        'final_predictive_score', 'predictive_score'
+    )
+}
+V2_CANDIDATE_FIELDS['recommendation'] = (('final_predictive_score',), _recommendation_label)
+V2_CANDIDATE_FIELDS['process_stage_label'] = (('process_stage',), lambda c: c.process_stage.replace('_', ' ').title())
+
 @bp.route('/api/v2/candidates', methods=['GET'])
 @jwt_required()
 def get_candidates_v2():
     """
     API v2 pour récupérer les candidats avec le système de scoring à 5 dimensions
+    Paramètres : brief_id, process_stage, sort (score par défaut, ou created_at),
+    limit (CANDIDATES_PAGE_SIZE par défaut), cursor (next_cursor de la page précédente), fields
     """
     try:
         current_user_id = get_jwt_identity()
@@ -694,51 +866,90 @@ def get_candidates_v2():
         if process_stage:
             query = query.filter_by(process_stage=process_stage)
         
-        candidates = query.order_by(Candidate.final_predictive_score.desc()).all()
+        page, names = _candidate_page(
+            query, V2_CANDIDATE_FIELDS, 'score', default_limit=current_app.config.get('CANDIDATES_PAGE_SIZE', 50)
+        )
+        candidates_data = [serialize(c, V2_CANDIDATE_FIELDS, names) for c in page.items]
+        
+        return jsonify({
+            'candidates': candidates_data,
+            'total': page.total,
+            'next_cursor': page.next_cursor,
+            'brief_id': brief_id,
+            'filters': {
+                'process_stage': process_stage
+            }
+        }), 200, page.headers()
         
-        # Enrichir les données candidat
-        candidates_data = []
-        for candidate in candidates:
-            # Utiliser une méthode simple pour convertir en dict
-            candidate_dict = {
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Erreur API v2 candidats: {str(e)}")
+        return jsonify({"error": "Erreur serveur", "details": str(e)}), 500
+
+@bp.route('/api/v2/candidates/search', methods=['GET'])
+@jwt_required()
+def search_candidates_v2():
+    """
+    Recherche sémantique dans tous les CV de l'utilisateur (compétences, expériences, formations)
+    Paramètres : q (requête), k (nombre de résultats, 10 par défaut), brief_id (optionnel)
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        query_text = request.args.get('q', '').strip()
+        if not query_text:
+            return jsonify({"error": "Paramètre q requis"}), 400
+        k = max(1, min(request.args.get('k', 10, type=int), 100))
+        brief_id = request.args.get('brief_id', type=int)
+        
+        search_index = get_candidate_search_index()
+        if not search_index.exists(current_user_id):
+            # Index encore absent : construit par la file d'attente, la recherche est à relancer
+            job_id = submit_index_build(current_user_id)
+            return jsonify({
+                "message": "Index sémantique en cours de construction, relancer la recherche une fois le travail terminé",
+                "job_id": job_id,
+                "status_url": f"/api/jobs/{job_id}"
+            }), 202
+        
+        allowed_ids = None
+        if brief_id:
+            allowed_ids = [row.id for row in Candidate.query.with_entities(Candidate.id).filter_by(user_id=current_user_id, brief_id=brief_id)]
+        
+        started = time.perf_counter()
+        hits = search_index.search(current_user_id, query_text, k=k, allowed_ids=allowed_ids)
+        took_ms = (time.perf_counter() - started) * 1000
+        
+        candidates = {c.id: c for c in Candidate.query.filter(
+            Candidate.user_id == current_user_id,
+            Candidate.id.in_([candidate_id for candidate_id, _, _ in hits])
+        ).all()} if hits else {}
+        
+        results = []
+        for candidate_id, score, section in hits:
+            candidate = candidates.get(candidate_id)
+            if not candidate:
+                continue
+            results.append({
                 'id': candidate.id,
                 'name': candidate.name,
+                'brief_id': candidate.brief_id,
                 'status': candidate.status,
                 'process_stage': candidate.process_stage,
-                'brief_id': candidate.brief_id,
-                'user_id': candidate.user_id,
-                'skills_score': candidate.skills_score,
-                'experience_score': candidate.experience_score,
-                'education_score': candidate.education_score,
-                'culture_score': candidate.culture_score,
-                'interview_score': candidate.interview_score,
                 'final_predictive_score': candidate.final_predictive_score,
-                'predictive_score': candidate.predictive_score
-            }
-            
-            # Ajouter des métadonnées simples
-            if candidate.final_predictive_score >= 80:
-                candidate_dict['recommendation'] = "Excellent candidat"
-            elif candidate.final_predictive_score >= 60:
-                candidate_dict['recommendation'] = "Bon candidat"
-            else:
-                candidate_dict['recommendation'] = "À revoir"
-            
-            candidate_dict['process_stage_label'] = candidate.process_stage.replace('_', ' ').title()
-            
-            candidates_data.append(candidate_dict)
+                'similarity': score,
+                'matched_section': section
+            })
         
         return jsonify({
-            'candidates': candidates_data,
-            'total': len(candidates_data),
-            'brief_id': brief_id,
-            'filters': {
-                'process_stage': process_stage
-            }
+            'query': query_text,
+            'results': results,
+            'total': len(results),
+            'took_ms': round(took_ms, 2)
         }), 200
         
     except Exception as e:
-        logger.error(f"Erreur API v2 candidats: {str(e)}")
+        logger.error(f"Erreur recherche sémantique: {str(e)}")
         return jsonify({"error": "Erreur serveur", "details": str(e)}), 500
 
 @bp.route('/api/v2/candidates/<int:candidate_id>/advance-stage', methods=['POST'])
@@ -787,6 +998,47 @@ def advance_candidate_stage(candidate_id):
 
 # Routes pour les questions d'entretien et l'évaluation finale
 
+def _save_interview_questions(candidate_id, questions):
+    """Enregistre les questions générées sur le candidat ; retourne (réponse, code HTTP)"""
+    if "error" in questions:
+        return questions, 500
+    
+    candidate = Candidate.query.get(candidate_id)
+    candidate.interview_questions = questions
+        
+    candidate.process_stage = PROCESS_STAGES['INTERVIEW_QUESTIONS']
+    candidate.status = CANDIDATE_STATUS['INTERVIEW_QUESTIONS_GENERATED']
+    
+    db.session.commit()
+    
+    logger.info(f"Questions d'entretien générées pour candidat {candidate_id}")
+    
+    return {
+        "success": True,
+        "questions": questions,
+        "candidate_id": candidate_id,
+        "status": candidate.status
+    }, 201
+
+@job_queue.task('interview_questions')
+def interview_questions_task(payload, progress):
+    """Génération des questions d'entretien sur un worker de la file (mode flux)"""
+    progress('generating')
+    try:
+        questions = generate_interview_questions(
+            payload['job_data'], payload['cv_data'], payload['score_result'],
+            on_category=lambda category, items, source: progress.emit(
+                'questions', {"category": category, "source": source, "questions": items}
+            )
+        )
+        data, status_code = _save_interview_questions(payload['candidate_id'], questions)
+    except Exception:
+        db.session.rollback()
+        raise
+    if status_code >= 400:
+        raise JobFailed(data, status_code)
+    return data
+
 @bp.route('/api/candidates/<int:candidate_id>/generate-interview-questions', methods=['POST', 'OPTIONS'])
 @cross_origin(
     supports_credentials=True, 
@@ -820,7 +1072,7 @@ def generate_candidate_interview_questions(candidate_id):
         }
         
         # Préparer les données pour la génération
-        cv_data = json.loads(candidate.cv_analysis) if candidate.cv_analysis else {}
+        cv_data = candidate.cv_analysis or {}
         job_data = json.loads(brief.full_data) if brief.full_data else {}
         
         # Calculer ou récupérer les scores
@@ -828,13 +1080,13 @@ def generate_candidate_interview_questions(candidate_id):
         if candidate.final_predictive_score:
             calculated_final_score = candidate.final_predictive_score
         else:
-            calculated_final_score = (
-                (candidate.skills_score or 0) * 0.25 +
-                (candidate.experience_score or 0) * 0.20 +
-                (candidate.education_score or 0) * 0.15 +
-                (candidate.culture_score or 0) * 0.20 +
-                (candidate.interview_score or 0) * 0.20
-            )
+            calculated_final_score = ScoringService.weighted_score({
+                "skills": candidate.skills_score,
+                "experience": candidate.experience_score,
+                "education": candidate.education_score,
+                "culture": candidate.culture_score,
+                "interview": candidate.interview_score
+            }, profile_weights(brief_profile(current_user_id, brief.id)))
         
         score_result = {
             "skills_score": candidate.skills_score if candidate.skills_score else 0,
@@ -845,32 +1097,20 @@ def generate_candidate_interview_questions(candidate_id):
             "final_score": calculated_final_score
         }
         
+        # Mode flux (SSE) : génération sur la file, chaque catégorie de questions est relayée dès qu'elle est prête
+        if wants_event_stream():
+            job_id = job_queue.submit('interview_questions', {
+                "candidate_id": candidate_id,
+                "job_data": job_data,
+                "cv_data": cv_data,
+                "score_result": score_result
+            }, user_id=current_user_id)
+            return job_event_response(job_id)
+        
         # Générer les questions avec les bons paramètres
         questions = generate_interview_questions(job_data, cv_data, score_result)
-        
-        if "error" in questions:
-            return jsonify(questions), 500
-        
-        # Sauvegarder les questions - s'assurer que c'est bien en JSON string
-        if isinstance(questions, dict):
-            candidate.interview_questions = json.dumps(questions)
-        else:
-            # Si c'est déjà une string JSON, l'utiliser directement
-            candidate.interview_questions = questions
-            
-        candidate.process_stage = PROCESS_STAGES['INTERVIEW_QUESTIONS']
-        candidate.status = CANDIDATE_STATUS['INTERVIEW_QUESTIONS_GENERATED']
-        
-        db.session.commit()
-        
-        logger.info(f"Questions d'entretien générées pour candidat {candidate_id}")
-        
-        return jsonify({
-            "success": True,
-            "questions": questions,
-            "candidate_id": candidate_id,
-            "status": candidate.status
-        }), 201
+        response_data, status_code = _save_interview_questions(candidate_id, questions)
+        return jsonify(response_data), status_code
         
     except Exception as e:
         logger.error(f"Erreur génération questions candidat {candidate_id}: {str(e)}")
@@ -901,57 +1141,15 @@ def evaluate_candidate_interview(candidate_id):
         if not evaluations:
             return jsonify({"error": "Aucune évaluation fournie"}), 400
         
-        # Calculer les scores culture et entretien
-        culture_scores = []
-        interview_scores = []
-        
         logger.info(f"Début calcul scores pour candidat {candidate_id}")
         
-        for evaluation in evaluations:
-            category = evaluation.get('category', '').lower()
-            score = float(evaluation.get('score', 0))
-            
-            logger.info(f"Évaluation: catégorie='{category}', score={score}")
-            
-            if 'culture' in category or 'company' in category:
-                culture_scores.append(score)
-                logger.info(f"-> Ajouté à culture_scores: {score}")
-            else:
-                interview_scores.append(score)
-                logger.info(f"-> Ajouté à interview_scores: {score}")
-        
-        logger.info(f"Culture scores: {culture_scores}")
-        logger.info(f"Interview scores: {interview_scores}")
-        
-        # Calculer les moyennes
-        culture_score = sum(culture_scores) / len(culture_scores) if culture_scores else 0
-        interview_score = sum(interview_scores) / len(interview_scores) if interview_scores else 0
-        
-        logger.info(f"Moyennes calculées - Culture: {culture_score}, Interview: {interview_score}")
-        
-        # Convertir en pourcentage (les scores frontend sont sur une échelle de 1-4)
-        # 1 = Très insatisfait, 2 = Insatisfait, 3 = Satisfait, 4 = Très satisfait
-        culture_score_pct = ((culture_score - 1) / 3.0) * 100  # Normaliser de 1-4 vers 0-100
-        interview_score_pct = ((interview_score - 1) / 3.0) * 100  # Normaliser de 1-4 vers 0-100
-        
-        logger.info(f"Pourcentages - Culture: {culture_score_pct}%, Interview: {interview_score_pct}%")
-        
-        # Mettre à jour le candidat
-        candidate.culture_score = culture_score_pct
-        candidate.interview_score = interview_score_pct
-        candidate.process_stage = PROCESS_STAGES['INTERVIEW_EVALUATION']
-        candidate.status = CANDIDATE_STATUS['INTERVIEW_EVALUATED']
-        
-        # Sauvegarder les évaluations détaillées
-        for evaluation in evaluations:
-            appreciation = Appreciation(
-                candidate_id=candidate_id,
-                question=evaluation.get('question', ''),
-                category=evaluation.get('category', ''),
-                appreciation=evaluation.get('appreciation', ''),
-                score=float(evaluation.get('score', 0))
-            )
-            db.session.add(appreciation)
+        # Scores culture et entretien (échelle 1-4 ramenée à 0-100), appréciations
+        # écrites en un seul INSERT groupé
+        try:
+            culture_score_pct, interview_score_pct = save_interview_evaluations({candidate_id: evaluations})[candidate_id]
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 400
         
         db.session.commit()
         
@@ -962,7 +1160,7 @@ def evaluate_candidate_interview(candidate_id):
             "candidate_id": candidate_id,
             "culture_score": culture_score_pct,
             "interview_score": interview_score_pct,
-            "status": candidate.status,
+            "status": CANDIDATE_STATUS['INTERVIEW_EVALUATED'],
             "next_action": "Calcul du score prédictif final disponible"
         }), 200
         
@@ -971,6 +1169,73 @@ def evaluate_candidate_interview(candidate_id):
         db.session.rollback()
         return jsonify({"error": "Erreur lors de l'évaluation", "details": str(e)}), 500
 
+@bp.route('/api/candidates/evaluate-interviews', methods=['POST', 'OPTIONS'])
+@cross_origin(
+    supports_credentials=True, 
+    origins=["http://localhost:8080", "https://technova-frontend.vercel.app"], 
+    allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin", "Cache-Control"],
+    methods=["POST", "OPTIONS"]
+)
+@jwt_required()
+def evaluate_candidate_interviews():
+    """
+    Évalue les entretiens de plusieurs candidats en un appel (journée d'entretiens d'un jury)
+    Corps : {"candidates": [{"candidate_id": 1, "evaluations": [...]}, ...]}
+    Tout ou rien : un candidat inconnu ou une évaluation invalide rejette l'envoi complet.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        entries = data.get('candidates', [])
+        if not entries:
+            return jsonify({"error": "Aucun candidat fourni"}), 400
+        max_candidates = current_app.config.get('EVALUATION_BATCH_MAX_CANDIDATES', 200)
+        if len(entries) > max_candidates:
+            return jsonify({"error": f"Trop de candidats dans un envoi (maximum {max_candidates})"}), 400
+        
+        evaluations_by_candidate = {}
+        for entry in entries:
+            candidate_id = entry.get('candidate_id')
+            if not isinstance(candidate_id, int) or not entry.get('evaluations'):
+                return jsonify({"error": "Chaque entrée doit avoir un candidate_id entier et des évaluations", "entry": entry}), 400
+            if candidate_id in evaluations_by_candidate:
+                return jsonify({"error": f"Candidat {candidate_id} présent plusieurs fois"}), 400
+            evaluations_by_candidate[candidate_id] = entry['evaluations']
+        
+        # Vérification de propriété en une requête
+        owned = {row.id for row in Candidate.query.with_entities(Candidate.id).filter(
+            Candidate.user_id == current_user_id, Candidate.id.in_(evaluations_by_candidate)
+        )}
+        missing = [candidate_id for candidate_id in evaluations_by_candidate if candidate_id not in owned]
+        if missing:
+            return jsonify({"error": "Candidats non trouvés", "candidate_ids": missing}), 404
+        
+        try:
+            scores = save_interview_evaluations(evaluations_by_candidate)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 400
+        db.session.commit()
+        
+        return jsonify({
+            "success": True,
+            "count": len(scores),
+            "results": [
+                {
+                    "candidate_id": candidate_id,
+                    "culture_score": culture_score,
+                    "interview_score": interview_score,
+                    "status": CANDIDATE_STATUS['INTERVIEW_EVALUATED']
+                }
+                for candidate_id, (culture_score, interview_score) in scores.items()
+            ]
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Erreur évaluation groupée des entretiens: {str(e)}")
+        db.session.rollback()
+        return jsonify({"error": "Erreur lors de l'évaluation", "details": str(e)}), 500
+
 @bp.route('/api/candidates/<int:candidate_id>/finalize-evaluation', methods=['POST', 'OPTIONS'])
 @cross_origin(
     supports_credentials=True, 
@@ -989,57 +1254,26 @@ def finalize_candidate_evaluation(candidate_id):
         if not candidate:
             return jsonify({"error": "Candidat non trouvé"}), 404
         
-        # Vérifier que l'entretien a été évalué
-        if candidate.culture_score == 0 or candidate.interview_score == 0:
+        # Score prédictif final, risques, recommandation et statut : même calcul que la finalisation groupée.
+        # Un candidat sans appréciation culture ou entretien enregistrée n'est pas finalisé.
+        result = ProcessManager.finalize_candidates(current_user_id, candidate_ids=[candidate_id]).get(candidate_id)
+        if result is None:
             return jsonify({"error": "L'entretien doit être évalué avant de finaliser"}), 400
+        db.session.commit()
         
-        # Calculer le score prédictif final
-        result = ProcessManager.calculate_final_predictive_score(candidate_id)
-        
-        if "error" in result:
-            return jsonify(result), 500
-        
-        # Générer les recommandations et risques finaux
         final_score = result['final_score']
-        recommendation_data = ProcessManager.get_recommendation_from_score(final_score)
+        recommendation_data = result['recommendation']
+        scores = result['scores']
         
-        # Créer les données radar pour les 5 dimensions
+        # Données radar des 5 dimensions
         radar_data = {
-            "Compétences": candidate.skills_score,
-            "Expérience": candidate.experience_score,
-            "Formation": candidate.education_score,
-            "Culture": candidate.culture_score,
-            "Entretien": candidate.interview_score
+            "Compétences": scores['skills'],
+            "Expérience": scores['experience'],
+            "Formation": scores['education'],
+            "Culture": scores['culture'],
+            "Entretien": scores['interview']
         }
         
-        # Générer des risques basés sur les scores faibles
-        risks = []
-        if candidate.skills_score < 60:
-            risks.append("Compétences techniques insuffisantes")
-        if candidate.experience_score < 60:
-            risks.append("Expérience professionnelle limitée")
-        if candidate.education_score < 60:
-            risks.append("Formation académique inadéquate")
-        if candidate.culture_score < 60:
-            risks.append("Inadéquation culturelle avec l'entreprise")
-        if candidate.interview_score < 60:
-            risks.append("Performance d'entretien décevante")
-        
-        # Mettre à jour avec les données finales
-        candidate.recommendations = json.dumps(recommendation_data)
-        candidate.risks = json.dumps(risks)
-        candidate.radar_data = json.dumps(radar_data)
-        
-        # Déterminer le statut final basé sur le score prédictif
-        if final_score >= SCORING_THRESHOLDS['EXCELLENT']:  # >= 80
-            candidate.status = "Recommandé"
-        elif final_score >= SCORING_THRESHOLDS['GOOD']:      # >= 60
-            candidate.status = "En évaluation"
-        else:  # < 60
-            candidate.status = "À revoir"
-        
-        db.session.commit()
-        
         logger.info(f"Évaluation finalisée pour candidat {candidate_id} - Score final: {final_score:.2f}%")
         
         return jsonify({
@@ -1049,16 +1283,10 @@ def finalize_candidate_evaluation(candidate_id):
             "predictive_score": final_score,  # Rétrocompatibilité
             "recommendation": recommendation_data,
             "recommendations": [recommendation_data],  # Format tableau pour le frontend
-            "risks": risks,
+            "risks": result['risks'],
             "radar_data": radar_data,
-            "status": candidate.status,
-            "all_scores": {
-                "skills": candidate.skills_score,
-                "experience": candidate.experience_score,
-                "education": candidate.education_score,
-                "culture": candidate.culture_score,
-                "interview": candidate.interview_score
-            }
+            "status": result['status'],
+            "all_scores": scores
         }), 200
         
     except Exception as e:
@@ -1066,6 +1294,160 @@ def finalize_candidate_evaluation(candidate_id):
         db.session.rollback()
         return jsonify({"error": "Erreur lors de la finalisation", "details": str(e)}), 500
 
+@bp.route('/api/job-briefs/<int:brief_id>/finalize-evaluations', methods=['POST', 'OPTIONS'])
+@cross_origin(
+    supports_credentials=True, 
+    origins=["http://localhost:8080", "https://technova-frontend.vercel.app"], 
+    allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin", "Cache-Control"],
+    methods=["POST", "OPTIONS"]
+)
+@jwt_required()
+def finalize_brief_evaluations(brief_id):
+    """
+    Finalise en une transaction tous les candidats du brief dont l'entretien est évalué
+    Corps (optionnel) : {"candidate_ids": [...]} pour limiter la finalisation à certains candidats
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        brief = JobBrief.query.filter_by(id=brief_id, user_id=current_user_id).first()
+        if not brief:
+            return jsonify({"error": "Fiche de poste non trouvée", "brief_id": brief_id}), 404
+        
+        data = request.get_json(silent=True) or {}
+        candidate_ids = data.get('candidate_ids')
+        if candidate_ids is not None and not (
+            isinstance(candidate_ids, list) and all(isinstance(i, int) for i in candidate_ids)
+        ):
+            return jsonify({"error": "candidate_ids doit être une liste d'entiers"}), 400
+        
+        results = ProcessManager.finalize_candidates(current_user_id, brief_id=brief.id, candidate_ids=candidate_ids)
+        db.session.commit()
+        
+        return jsonify({
+            "success": True,
+            "brief_id": brief_id,
+            "count": len(results),
+            "results": [
+                {
+                    "candidate_id": candidate_id,
+                    "final_predictive_score": result['final_score'],
+                    "status": result['status'],
+                    "recommendation": result['recommendation'],
+                    "risks": result['risks']
+                }
+                for candidate_id, result in sorted(results.items(), key=lambda item: -item[1]['final_score'])
+            ]
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Erreur finalisation groupée du brief {brief_id}: {str(e)}")
+        db.session.rollback()
+        return jsonify({"error": "Erreur lors de la finalisation", "details": str(e)}), 500
+
+def _owned_brief_id(data, current_user_id):
+    """brief_id optionnel du corps : None, ou identifiant d'un brief de l'utilisateur (LookupError sinon)"""
+    brief_id = data.get('brief_id')
+    if brief_id is None:
+        return None
+    if not isinstance(brief_id, int) or isinstance(brief_id, bool):
+        raise ValueError("brief_id doit être un entier")
+    if not JobBrief.query.filter_by(id=brief_id, user_id=current_user_id).first():
+        raise LookupError(brief_id)
+    return brief_id
+
+def _submit_rescore(current_user_id, brief_id):
+    job_id = job_queue.submit('rescore', {"user_id": current_user_id, "brief_id": brief_id}, user_id=current_user_id)
+    return {"job_id": job_id, "status_url": f"/api/jobs/{job_id}"}
+
+@bp.route('/api/scoring-profiles', methods=['GET'])
+@jwt_required()
+def list_scoring_profiles():
+    """
+    Pondérations de l'utilisateur : versions (plus récentes d'abord) et pondération active
+    ?brief_id=N : profils du brief ; sans paramètre : profils par défaut de l'utilisateur
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        brief_id = request.args.get('brief_id', type=int)
+        profiles = ScoringProfile.query.filter(
+            ScoringProfile.user_id == current_user_id,
+            ScoringProfile.brief_id.is_(None) if brief_id is None else ScoringProfile.brief_id == brief_id
+        ).order_by(ScoringProfile.version.desc()).all()
+        active = brief_profile(current_user_id, brief_id)
+        return jsonify({
+            "brief_id": brief_id,
+            "active": active.to_dict() if active else None,
+            "weights": profile_weights(active),
+            "default_weights": DEFAULT_WEIGHTS,
+            "versions": [profile.to_dict() for profile in profiles]
+        }), 200
+    except Exception as e:
+        logger.error(f"Erreur récupération des profils de pondération: {str(e)}")
+        return jsonify({"error": "Erreur serveur", "details": str(e)}), 500
+
+@bp.route('/api/scoring-profiles', methods=['POST', 'OPTIONS'])
+@cross_origin(
+    supports_credentials=True, 
+    origins=["http://localhost:8080", "https://technova-frontend.vercel.app"], 
+    allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin", "Cache-Control"],
+    methods=["POST", "OPTIONS"]
+)
+@jwt_required()
+def create_scoring_profile():
+    """
+    Nouvelle version de pondération, puis recalcul des scores stockés en tâche de fond
+    Corps : {"brief_id": N (optionnel, défaut de l'utilisateur sinon), "weights": {"cv": {...}, "final": {...}}}
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        try:
+            brief_id = _owned_brief_id(data, current_user_id)
+            profile = create_profile(current_user_id, brief_id, data.get('weights'))
+        except LookupError:
+            return jsonify({"error": "Fiche de poste non trouvée", "brief_id": data.get('brief_id')}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"error": "Une autre version de ce profil vient d'être créée, réessayer"}), 409
+        
+        return jsonify({"success": True, "profile": profile.to_dict(), **_submit_rescore(current_user_id, brief_id)}), 201
+    except Exception as e:
+        logger.error(f"Erreur création du profil de pondération: {str(e)}")
+        db.session.rollback()
+        return jsonify({"error": "Erreur serveur", "details": str(e)}), 500
+
+@bp.route('/api/candidates/rescore', methods=['POST', 'OPTIONS'])
+@cross_origin(
+    supports_credentials=True, 
+    origins=["http://localhost:8080", "https://technova-frontend.vercel.app"], 
+    allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin", "Cache-Control"],
+    methods=["POST", "OPTIONS"]
+)
+@jwt_required()
+def rescore_candidates_api():
+    """
+    Recalcule en tâche de fond les scores stockés selon les pondérations actives
+    Corps (optionnel) : {"brief_id": N} pour limiter le recalcul à un brief
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        try:
+            brief_id = _owned_brief_id(data, current_user_id)
+        except LookupError:
+            return jsonify({"error": "Fiche de poste non trouvée", "brief_id": data.get('brief_id')}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        return jsonify({"success": True, **_submit_rescore(current_user_id, brief_id)}), 202
+    except Exception as e:
+        logger.error(f"Erreur lancement du re-scoring: {str(e)}")
+        return jsonify({"error": "Erreur serveur", "details": str(e)}), 500
+
 # Routes OPTIONS pour CORS
 @bp.route('/api/candidates/<int:candidate_id>/generate-interview-questions', methods=['OPTIONS'])
 @cross_origin(
@@ -1132,6 +1514,7 @@ def delete_candidate_api(candidate_id):
         # Supprimer le candidat
         db.session.delete(candidate)
         db.session.commit()
+        unindex_candidates(current_user_id, [candidate_id])
         
         logger.info(f"Candidat {candidate_id} supprimé avec succès")
         
@@ -1164,17 +1547,10 @@ def get_candidate_by_id_api(candidate_id):
         if not candidate:
             return jsonify({"error": "Candidat non trouvé"}), 404
         
-        # Parsing des données JSON
-        cv_analysis = json.loads(candidate.cv_analysis) if candidate.cv_analysis else None
-        score_details = json.loads(candidate.score_details) if candidate.score_details else {}
-        interview_questions = json.loads(candidate.interview_questions) if candidate.interview_questions else []
-        recommendations = json.loads(candidate.recommendations) if candidate.recommendations else []
-        risks = json.loads(candidate.risks) if candidate.risks else []
-        
         candidate_data = {
             "id": candidate.id,
             "name": candidate.name,
-            "cv_analysis": cv_analysis,
+            "cv_analysis": candidate.cv_analysis,
             "predictive_score": candidate.predictive_score,
             "status": candidate.status,
             "process_stage": candidate.process_stage,
@@ -1190,10 +1566,10 @@ def get_candidate_by_id_api(candidate_id):
             "final_predictive_score": candidate.final_predictive_score,
             
             # Données détaillées
-            "score_details": score_details,
-            "interview_questions": interview_questions,
-            "recommendations": recommendations,
-            "risks": risks,
+            "score_details": candidate.score_details or {},
+            "interview_questions": candidate.interview_questions or [],
+            "recommendations": candidate.recommendations or [],
+            "risks": candidate.risks or [],
             
             # Appréciations
             "appreciations": [
@@ -1237,16 +1613,7 @@ def get_candidate_interview_questions(candidate_id):
         if not candidate.interview_questions:
             return jsonify({"error": "Aucune question d'entretien trouvée pour ce candidat"}), 404
         
-        # Récupérer les questions - gérer le cas où c'est déjà un dict ou une string JSON
-        try:
-            if isinstance(candidate.interview_questions, str):
-                questions = json.loads(candidate.interview_questions)
-            else:
-                # Si c'est déjà un dict (cas d'erreur de sauvegarde précédente)
-                questions = candidate.interview_questions
-        except json.JSONDecodeError as e:
-            logger.error(f"Erreur parsing JSON questions candidat {candidate_id}: {str(e)}")
-            return jsonify({"error": "Erreur de format des questions stockées"}), 500
+        questions = candidate.interview_questions
         
         logger.info(f"Questions d'entretien récupérées pour candidat {candidate_id}")
         
@@ -1261,6 +1628,26 @@ def get_candidate_interview_questions(candidate_id):
         logger.error(f"Erreur récupération questions candidat {candidate_id}: {str(e)}")
         return jsonify({"error": "Erreur lors de la récupération des questions", "details": str(e)}), 500
 
+@bp.route('/api/metrics', methods=['GET'])
+@jwt_required()
+def get_metrics():
+    """Compteurs internes (caches, client LLM) pour le suivi des performances, réservés aux utilisateurs connectés"""
+    return jsonify({
+        "embedding_cache": get_embedding_cache().stats(),
+        "llm_cache": get_llm_cache().stats(),
+        "llm_client": get_llm_client().stats()
+    }), 200
+
+@bp.route('/api/ready', methods=['GET'])
+def readiness_probe():
+    """Sonde de disponibilité : 200 une fois le modèle d'embeddings préchargé, 503 sinon"""
+    try:
+        state = readiness(current_app.config.get('EMBEDDING_MODEL_LOADING', 'lazy'))
+        return jsonify(state), 200 if state["ready"] else 503
+    except Exception as e:
+        logger.error(f"Erreur de la sonde de disponibilité: {str(e)}")
+        return jsonify({"error": "Erreur serveur", "details": str(e)}), 500
+
 @bp.route('/api/context/<int:context_id>', methods=['DELETE'])
 @jwt_required()
 def delete_context(context_id):
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Profils de pondération versionnés et recalcul des scores stockés
+
+Les scores bruts par dimension (compétences, expérience, formation, culture,
+entretien) sont conservés sur le candidat ; le score CV et le score prédictif
+final n'en sont que des moyennes pondérées (ScoringService). Changer de
+pondération crée une nouvelle version de ScoringProfile (par brief, ou par
+défaut pour l'utilisateur) puis lance le travail 'rescore' : tous les scores
+concernés (colonnes et détail score_details) sont recalculés en un produit
+matriciel et écrits en un UPDATE groupé, sans nouvel appel LLM ni embedding.
+"""
+import logging
+
+import numpy as np
+from sqlalchemy import func, update
+
+from . import db
+from .constants import PROCESS_STAGES
+from .job_queue import job_queue
+from .models import Candidate, CandidateMatch, ScoringProfile
+from .modules.scoring_service import DEFAULT_WEIGHTS, DIMENSIONS, ScoringService
+
+logger = logging.getLogger(__name__)
+
+SCORE_COLUMNS = [f'{dimension}_score' for dimension in DIMENSIONS]
+
+# Le score prédictif d'un candidat finalisé est le score final (5 dimensions),
+# sinon le score CV
+FINALIZED_STAGES = (PROCESS_STAGES['FINAL_EVALUATION'], PROCESS_STAGES['COMPLETED'])
+
+
+def _latest(query):
+    """{brief_id: profil de plus haute version} parmi les profils de la requête"""
+    profiles = {}
+    for profile in query.order_by(ScoringProfile.version):
+        profiles[profile.brief_id] = profile
+    return profiles
+
+
+def active_profiles(user_id):
+    """Profils actifs de l'utilisateur en une requête : {brief_id (None : défaut de l'utilisateur): profil}"""
+    return _latest(ScoringProfile.query.filter_by(user_id=user_id))
+
+
+def profile_for(profiles, brief_id):
+    """Profil du brief, sinon défaut de l'utilisateur ; None : pondération par défaut"""
+    return profiles.get(brief_id) or profiles.get(None)
+
+
+def profile_weights(profile):
+    return profile.weights if profile else DEFAULT_WEIGHTS
+
+
+def brief_profile(user_id, brief_id):
+    """Profil actif d'un seul brief (voir profile_for)"""
+    query = ScoringProfile.query.filter(
+        ScoringProfile.user_id == user_id,
+        db.or_(ScoringProfile.brief_id == brief_id, ScoringProfile.brief_id.is_(None))
+    )
+    return profile_for(_latest(query), brief_id)
+
+
+def create_profile(user_id, brief_id, weights):
+    """
+    Nouvelle version du profil du brief (ou du défaut de l'utilisateur si
+    brief_id est None), sans commit. Une étape absente de weights reprend la
+    pondération active. ValueError si les poids sont invalides.
+    """
+    if not isinstance(weights, dict):
+        raise ValueError('weights doit être un objet {"cv": {...}, "final": {...}}')
+    current = profile_weights(brief_profile(user_id, brief_id))
+    normalized = ScoringService.normalize_weights(dict(current, **weights))
+    # Deux créations simultanées calculent la même version : la contrainte d'unicité
+    # en refuse une (IntegrityError au commit)
+    version = db.session.query(func.max(ScoringProfile.version)).filter(
+        ScoringProfile.user_id == user_id,
+        ScoringProfile.brief_id.is_(None) if brief_id is None else ScoringProfile.brief_id == brief_id
+    ).scalar() or 0
+    profile = ScoringProfile(user_id=user_id, brief_id=brief_id, version=version + 1, weights=normalized)
+    db.session.add(profile)
+    logger.info(f"⚖️ Profil de pondération v{version + 1} (utilisateur {user_id}, brief {brief_id}) : {normalized}")
+    return profile
+
+
+def score_matrix(rows):
+    """Scores bruts (n, 5) dans l'ordre de DIMENSIONS ; colonne absente ou NULL -> NaN"""
+    return np.array(
+        [[getattr(row, column, None) for column in SCORE_COLUMNS] for row in rows], dtype=np.float64
+    ).reshape(len(rows), len(SCORE_COLUMNS))
+
+
+def weight_rows(profiles, brief_ids, stage):
+    """Poids (n, 5) de l'étape pour chaque ligne, selon le profil actif de son brief"""
+    vectors = {
+        brief_id: ScoringService.weight_vector(profile_weights(profile_for(profiles, brief_id)), stage)
+        for brief_id in set(brief_ids)
+    }
+    return np.array([vectors[brief_id] for brief_id in brief_ids], dtype=np.float64).reshape(len(brief_ids), len(DIMENSIONS))
+
+
+def _changed(new, current):
+    return ~np.isclose(new, np.nan_to_num(np.asarray(current, dtype=np.float64)))
+
+
+def _details_changed(new, current):
+    current = current or {}
+    return (current.get('weights') != new['weights']
+            or not np.isclose(new['final_score'], current.get('final_score') or 0.0))
+
+
+def rescore_candidates(user_id, brief_id=None):
+    """
+    Recalcule, selon les profils actifs, les scores stockés des candidats de
+    l'utilisateur (d'un brief si brief_id) et les scores du matching inversé.
+    Une requête par table pour lire, un UPDATE groupé par table pour écrire les
+    seules lignes modifiées ; sans commit. Retourne les compteurs.
+    """
+    profiles = active_profiles(user_id)
+
+    query = db.session.query(
+        Candidate.id, Candidate.brief_id, Candidate.process_stage, Candidate.predictive_score,
+        Candidate.final_predictive_score, Candidate.scoring_profile_id, Candidate.score_details,
+        *[getattr(Candidate, c) for c in SCORE_COLUMNS]
+    ).filter(Candidate.user_id == user_id)
+    if brief_id is not None:
+        query = query.filter(Candidate.brief_id == brief_id)
+    rows = query.all()
+
+    updates = []
+    if rows:
+        brief_ids = [row.brief_id for row in rows]
+        scores = score_matrix(rows)
+        cv = ScoringService.weighted_scores(scores, weight_rows(profiles, brief_ids, 'cv'))
+        final = ScoringService.weighted_scores(scores, weight_rows(profiles, brief_ids, 'final'))
+        finalized = np.array([row.process_stage in FINALIZED_STAGES for row in rows])
+        current_final = np.nan_to_num(np.array([row.final_predictive_score for row in rows], dtype=np.float64))
+        predictive = np.where(finalized, final, cv)
+        final_predictive = np.where(finalized, final, current_final)
+
+        row_profiles = [profile_for(profiles, b) for b in brief_ids]
+        profile_ids = [getattr(profile, 'id', None) for profile in row_profiles]
+        # Détail affiché par la fiche candidat : score CV et pondération appliquée
+        details = [
+            dict(row.score_details or {}, final_score=float(cv[i]), weights=profile_weights(row_profiles[i]))
+            for i, row in enumerate(rows)
+        ]
+        changed = (_changed(predictive, [row.predictive_score for row in rows])
+                   | _changed(final_predictive, current_final)
+                   | np.array([row.scoring_profile_id != profile_id for row, profile_id in zip(rows, profile_ids)])
+                   | np.array([_details_changed(detail, row.score_details) for row, detail in zip(rows, details)]))
+        updates = [
+            {
+                "id": rows[i].id,
+                "predictive_score": float(predictive[i]),
+                "final_predictive_score": float(final_predictive[i]),
+                "scoring_profile_id": profile_ids[i],
+                "score_details": details[i]
+            }
+            for i in np.flatnonzero(changed)
+        ]
+        if updates:
+            db.session.execute(update(Candidate), updates)
+
+    # Matching inversé : le score final d'un CandidateMatch est le score CV face au brief
+    match_query = db.session.query(
+        CandidateMatch.id, CandidateMatch.brief_id, CandidateMatch.final_score,
+        CandidateMatch.skills_score, CandidateMatch.experience_score, CandidateMatch.education_score
+    ).filter(CandidateMatch.user_id == user_id)
+    if brief_id is not None:
+        match_query = match_query.filter(CandidateMatch.brief_id == brief_id)
+    matches = match_query.all()
+
+    match_updates = []
+    if matches:
+        match_scores = ScoringService.weighted_scores(
+            score_matrix(matches), weight_rows(profiles, [match.brief_id for match in matches], 'cv')
+        )
+        match_updates = [
+            {"id": matches[i].id, "final_score": float(match_scores[i])}
+            for i in np.flatnonzero(_changed(match_scores, [match.final_score for match in matches]))
+        ]
+        if match_updates:
+            db.session.execute(update(CandidateMatch), match_updates)
+
+    logger.info(f"⚖️ Re-scoring (utilisateur {user_id}, brief {brief_id}) : "
+                f"{len(updates)}/{len(rows)} candidat(s), {len(match_updates)}/{len(matches)} match(s) mis à jour")
+    return {
+        "candidates": len(rows),
+        "updated": len(updates),
+        "matches": len(matches),
+        "matches_updated": len(match_updates)
+    }
+
+
+@job_queue.task('rescore')
+def rescore_task(payload, progress):
+    progress('scoring')
+    try:
+        result = rescore_candidates(payload['user_id'], payload.get('brief_id'))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result
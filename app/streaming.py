@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Réponses en flux Server-Sent Events pour les routes longues
+
+Le traitement s'exécute sur un worker de la file d'attente (app.job_queue) et
+publie ses étapes dans le journal du travail ; la réponse ne fait que relayer
+ce journal, avec un commentaire de maintien de connexion quand aucune étape ne
+se termine pour que les proxys ne coupent pas. Le worker gunicorn est rendu
+avant son délai (événement 'reconnect', reprise avec Last-Event-ID) et le
+traitement va à son terme même si le client se déconnecte.
+
+Un flux ouvert occupe un thread de serveur pendant au plus
+SSE_RELAY_MAX_SECONDS : gunicorn tourne en workers gthread (voir
+gunicorn.conf.py) pour que les autres requêtes ne l'attendent pas.
+"""
+import json
+import time
+
+from flask import Response, current_app, request, stream_with_context
+
+from .job_queue import JOB_STATUS, job_queue
+
+
+def wants_event_stream():
+    """Mode flux demandé par ?stream=1 ou Accept: text/event-stream"""
+    stream_param = request.args.get('stream')
+    if stream_param is not None:
+        return stream_param.lower() in ('1', 'true', 'yes')
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+
+def format_event(event, data, event_id=None):
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def last_event_id():
+    """Dernier événement reçu par le client (en-tête Last-Event-ID ou ?after=), 0 sinon"""
+    value = request.headers.get('Last-Event-ID') or request.args.get('after') or 0
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def job_final_event(job):
+    """Événement final d'un travail terminé : ('done', résultat) ou ('error', erreur), None s'il tourne encore"""
+    if job['status'] == JOB_STATUS['DONE']:
+        return 'done', dict(job.get('result') or {}, status=200)
+    if job['status'] == JOB_STATUS['FAILED']:
+        error = job.get('error') or {"error": "Échec du travail"}
+        return 'error', dict(error, status=error.get('status', 500))
+    return None
+
+
+def job_event_response(job_id, after=0):
+    """
+    Flux SSE des événements publiés par le travail job_id après le numéro after.
+    Chaque événement porte son numéro (id:) ; le flux se termine par 'done' ou
+    'error' quand le travail est fini, ou par 'reconnect' après
+    SSE_RELAY_MAX_SECONDS pour libérer le worker (le client rouvre le flux
+    avec Last-Event-ID).
+    """
+    app = current_app._get_current_object()
+    heartbeat = app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+    poll = app.config.get('SSE_POLL_SECONDS', 0.5)
+    max_duration = app.config.get('SSE_RELAY_MAX_SECONDS', 25)
+
+    def generate():
+        cursor = after
+        started = last_sent = time.monotonic()
+        yield format_event('job', {"job_id": job_id, "events_url": f"/api/jobs/{job_id}/events"})
+        while True:
+            # Statut lu avant les événements : un travail fini a déjà tout publié
+            job = job_queue.get_job(job_id)
+            for seq, event, data in job_queue.get_events(job_id, cursor):
+                cursor = seq
+                last_sent = time.monotonic()
+                yield format_event(event, data, seq)
+            final = job_final_event(job) if job else ('error', {"error": "Travail non trouvé", "status": 404})
+            if final:
+                yield format_event(*final)
+                return
+            now = time.monotonic()
+            if now - started >= max_duration:
+                yield format_event('reconnect', {"job_id": job_id, "after": cursor})
+                return
+            if now - last_sent >= heartbeat:
+                last_sent = now
+                yield ": keep-alive\n\n"
+            time.sleep(poll)
+
+    response = Response(stream_with_context(generate()), status=200, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Désactive la mise en tampon des proxys nginx
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark des backends d'embeddings : RSS, temps de chargement et débit d'encodage
+
+Chaque backend est mesuré dans un processus neuf pour que la mémoire de l'un
+ne fausse pas celle de l'autre.
+
+Usage : python bench_embedding_backends.py [--texts 2000] [--backends sentence-transformers onnx-int8]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+PROBE = """
+import json, random, sys, time
+sys.path.append('.')
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+baseline = rss_mb()
+from app.modules.embedding_backends import EMBEDDING_BACKENDS
+backend = EMBEDDING_BACKENDS[{backend!r}]()
+
+started = time.perf_counter()
+backend.load()
+load_seconds = time.perf_counter() - started
+loaded_rss = rss_mb()
+
+random.seed(0)
+words = ["Python", "gestion", "projet", "développement", "données", "client", "analyse", "web",
+         "équipe", "marketing", "cloud", "finance", "communication", "sécurité", "mobile"]
+texts = [" ".join(random.choice(words) for _ in range(random.randint(1, 12))) for _ in range({count})]
+
+backend.encode(texts[:8])
+started = time.perf_counter()
+backend.encode(texts)
+encode_seconds = time.perf_counter() - started
+
+print(json.dumps({{
+    "baseline_rss_mb": baseline,
+    "loaded_rss_mb": loaded_rss,
+    "peak_rss_mb": rss_mb(),
+    "load_seconds": load_seconds,
+    "texts_per_second": len(texts) / encode_seconds
+}}))
+"""
+
+
+def run(backend, count):
+    completed = subprocess.run(
+        [sys.executable, '-c', PROBE.format(backend=backend, count=count)],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "échec"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparaison des backends d'embeddings")
+    parser.add_argument('--texts', type=int, default=2000)
+    parser.add_argument('--backends', nargs='+', default=['sentence-transformers', 'onnx-int8'])
+    args = parser.parse_args()
+
+    print(f"{'Backend':<24}{'RSS chargé':>12}{'RSS pic':>12}{'Chargement':>12}{'Textes/s':>12}")
+    for backend in args.backends:
+        result = run(backend, args.texts)
+        if "error" in result:
+            print(f"{backend:<24}❌ {result['error']}")
+            continue
+        print(
+            f"{backend:<24}"
+            f"{result['loaded_rss_mb']:>9.0f} Mo"
+            f"{result['peak_rss_mb']:>9.0f} Mo"
+            f"{result['load_seconds']:>11.2f}s"
+            f"{result['texts_per_second']:>12.0f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
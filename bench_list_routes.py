@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark des routes de liste (candidats, briefs) avant / après les index
+
+Remplit une base (SQLite temporaire par défaut, ou --database-url) avec
+--candidates candidats répartis sur --users utilisateurs, puis mesure p50/p99
+de chaque route pour l'utilisateur 1 : d'abord sans les index idx_* des
+modèles, ensuite avec. Les routes sont appelées via le client de test Flask
+(pas de réseau) : la mesure couvre la requête SQL et la sérialisation.
+
+Usage : python bench_list_routes.py [--candidates 100000] [--users 20] [--requests 50] [--database-url URL]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from bench_pipeline import percentile
+
+STAGES = ['cv_analysis', 'interview', 'evaluation', 'final']
+
+
+def seed(db, models, args):
+    """Insertion groupée : briefs, candidats et appréciations (par lots de 5 000)"""
+    rng = random.Random(args.seed)
+    users = [{"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password": "x"}
+             for i in range(1, args.users + 1)]
+    db.session.execute(db.insert(models.User), users)
+    briefs = [{"id": i, "title": f"Poste {i}", "skills": "[]", "experience": "3 ans", "description": "-",
+               "user_id": (i % args.users) + 1} for i in range(1, args.users * args.briefs_per_user + 1)]
+    db.session.execute(db.insert(models.JobBrief), briefs)
+
+    start = datetime(2025, 1, 1)
+    batch, appreciations = [], []
+    for i in range(1, args.candidates + 1):
+        user_id = (i % args.users) + 1
+        batch.append({
+            "id": i, "name": f"Candidat {i}", "status": "CV analysé", "user_id": user_id,
+            "brief_id": user_id + args.users * rng.randrange(args.briefs_per_user),
+            "process_stage": rng.choice(STAGES),
+            "final_predictive_score": round(rng.uniform(0, 100), 1),
+            "skills_score": rng.uniform(0, 100), "experience_score": rng.uniform(0, 100),
+            "education_score": rng.uniform(0, 100),
+            "created_at": start + timedelta(minutes=i),
+            "cv_analysis": {"skills": ["Python", "SQL"], "experience": "3 ans"},
+            "score_details": {"final_score": 50},
+        })
+        appreciations += [{"candidate_id": i, "question": "Q ?", "category": category, "appreciation": "Bien",
+                           "score": 3.0} for category in ('technique', 'culture')]
+        if len(batch) >= 5000:
+            db.session.execute(db.insert(models.Candidate), batch)
+            db.session.execute(db.insert(models.Appreciation), appreciations)
+            batch, appreciations = [], []
+    if batch:
+        db.session.execute(db.insert(models.Candidate), batch)
+        db.session.execute(db.insert(models.Appreciation), appreciations)
+    db.session.commit()
+
+
+def list_indexes(models):
+    return [index for model in (models.Candidate, models.JobBrief, models.CompanyContext, models.Appreciation)
+            for index in model.__table__.indexes if index.name.startswith('idx_')]
+
+
+def deep_cursor(client, url, pages):
+    """Curseur de la page n° pages, ou de la dernière page si la liste est plus courte"""
+    cursor = None
+    for _ in range(pages - 1):
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        next_cursor = response.headers.get('X-Next-Cursor')
+        if not next_cursor:
+            break
+        cursor = next_cursor
+    return cursor
+
+
+def measure(client, routes, requests):
+    results = {}
+    for label, url in routes:
+        client.get(url)  # échauffement (caches SQLite, compilation des requêtes)
+        durations = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = client.get(url)
+            durations.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} : HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+        results[label] = durations
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des routes de liste avant / après index")
+    parser.add_argument('--candidates', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--briefs-per-user', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--deep-page', type=int, default=20, help="rang de la page lointaine mesurée")
+    parser.add_argument('--database-url', help="base de test (vidée !) ; SQLite temporaire par défaut")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(tempfile.mkdtemp(prefix='bench_list_routes_'))
+    from flask_jwt_extended import create_access_token
+    from config import Config
+    from app import create_app, db, models
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.database_url or f"sqlite:///{os.path.abspath('bench.db')}"
+        SQLALCHEMY_ENGINE_OPTIONS = {} if SQLALCHEMY_DATABASE_URI.startswith('sqlite') else Config.SQLALCHEMY_ENGINE_OPTIONS
+        JOB_QUEUE_BACKEND = 'memory'
+        JWT_SECRET_KEY = 'cle-de-benchmark-suffisamment-longue-pour-hs256'
+
+    app = create_app(BenchConfig)
+    # Les routes journalisent chaque appel : hors mesure
+    logging.getLogger().setLevel(logging.WARNING)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        seed(db, models, args)
+        print(f"Base : {args.candidates} candidats, {args.users} utilisateurs ({time.perf_counter() - started:.1f}s)")
+        token = create_access_token(identity='1')
+        brief_id = db.session.execute(db.select(models.Candidate.brief_id).filter_by(user_id=1).limit(1)).scalar()
+
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    routes = [
+        ("v2 page 1 (score)", "/api/v2/candidates?limit=50"),
+        ("v2 brief_id", f"/api/v2/candidates?limit=50&brief_id={brief_id}"),
+        ("v2 process_stage", "/api/v2/candidates?limit=50&process_stage=interview"),
+        ("v2 page lointaine", None),
+        ("candidates limit=50", "/candidates?limit=50"),
+        ("api/candidates score", "/api/candidates?limit=50&sort=score&fields=id,name,score_details,appreciations"),
+        ("job-briefs", "/job-briefs"),
+    ]
+
+    # Le curseur ne dépend que des données : même page lointaine dans les deux phases
+    cursor = deep_cursor(client, "/api/v2/candidates?limit=50", args.deep_page)
+    routes = [(label, url or f"/api/v2/candidates?limit=50&cursor={cursor}") for label, url in routes]
+
+    reports = {}
+    for phase in ('sans index', 'avec index'):
+        with app.app_context():
+            for index in list_indexes(models):
+                if phase == 'sans index':
+                    index.drop(db.engine, checkfirst=True)
+                else:
+                    index.create(db.engine, checkfirst=True)
+            with db.engine.begin() as conn:
+                conn.execute(db.text('ANALYZE'))
+        reports[phase] = measure(client, routes, args.requests)
+
+    print(f"{'Route':<24}" + ''.join(f"{phase + ' p50':>18}{'p99':>10}" for phase in reports))
+    for label, _ in routes:
+        line = f"{label:<24}"
+        for phase in reports:
+            durations = reports[phase][label]
+            line += f"{percentile(durations, 50) * 1000:>16.1f}ms{percentile(durations, 99) * 1000:>8.1f}ms"
+        print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
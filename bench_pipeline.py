@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark de bout en bout du pipeline CV -> questions -> évaluation, hors ligne
+
+Le fournisseur LLM local (LLM_PROVIDER=stub) rejoue les fixtures de fixtures/llm
+avec la latence et le taux d'erreurs demandés ; les embeddings utilisent par
+défaut le backend 'hashing' (aucun modèle à télécharger). Le cache des réponses
+LLM est désactivé pour mesurer chaque appel.
+
+Usage : python bench_pipeline.py [--candidates 50] [--concurrency 4] [--latency 200-800] [--error-rate 0.05]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+STAGES = ["analyze_cv", "score", "questions", "evaluation"]
+
+WORDS = ["Python", "Django", "PostgreSQL", "Docker", "API", "projet", "équipe", "client",
+         "données", "cloud", "tests", "déploiement", "analyse", "sécurité", "React"]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def synthetic_cv(rng, index):
+    body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(150, 400)))
+    return f"Candidat {index} - Développeur - {body}"
+
+
+def run_candidate(cv_text, job_desc, pipeline):
+    """Durées (secondes) de chaque étape pour un candidat, et l'étape en échec éventuelle"""
+    timings = {}
+
+    started = time.perf_counter()
+    cv_data = pipeline.analyze_cv(cv_text, use_cache=False)
+    timings["analyze_cv"] = time.perf_counter() - started
+    if "error" in cv_data:
+        return timings, "analyze_cv"
+
+    started = time.perf_counter()
+    score_result = pipeline.calculate_cv_score(cv_data, job_desc)
+    timings["score"] = time.perf_counter() - started
+    if "error" in score_result:
+        return timings, "score"
+
+    started = time.perf_counter()
+    questions = pipeline.generate_interview_questions(job_desc, cv_data, score_result)
+    timings["questions"] = time.perf_counter() - started
+    if "error" in questions:
+        return timings, "questions"
+
+    appreciations = [
+        {"question": q["question"], "category": q["category"], "appreciation": "satisfait", "score": 75}
+        for q in questions["questions"]
+    ]
+    started = time.perf_counter()
+    analysis = pipeline.generate_predictive_analysis(job_desc, cv_data, score_result, questions, appreciations)
+    timings["evaluation"] = time.perf_counter() - started
+    if "error" in analysis:
+        return timings, "evaluation"
+    return timings, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne du pipeline de recrutement")
+    parser.add_argument('--candidates', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', default='200-800', help="latence simulée en ms ('300' ou '100-900')")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--embedding-backend', default='hashing')
+    args = parser.parse_args()
+
+    os.environ['LLM_PROVIDER'] = 'stub'
+    os.environ['LLM_STUB_LATENCY_MS'] = args.latency
+    os.environ['LLM_STUB_ERROR_RATE'] = str(args.error_rate)
+    os.environ['LLM_STUB_SEED'] = str(args.seed)
+    os.environ['LLM_CACHE_ENABLED'] = 'false'
+    os.environ['EMBEDDING_BACKEND'] = args.embedding_backend
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from app.modules import llms as pipeline
+    from app.modules.llm_client import get_llm_client
+
+    # Les fonctions du pipeline écrivent des fichiers de debug dans le répertoire courant
+    os.chdir(tempfile.mkdtemp(prefix='bench_pipeline_'))
+
+    job_desc = pipeline.generate_job_description("Développeur Python backend, 3 ans, Master", use_cache=False)
+    if not job_desc:
+        print("❌ Génération de la fiche de poste impossible")
+        return 1
+
+    rng = random.Random(args.seed)
+    cvs = [synthetic_cv(rng, i) for i in range(args.candidates)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda cv: run_candidate(cv, job_desc, pipeline), cvs))
+    elapsed = time.perf_counter() - started
+
+    print(f"Candidats : {args.candidates} | concurrence : {args.concurrency} | "
+          f"latence : {args.latency} ms | erreurs injectées : {args.error_rate:.0%}")
+    print(f"{'Étape':<14}{'p50':>10}{'p95':>10}{'max':>10}{'échecs':>10}")
+    for stage in STAGES:
+        durations = [timings[stage] for timings, _ in results if stage in timings]
+        failures = sum(1 for _, failed in results if failed == stage)
+        print(f"{stage:<14}"
+              f"{percentile(durations, 50) * 1000:>8.0f}ms"
+              f"{percentile(durations, 95) * 1000:>8.0f}ms"
+              f"{(max(durations) if durations else 0) * 1000:>8.0f}ms"
+              f"{failures:>10}")
+
+    totals = [sum(timings.values()) for timings, failed in results if failed is None]
+    print(f"\nPipeline complet : {len(totals)}/{len(results)} réussis, "
+          f"p50 {percentile(totals, 50):.2f}s, p95 {percentile(totals, 95):.2f}s, "
+          f"débit {len(results) / elapsed:.2f} candidats/s ({elapsed:.1f}s)")
+    if totals:
+        print(f"Moyenne par candidat : {statistics.mean(totals):.2f}s")
+    print(f"Client LLM : {get_llm_client().stats()}")
+    print(f"Fournisseur : {get_llm_client().provider.stats()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark du temps de démarrage : import des modules applicatifs dans un processus neuf
+
+Vérifie que l'import reste sous un budget (en secondes) et qu'aucun backend
+lourd (torch, sentence_transformers, matplotlib, google.generativeai) n'est
+chargé par un processus qui ne fait que du CRUD.
+
+Usage : python bench_startup.py [--runs 5] [--budget 1.5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Modules importés par les scripts CLI, migrations et workers
+MODULES = [
+    'app.modules.llms',
+    'app.routes',
+]
+
+HEAVY_MODULES = ['torch', 'sentence_transformers', 'matplotlib', 'google.generativeai']
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, runs):
+    timings = []
+    heavy = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        timings.append(result['seconds'])
+        heavy.update(result['heavy'])
+    return statistics.median(timings), max(timings), sorted(heavy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps d'import des modules applicatifs")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=1.5, help="Budget d'import par module (secondes, médiane)")
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        median, worst, heavy = measure(module, args.runs)
+        ok = median <= args.budget and not heavy
+        failed = failed or not ok
+        status = "✅" if ok else "❌"
+        print(f"{status} {module}: médiane {median * 1000:.0f} ms, max {worst * 1000:.0f} ms (budget {args.budget * 1000:.0f} ms)")
+        if heavy:
+            print(f"   Modules lourds chargés à l'import : {', '.join(heavy)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
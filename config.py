@@ -31,6 +31,55 @@ class Config:
         'pool_recycle': 1800
     }
     
+    # Modèle d'embeddings : 'eager' (préchargé au démarrage de gunicorn) ou 'lazy' (à la première utilisation)
+    EMBEDDING_MODEL_LOADING = os.getenv('EMBEDDING_MODEL_LOADING', 'eager').lower()
+    
     # Upload
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
\ No newline at end of file
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    
+    # File d'attente des traitements de fond (upload de CV asynchrone)
+    CV_UPLOAD_ASYNC = os.getenv('CV_UPLOAD_ASYNC', 'true').lower() in ('1', 'true', 'yes')
+    JOB_QUEUE_BACKEND = os.getenv('JOB_QUEUE_BACKEND', 'sqlite')  # 'sqlite' ou 'memory'
+    JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'jobs.sqlite3'))
+    JOB_QUEUE_WORKERS = int(os.getenv('JOB_QUEUE_WORKERS', '2'))
+    JOB_QUEUE_STALE_SECONDS = int(os.getenv('JOB_QUEUE_STALE_SECONDS', '600'))
+    JOB_QUEUE_HEARTBEAT_SECONDS = int(os.getenv('JOB_QUEUE_HEARTBEAT_SECONDS', '30'))  # renouvellement des travaux en cours
+    # Reprise des travaux en attente dès create_app() ; désactivée sous gunicorn
+    # (preload_app) où chaque worker reprend une fois initialisé (post_worker_init)
+    JOB_QUEUE_RESUME_ON_START = os.getenv('JOB_QUEUE_RESUME_ON_START', 'true').lower() in ('1', 'true', 'yes')
+    # Durée de conservation des travaux terminés et de leurs événements (0 : jamais purgés)
+    JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', str(7 * 24 * 3600)))
+    
+    # Upload en masse
+    BULK_UPLOAD_MAX_FILES = int(os.getenv('BULK_UPLOAD_MAX_FILES', '200'))
+    BULK_UPLOAD_MAX_CONTENT_LENGTH = 200 * 1024 * 1024  # 200MB max par lot
+    # Taille de chaque fichier (décompressée pour un membre d'archive zip) et du lot,
+    # vérifiées avant toute écriture ; un lot hors limites (ou de plus de BULK_UPLOAD_MAX_FILES) est refusé (413)
+    BULK_UPLOAD_MAX_FILE_SIZE = int(os.getenv('BULK_UPLOAD_MAX_FILE_SIZE', str(16 * 1024 * 1024)))
+    BULK_UPLOAD_MAX_UNCOMPRESSED_SIZE = int(os.getenv('BULK_UPLOAD_MAX_UNCOMPRESSED_SIZE', str(500 * 1024 * 1024)))
+    BULK_EXTRACT_WORKERS = int(os.getenv('BULK_EXTRACT_WORKERS', str(os.cpu_count() or 1)))
+    BULK_LLM_CONCURRENCY = int(os.getenv('BULK_LLM_CONCURRENCY', '4'))
+
+    # Matching inversé : scores expérience / formation répartis sur un pool de processus
+    # à partir de REVERSE_MATCH_POOL_MIN_ITEMS candidats à calculer
+    REVERSE_MATCH_WORKERS = int(os.getenv('REVERSE_MATCH_WORKERS', str(min(4, os.cpu_count() or 1))))
+    REVERSE_MATCH_POOL_MIN_ITEMS = int(os.getenv('REVERSE_MATCH_POOL_MIN_ITEMS', '200'))
+
+    # Réponses en flux (Server-Sent Events) des routes longues
+    SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+    # Relais des événements d'un travail de la file : intervalle de lecture et durée
+    # maximale d'une connexion. Chaque flux occupe un thread du worker gunicorn (gthread,
+    # GUNICORN_THREADS) : fenêtre courte, le client reprend ensuite avec Last-Event-ID
+    SSE_POLL_SECONDS = float(os.getenv('SSE_POLL_SECONDS', '0.5'))
+    SSE_RELAY_MAX_SECONDS = float(os.getenv('SSE_RELAY_MAX_SECONDS', '25'))
+
+    # Listes de candidats paginées par curseur (/api/v2/candidates, ou ?limit= sur les autres listes)
+    CANDIDATES_PAGE_SIZE = int(os.getenv('CANDIDATES_PAGE_SIZE', '50'))
+    CANDIDATES_MAX_PAGE_SIZE = int(os.getenv('CANDIDATES_MAX_PAGE_SIZE', '200'))
+
+    # Journalise les requêtes HTTP émettant plus de N requêtes SQL (0 : désactivé)
+    QUERY_COUNT_LOG_THRESHOLD = int(os.getenv('QUERY_COUNT_LOG_THRESHOLD', '0'))
+
+    # Nombre maximal de candidats par envoi groupé d'évaluations d'entretien
+    EVALUATION_BATCH_MAX_CANDIDATES = int(os.getenv('EVALUATION_BATCH_MAX_CANDIDATES', '200'))
\ No newline at end of file
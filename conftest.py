@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Configuration et fixtures communes des tests d'application
+
+Un module redéfinit ``app_config`` pour ajouter ses réglages (sous-classe de
+TestConfig) et étend ``app`` pour insérer ses données ; la base en mémoire est
+vidée en fin de test.
+"""
+import sys
+sys.path.append('.')
+import pytest
+from flask_jwt_extended import create_access_token
+
+from config import Config
+from app import create_app, db
+
+
+class TestConfig(Config):
+    """Base SQLite en mémoire et file d'attente locale"""
+    __test__ = False
+
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    JOB_QUEUE_BACKEND = 'memory'
+    JWT_SECRET_KEY = 'cle-de-test-suffisamment-longue-pour-hs256'
+
+
+def authenticated_client(app, identity='1'):
+    """Client de test portant le jeton JWT de l'utilisateur identity"""
+    with app.app_context():
+        token = create_access_token(identity=identity)
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return client
+
+
+def drop_app(app):
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def app_config():
+    return TestConfig
+
+
+@pytest.fixture
+def app(app_config):
+    app = create_app(app_config)
+    yield app
+    drop_app(app)
+
+
+@pytest.fixture
+def client(app):
+    return authenticated_client(app)
@@ -31,20 +31,17 @@ def fix_interview_questions():
                 print(f"Nom: {candidate.name}")
                 print(f"Type actuel: {type(candidate.interview_questions)}")
                 
-                # Si c'est déjà une string, essayer de la parser pour vérifier
+                # Colonne JSON native : une chaîne est une ancienne valeur encodée deux fois
                 if isinstance(candidate.interview_questions, str):
                     try:
-                        parsed = json.loads(candidate.interview_questions)
-                        print("✅ Format JSON string correct")
-                        continue
+                        candidate.interview_questions = json.loads(candidate.interview_questions)
+                        print("🔧 Conversion JSON string -> objet")
+                        fixed_count += 1
                     except json.JSONDecodeError:
-                        print("❌ String JSON invalide, conversion nécessaire")
+                        print("❌ String JSON invalide, correction manuelle nécessaire")
                 
-                # Si c'est un dict, le convertir en string JSON
-                elif isinstance(candidate.interview_questions, dict):
-                    print("🔧 Conversion dict -> JSON string")
-                    candidate.interview_questions = json.dumps(candidate.interview_questions)
-                    fixed_count += 1
+                elif isinstance(candidate.interview_questions, (dict, list)):
+                    print("✅ Format JSON correct")
                     
                 else:
                     print(f"❓ Type non reconnu: {type(candidate.interview_questions)}")
@@ -1,3 +1,5 @@
+import gc
+import os
 import multiprocessing
 
 # Bind sur toutes les interfaces
@@ -6,8 +8,11 @@ bind = "0.0.0.0:10000"
 # Un seul worker pour limiter l'utilisation de la mémoire
 workers = 1
 
-# Type de worker synchrone
-worker_class = "sync"
+# Worker à threads : un flux SSE (relais d'un travail de la file, voir app.streaming)
+# occupe un thread et non tout le worker ; les autres requêtes (suivi des travaux,
+# /api/ready) restent servies pendant qu'un client suit une analyse
+worker_class = "gthread"
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
 
 # Limite de mémoire par worker (en Mo)
 worker_memory_limit = "450M"
@@ -34,3 +39,39 @@ loglevel = "info"
 limit_request_line = 0
 limit_request_fields = 100
 limit_request_field_size = 8190
+
+
+# La file d'attente ne démarre pas de threads dans le master (preload_app) : voir post_worker_init
+os.environ.setdefault('JOB_QUEUE_RESUME_ON_START', 'false')
+
+
+# Préchargement du modèle d'embeddings (EMBEDDING_MODEL_LOADING=eager)
+def _eager_loading():
+    from config import Config
+    return Config.EMBEDDING_MODEL_LOADING == 'eager'
+
+def when_ready(server):
+    # Master, après le chargement de l'application : le modèle est chargé une seule fois
+    # puis partagé en copy-on-write par tous les workers (y compris ceux recréés par max_requests)
+    if server.cfg.preload_app and _eager_loading():
+        from app.modules.warmup import warm_up_model, preload_in_master
+        if preload_in_master():
+            warm_up_model()
+    # Objets déjà chargés exclus du GC : évite de recopier leurs pages dans chaque worker
+    gc.freeze()
+
+def post_fork(server, worker):
+    from app.modules.warmup import configure_worker_threads
+    configure_worker_threads()
+
+def post_worker_init(worker):
+    # Les threads de la file ne survivent pas au fork : chaque worker reprend les travaux en attente
+    from app.job_queue import job_queue
+    if job_queue.app is not None:
+        job_queue.resume_pending()
+    # Sans preload_app (ou avec un backend non partageable après fork, ex. ONNX Runtime),
+    # chaque worker charge son propre modèle avant d'accepter des requêtes
+    if _eager_loading():
+        from app.modules.warmup import warm_up_model, preload_in_master
+        if not worker.cfg.preload_app or not preload_in_master():
+            warm_up_model()
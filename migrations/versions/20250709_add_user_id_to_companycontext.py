@@ -4,6 +4,9 @@ Ajout du champ user_id à CompanyContext
 from alembic import op
 import sqlalchemy as sa
 
+revision = '20250709_add_user_id_to_companycontext'
+down_revision = None
+
 def upgrade():
     op.add_column('company_context', sa.Column('user_id', sa.Integer(), nullable=False, server_default='1'))
     op.create_foreign_key('fk_companycontext_user', 'company_context', 'user', ['user_id'], ['id'])
@@ -0,0 +1,16 @@
+"""
+Ajout des embeddings précalculés aux fiches de poste (JobBrief)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20250801_add_brief_embeddings'
+down_revision = '20250709_add_user_id_to_companycontext'
+
+def upgrade():
+    op.add_column('job_brief', sa.Column('skills_embeddings', sa.LargeBinary(), nullable=True))
+    op.add_column('job_brief', sa.Column('embeddings_fingerprint', sa.String(length=64), nullable=True))
+
+def downgrade():
+    op.drop_column('job_brief', 'embeddings_fingerprint')
+    op.drop_column('job_brief', 'skills_embeddings')
@@ -0,0 +1,29 @@
+"""
+Table candidate_match : scores du matching inversé (candidats existants vs brief)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20250805_add_candidate_match'
+down_revision = '20250801_add_brief_embeddings'
+
+def upgrade():
+    op.create_table(
+        'candidate_match',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('brief_id', sa.Integer(), sa.ForeignKey('job_brief.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('candidate_id', sa.Integer(), sa.ForeignKey('candidate.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=False),
+        sa.Column('brief_version', sa.String(length=64), nullable=False),
+        sa.Column('skills_score', sa.Float(), nullable=True),
+        sa.Column('experience_score', sa.Float(), nullable=True),
+        sa.Column('education_score', sa.Float(), nullable=True),
+        sa.Column('final_score', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('brief_id', 'candidate_id', name='uq_candidate_match_brief_candidate')
+    )
+    op.create_index('idx_candidate_match_brief_score', 'candidate_match', ['brief_id', 'final_score'])
+
+def downgrade():
+    op.drop_index('idx_candidate_match_brief_score', table_name='candidate_match')
+    op.drop_table('candidate_match')
@@ -0,0 +1,33 @@
+"""
+Stockage des CV adressé par contenu : table cv_document et empreinte sur candidate
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20250810_add_cv_documents'
+down_revision = '20250805_add_candidate_match'
+
+def upgrade():
+    op.create_table(
+        'cv_document',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('file_path', sa.String(length=255), nullable=False),
+        sa.Column('original_filename', sa.String(length=255), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('extraction', sa.Text(), nullable=True),
+        sa.Column('cv_analysis', sa.Text(), nullable=True),
+        sa.Column('analysis_version', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True)
+    )
+    op.create_index('ix_cv_document_sha256', 'cv_document', ['sha256'], unique=True)
+    op.add_column('candidate', sa.Column('cv_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_candidate_cv_hash', 'candidate', ['cv_hash'])
+
+def downgrade():
+    op.drop_index('ix_candidate_cv_hash', table_name='candidate')
+    op.drop_column('candidate', 'cv_hash')
+    op.drop_index('ix_cv_document_sha256', table_name='cv_document')
+    op.drop_table('cv_document')
@@ -0,0 +1,103 @@
+"""
+Colonnes JSON natives (JSONB sous PostgreSQL) pour les données détaillées des candidats
+
+Les valeurs existantes sont converties sur place. Une valeur encodée deux fois
+(chaîne JSON contenant du JSON) est déballée, une valeur vide devient NULL et
+un texte qui n'est pas du JSON est conservé sous forme de chaîne JSON.
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20250812_json_columns'
+down_revision = '20250810_add_cv_documents'
+
+JSON_COLUMNS = {
+    'candidate': ['cv_analysis', 'interview_questions', 'score_details', 'risks', 'recommendations'],
+    'cv_document': ['extraction', 'cv_analysis'],
+}
+
+TO_JSONB_FUNCTION = """
+CREATE OR REPLACE FUNCTION _migration_to_jsonb(value text) RETURNS jsonb AS $$
+DECLARE
+    parsed jsonb;
+BEGIN
+    IF value IS NULL OR btrim(value) = '' THEN
+        RETURN NULL;
+    END IF;
+    parsed := value::jsonb;
+    IF jsonb_typeof(parsed) = 'string' THEN
+        BEGIN
+            parsed := (parsed #>> '{}')::jsonb;
+        EXCEPTION WHEN others THEN
+            NULL;
+        END;
+    END IF;
+    IF jsonb_typeof(parsed) = 'null' THEN
+        RETURN NULL;
+    END IF;
+    RETURN parsed;
+EXCEPTION WHEN others THEN
+    RETURN to_jsonb(value);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE
+"""
+
+
+def _normalize(value):
+    """Équivalent Python de _migration_to_jsonb, pour les bases autres que PostgreSQL"""
+    if value is None or not str(value).strip():
+        return None
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(parsed, str):
+        try:
+            parsed = json.loads(parsed)
+        except ValueError:
+            pass
+    return None if parsed is None else json.dumps(parsed, ensure_ascii=False)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(TO_JSONB_FUNCTION)
+        for table, columns in JSON_COLUMNS.items():
+            for column in columns:
+                op.alter_column(
+                    table, column, type_=postgresql.JSONB(),
+                    postgresql_using=f'_migration_to_jsonb({column}::text)'
+                )
+        op.execute('DROP FUNCTION _migration_to_jsonb(text)')
+        return
+
+    for table, columns in JSON_COLUMNS.items():
+        rows = bind.execute(sa.text(f"SELECT id, {', '.join(columns)} FROM {table}")).mappings().all()
+        for row in rows:
+            changes = {}
+            for column in columns:
+                normalized = _normalize(row[column])
+                if normalized != row[column]:
+                    changes[column] = normalized
+            if changes:
+                assignments = ', '.join(f'{column} = :{column}' for column in changes)
+                bind.execute(sa.text(f"UPDATE {table} SET {assignments} WHERE id = :id"), dict(changes, id=row['id']))
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, type_=sa.JSON(), existing_type=sa.Text())
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table, columns in JSON_COLUMNS.items():
+        if bind.dialect.name == 'postgresql':
+            for column in columns:
+                op.alter_column(table, column, type_=sa.Text(), postgresql_using=f'{column}::text')
+        else:
+            with op.batch_alter_table(table) as batch_op:
+                for column in columns:
+                    batch_op.alter_column(column, type_=sa.Text(), existing_type=sa.JSON())
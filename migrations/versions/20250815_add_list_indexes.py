@@ -0,0 +1,39 @@
+"""
+Index des chemins de filtrage les plus fréquents (listes de candidats, briefs, appréciations)
+
+Idempotente : un index déjà présent (créé à la main ou par db.create_all) est
+ignoré. Sous PostgreSQL les index sont créés CONCURRENTLY, sans bloquer les
+écritures sur les tables en production.
+"""
+from alembic import op
+
+revision = '20250815_add_list_indexes'
+down_revision = '20250812_json_columns'
+
+INDEXES = [
+    ('idx_candidate_user_score', 'candidate', ['user_id', 'final_predictive_score', 'created_at', 'id']),
+    ('idx_candidate_user_created', 'candidate', ['user_id', 'created_at', 'id']),
+    ('idx_candidate_user_brief_score', 'candidate', ['user_id', 'brief_id', 'final_predictive_score', 'created_at', 'id']),
+    ('idx_candidate_user_stage_score', 'candidate', ['user_id', 'process_stage', 'final_predictive_score', 'created_at', 'id']),
+    ('idx_candidate_brief', 'candidate', ['brief_id']),
+    ('idx_job_brief_user', 'job_brief', ['user_id']),
+    ('idx_job_brief_context', 'job_brief', ['context_id']),
+    ('idx_company_context_user', 'company_context', ['user_id']),
+    ('idx_appreciation_candidate', 'appreciation', ['candidate_id']),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY est interdit dans une transaction
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+        return
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
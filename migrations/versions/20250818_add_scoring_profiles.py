@@ -0,0 +1,37 @@
+"""
+Profils de pondération versionnés (table scoring_profile) et profil ayant produit les scores d'un candidat
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20250818_add_scoring_profiles'
+down_revision = '20250815_add_list_indexes'
+
+def upgrade():
+    op.create_table(
+        'scoring_profile',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=False),
+        sa.Column('brief_id', sa.Integer(), sa.ForeignKey('job_brief.id', ondelete='CASCADE'), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('weights', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('user_id', 'brief_id', 'version', name='uq_scoring_profile_user_brief_version')
+    )
+    # NULL distinct de NULL dans une contrainte d'unicité : index partiel pour les profils par défaut
+    op.create_index(
+        'uq_scoring_profile_user_default_version', 'scoring_profile', ['user_id', 'version'], unique=True,
+        postgresql_where=sa.text('brief_id IS NULL'), sqlite_where=sa.text('brief_id IS NULL')
+    )
+    # batch : SQLite ne sait pas ajouter une clé étrangère à une table existante
+    with op.batch_alter_table('candidate') as batch_op:
+        batch_op.add_column(sa.Column('scoring_profile_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_candidate_scoring_profile', 'scoring_profile', ['scoring_profile_id'], ['id'])
+
+def downgrade():
+    with op.batch_alter_table('candidate') as batch_op:
+        batch_op.drop_constraint('fk_candidate_scoring_profile', type_='foreignkey')
+        batch_op.drop_column('scoring_profile_id')
+    op.drop_index('uq_scoring_profile_user_default_version', table_name='scoring_profile')
+    op.drop_table('scoring_profile')
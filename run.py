@@ -72,5 +72,8 @@ def test_cors():
     return jsonify({"status": "CORS test successful", "received_headers": dict(request.headers)})
 
 if __name__ == "__main__":
+    if app.config.get('EMBEDDING_MODEL_LOADING') == 'eager':
+        from app.modules.warmup import warm_up_model
+        warm_up_model()
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=True)
\ No newline at end of file
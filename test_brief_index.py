@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import sys
+from types import SimpleNamespace
+sys.path.append('.')
+import numpy as np
+import pytest
+
+from app.modules import brief_index, embedding_backends, llms
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def fake_embeddings(texts, use_cache=True):
+        calls.append(list(texts))
+        return np.ones((len(texts), 3), dtype=np.float32)
+
+    monkeypatch.setattr(llms, 'get_embeddings', fake_embeddings)
+    monkeypatch.setattr(embedding_backends, 'get_embedding_backend', lambda: SimpleNamespace(model_id='modele'))
+    return calls
+
+
+def _brief(skills, description="Poste"):
+    return SimpleNamespace(id=1, full_data=json.dumps({"skills": skills, "description": description}),
+                           skills_embeddings=None, embeddings_fingerprint=None)
+
+
+def test_skills_are_encoded_once_per_content(calls):
+    brief = _brief(["Python", "SQL"])
+    assert brief_index.refresh_brief_embeddings(brief)
+    assert not brief_index.refresh_brief_embeddings(brief)
+    assert calls == [["Python", "SQL"]]
+    assert brief_index.load_brief_embeddings(brief).shape == (2, 3)
+
+    # La description n'est pas encodée : la modifier ne recalcule rien
+    brief.full_data = json.dumps({"skills": ["Python", "SQL"], "description": "Autre poste"})
+    assert not brief_index.refresh_brief_embeddings(brief)
+
+    brief.full_data = json.dumps({"skills": ["Python"], "description": "Autre poste"})
+    assert brief_index.refresh_brief_embeddings(brief)
+    assert calls[-1] == ["Python"]
+
+
+def test_brief_without_skills_is_not_refreshed_on_every_call(calls):
+    brief = _brief([])
+    assert brief_index.refresh_brief_embeddings(brief)
+    assert brief.skills_embeddings is None
+    assert not brief_index.refresh_brief_embeddings(brief)
+    assert brief_index.load_brief_embeddings(brief) is None
+    assert calls == []
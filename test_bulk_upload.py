@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import io
+import os
+import sys
+import time
+import zipfile
+sys.path.append('.')
+import pytest
+
+from app import db
+from app.cv_pipeline import skill_names
+from app.job_queue import JOB_STATUS, job_queue
+from app.models import JobBrief, User
+from conftest import TestConfig
+
+
+class _TestConfig(TestConfig):
+    BULK_UPLOAD_MAX_FILE_SIZE = 1024 * 1024
+    BULK_UPLOAD_MAX_UNCOMPRESSED_SIZE = 3 * 1024 * 1024
+    SSE_POLL_SECONDS = 0.01
+
+
+@pytest.fixture(autouse=True)
+def _uploads_dir(tmp_path, monkeypatch):
+    # Les fichiers reçus sont stockés sous ./uploads
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def app_config():
+    return _TestConfig
+
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        db.session.add(User(id=1, username='a', email='a@example.com', password='x'))
+        db.session.add(JobBrief(id=1, title="Poste", skills="[]", experience="3 ans", description="-", user_id=1))
+        db.session.commit()
+    return app
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def _post(client, archive, query=''):
+    return client.post(f'/api/cv/bulk-upload{query}', data={"brief_id": "1", "file": (archive, "CVs.zip")},
+                       content_type='multipart/form-data')
+
+
+def _wait(job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = job_queue.get_job(job_id)
+        if job['status'] in (JOB_STATUS['DONE'], JOB_STATUS['FAILED']):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Travail {job_id} non terminé")
+
+
+def test_zip_bomb_is_rejected_before_extraction(client):
+    # Quelques Ko compressés, 2 Mo une fois décompressés
+    response = _post(client, _zip({"bombe.pdf": b"\0" * (2 * 1024 * 1024)}))
+    assert response.status_code == 413
+    assert not os.path.exists('uploads')
+
+    members = {f"cv{i}.pdf": bytes([i]) * (900 * 1024) for i in range(4)}
+    response = _post(client, _zip(members))
+    assert response.status_code == 413
+    assert "décompressée" in response.get_json()["error"]
+    assert not os.path.exists('uploads')
+
+
+def test_batch_over_the_file_limit_is_rejected(client):
+    client.application.config['BULK_UPLOAD_MAX_FILES'] = 2
+    data = {"brief_id": "1", "file": [(_zip({"a.pdf": b"%PDF-1.4 A", "b.pdf": b"%PDF-1.4 B"}), "CVs.zip"),
+                                      (io.BytesIO(b"%PDF-1.4 C"), "c.pdf")]}
+    response = client.post('/api/cv/bulk-upload', data=data, content_type='multipart/form-data')
+    assert response.status_code == 413
+    assert "maximum 2" in response.get_json()["error"]
+    assert not os.path.exists('uploads')
+
+
+def test_oversized_pdf_is_rejected(client):
+    data = {"brief_id": "1", "file": (io.BytesIO(b"%PDF-1.4 " + b"\0" * (1024 * 1024)), "gros.pdf")}
+    response = client.post('/api/cv/bulk-upload', data=data, content_type='multipart/form-data')
+    assert response.status_code == 413
+    assert "gros.pdf" in response.get_json()["error"]
+    assert not os.path.exists('uploads')
+
+
+def test_bulk_upload_runs_on_job_queue(client, monkeypatch):
+    seen = {}
+
+    def fake_bulk(entries, brief, user_id, use_llm_cache=True):
+        seen["files"] = sorted(entry["filename"] for entry in entries)
+        yield {"event": "started", "total": len(entries), "brief_id": brief.id}
+        for index, entry in enumerate(entries):
+            yield {"event": "saved", "file": entry["filename"], "candidate": {"id": index + 10}}
+        yield {"event": "done", "total": len(entries), "created": len(entries), "failed": 0, "duplicates": 0}
+
+    monkeypatch.setattr('app.cv_pipeline.process_cv_bulk', fake_bulk)
+    response = _post(client, _zip({"a.pdf": b"%PDF-1.4 A", "b.pdf": b"%PDF-1.4 B", "notes.txt": b"-"}))
+    assert response.status_code == 202, response.get_json()
+    body = response.get_json()
+    assert body["total"] == 2
+
+    job = _wait(body["job_id"])
+    assert job["status"] == JOB_STATUS["DONE"], job
+    assert job["result"]["candidate_ids"] == [10, 11]
+    assert seen["files"] == ["a.pdf", "b.pdf"]
+
+    events = client.get(body["events_url"]).get_json()
+    names = [event["event"] for event in events["events"]]
+    assert names == ["stage", "started", "saved", "saved", "done"]
+    assert events["status"] == JOB_STATUS["DONE"]
+
+    # Reprise après un événement déjà reçu
+    after = events["events"][2]["id"]
+    resumed = client.get(f'{body["events_url"]}?after={after}').get_json()
+    assert [event["event"] for event in resumed["events"]] == ["saved", "done"]
+
+    stream = client.get(f'{body["events_url"]}?stream=1', headers={"Last-Event-ID": str(after)})
+    assert stream.mimetype == 'text/event-stream'
+    text = stream.get_data(as_text=True)
+    assert text.count("event: saved") == 1
+    assert text.rstrip().splitlines()[-2] == "event: done"
+
+
+def test_failed_bulk_job_relays_its_error(client, monkeypatch):
+    def failing_bulk(entries, brief, user_id, use_llm_cache=True):
+        yield {"event": "error", "error": "Erreur lors de l'enregistrement des candidats"}
+
+    monkeypatch.setattr('app.cv_pipeline.process_cv_bulk', failing_bulk)
+    body = _post(client, _zip({"a.pdf": b"%PDF-1.4 A"})).get_json()
+    job = _wait(body["job_id"])
+    assert job["status"] == JOB_STATUS["FAILED"]
+    assert job["error"]["status"] == 500
+
+    text = client.get(f'{body["events_url"]}?stream=1').get_data(as_text=True)
+    assert "event: error" in text
+
+
+def test_skill_names_ignores_non_string_entries():
+    cv_data = {"Compétences": ["Python", {"nom": "SQL"}, ["Java"], " Python ", "", None, "Docker"]}
+    assert skill_names(cv_data) == ["Python", "Docker"]
+    assert skill_names({"Compétences": "Python"}) == []
+    assert skill_names({}) == []
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+from datetime import datetime, timedelta
+sys.path.append('.')
+import pytest
+
+from app import db
+from app.models import Candidate, User
+from conftest import TestConfig
+
+
+class _TestConfig(TestConfig):
+    CANDIDATES_PAGE_SIZE = 4
+
+
+@pytest.fixture
+def app_config():
+    return _TestConfig
+
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        db.session.add_all([User(id=1, username='a', email='a@example.com', password='x'),
+                            User(id=2, username='b', email='b@example.com', password='x')])
+        start = datetime(2025, 1, 1)
+        for i in range(10):
+            # Scores en double : l'ordre des ex æquo est départagé par created_at puis id
+            db.session.add(Candidate(
+                name=f"Candidat {i}", status="CV analysé", user_id=1,
+                final_predictive_score=float(i // 2 * 10), created_at=start + timedelta(days=i % 3),
+                cv_analysis={"skills": ["Python"]}, score_details={"final_score": i}
+            ))
+        db.session.add(Candidate(name="Autre", status="CV analysé", user_id=2))
+        db.session.commit()
+    return app
+
+
+def _walk(client, url):
+    names, cursor = [], None
+    while True:
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200
+        body = response.get_json()
+        names += [c['name'] for c in body['candidates']]
+        assert len(body['candidates']) <= 4
+        assert response.headers['X-Total-Count'] == '10'
+        cursor = response.headers.get('X-Next-Cursor')
+        assert cursor == body['next_cursor']
+        if not cursor:
+            return names
+
+
+def test_v2_keyset_pages_cover_every_candidate_once(client):
+    names = _walk(client, '/api/v2/candidates?sort=score')
+    assert len(names) == len(set(names)) == 10
+
+    with client.application.app_context():
+        expected = [c.name for c in Candidate.query.filter_by(user_id=1).order_by(
+            Candidate.final_predictive_score.desc(), Candidate.created_at.desc(), Candidate.id.desc())]
+    assert names == expected
+    assert len(_walk(client, '/api/v2/candidates?sort=created_at')) == 10
+
+
+def test_fields_limit_keys_and_loaded_columns(client):
+    response = client.get('/api/v2/candidates?fields=name,recommendation&limit=2')
+    candidates = response.get_json()['candidates']
+    assert [set(c) for c in candidates] == [{'name', 'recommendation'}] * 2
+
+    response = client.get('/candidates?fields=id,score_details')
+    assert response.status_code == 200
+    assert all(set(c) == {'id', 'score_details'} for c in response.get_json())
+    assert response.headers['X-Total-Count'] == '10'
+
+
+def test_v1_lists_stay_complete_without_limit(client):
+    response = client.get('/api/candidates')
+    assert len(response.get_json()) == 10 and 'X-Next-Cursor' not in response.headers
+
+    response = client.get('/api/candidates?limit=3')
+    assert len(response.get_json()) == 3 and response.headers['X-Next-Cursor']
+
+
+def test_invalid_parameters_are_rejected(client):
+    assert client.get('/api/v2/candidates?fields=password').status_code == 400
+    assert client.get('/api/v2/candidates?sort=name').status_code == 400
+    assert client.get('/api/v2/candidates?cursor=abc').status_code == 400
+    assert client.get('/api/v2/candidates?limit=0').status_code == 400
+
+    cursor = client.get('/api/v2/candidates?sort=score').headers['X-Next-Cursor']
+    assert client.get(f'/api/v2/candidates?sort=created_at&cursor={cursor}').status_code == 400
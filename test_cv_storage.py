@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import hashlib
+import io
+import os
+import sys
+sys.path.append('.')
+
+from app.modules.cv_storage import content_path, hash_file, store_upload
+
+
+def test_store_upload_is_content_addressed(tmp_path):
+    root = str(tmp_path / "uploads")
+    data = b"%PDF-1.4 Jean Dupont"
+    sha = hashlib.sha256(data).hexdigest()
+
+    cv_hash, path, size, existed = store_upload(io.BytesIO(data), root=root)
+
+    assert cv_hash == sha and size == len(data) and not existed
+    assert path == content_path(sha, root) == os.path.join(root, sha[:2], sha + ".pdf")
+    assert hash_file(path) == sha
+
+
+def test_same_content_is_stored_once(tmp_path):
+    root = str(tmp_path / "uploads")
+    first = store_upload(io.BytesIO(b"meme CV"), root=root)
+    second = store_upload(io.BytesIO(b"meme CV"), root=root)
+    other = store_upload(io.BytesIO(b"autre CV"), root=root)
+
+    assert second[0] == first[0] and second[1] == first[1] and second[3]
+    assert other[0] != first[0]
+    stored = [name for _, _, files in os.walk(root) for name in files]
+    assert len(stored) == 2
+    assert not any(name.endswith('.part') for name in stored)
+
+
+def test_failed_upload_leaves_no_partial_file(tmp_path):
+    class Broken(io.BytesIO):
+        def read(self, *args):
+            raise IOError("connexion coupée")
+
+    root = str(tmp_path / "uploads")
+    try:
+        store_upload(Broken(), root=root)
+    except IOError:
+        pass
+    assert os.listdir(root) == []
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+sys.path.append('.')
+import numpy as np
+import pytest
+
+from app.modules.embedding_backends import (
+    EMBEDDING_BACKENDS,
+    DEFAULT_ONNX_DIR,
+    HashingBackend,
+    ONNX_MODEL_FILE,
+    OnnxInt8Backend,
+    SentenceTransformerBackend
+)
+
+PARITY_TEXTS = [
+    "Python", "Django", "Développement web", "Gestion de projet", "Project management",
+    "Machine learning", "Apprentissage automatique", "SQL", "PostgreSQL", "Communication",
+    "Anglais courant", "Docker", "Kubernetes", "Comptabilité", "Marketing digital",
+]
+
+
+class _FakeEncoding:
+    def __init__(self, text):
+        self.ids = [len(text)]
+        self.attention_mask = [1]
+
+
+class _FakeTokenizer:
+    def encode_batch(self, texts):
+        return [_FakeEncoding(t) for t in texts]
+
+
+class _FakeSession:
+    def run(self, outputs, feed):
+        ids = feed['input_ids'].astype(np.float32)
+        return [np.hstack([ids, np.ones_like(ids)])]
+
+
+def test_model_ids_are_distinct_per_backend():
+    assert SentenceTransformerBackend().model_id == 'distiluse-base-multilingual-cased-v1'
+    assert OnnxInt8Backend().model_id != SentenceTransformerBackend().model_id
+    assert set(EMBEDDING_BACKENDS) == {'sentence-transformers', 'onnx-int8', 'hashing'}
+
+
+def test_hashing_backend_is_deterministic_and_normalized():
+    backend = HashingBackend(dimension=256)
+    matrix = backend.encode(["Python", "python", "Comptabilité"])
+    assert matrix.shape == (3, 256)
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0, atol=1e-5)
+    assert np.array_equal(backend.encode("Python"), HashingBackend(dimension=256).encode("Python"))
+    assert matrix[0] @ matrix[1] > 0.99
+    assert matrix[0] @ matrix[2] < 0.5
+
+
+def test_onnx_batches_preserve_input_order():
+    backend = OnnxInt8Backend(batch_size=2)
+    backend._session, backend._tokenizer, backend._pid = _FakeSession(), _FakeTokenizer(), os.getpid()
+    texts = ["aaaa", "a", "aaaaaaa", "aa", "aaa"]
+
+    matrix = backend.encode(texts)
+
+    assert matrix.shape == (5, 2)
+    assert list(matrix[:, 0]) == [len(t) for t in texts]
+    assert backend.encode("aa").shape == (2,)
+
+
+def test_onnx_session_is_not_reused_after_fork():
+    backend = OnnxInt8Backend()
+    backend._session, backend._pid = _FakeSession(), os.getpid() + 1
+    assert not backend.loaded
+
+
+def _cosine_matrix(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return a @ b.T
+
+
+def test_onnx_int8_parity_with_sentence_transformers():
+    """Les scores cosinus du modèle int8 restent proches de ceux du modèle PyTorch"""
+    pytest.importorskip('sentence_transformers')
+    pytest.importorskip('onnxruntime')
+    if not os.path.exists(os.path.join(DEFAULT_ONNX_DIR, ONNX_MODEL_FILE)):
+        pytest.skip("Modèle ONNX non exporté (python -m app.modules.embedding_backends export)")
+
+    reference = SentenceTransformerBackend().encode(PARITY_TEXTS)
+    quantized = OnnxInt8Backend().encode(PARITY_TEXTS)
+
+    # Même vecteur, à la quantification près
+    self_similarity = np.diag(_cosine_matrix(reference, quantized))
+    assert self_similarity.min() > 0.98
+
+    # Scores compétence/compétence (ceux utilisés par le scoring) dans la tolérance
+    delta = np.abs(_cosine_matrix(reference, reference) - _cosine_matrix(quantized, quantized))
+    assert delta.max() < 0.05
+    assert delta.mean() < 0.015
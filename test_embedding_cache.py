@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+sys.path.append('.')
+import numpy as np
+
+from app.modules.embedding_cache import EmbeddingCache
+
+
+def _fake_encoder(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[len(t), ord(t[0]), 1.0] for t in texts], dtype=np.float32)
+    return encode
+
+
+def test_cache_encodes_each_string_once():
+    """Seules les chaînes inconnues sont encodées, en un seul appel dédoublonné"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(os.path.join(tmp, 'emb.sqlite3'))
+        calls = []
+        first = cache.encode('model', ['Python', 'SQL', 'Python'], _fake_encoder(calls))
+        second = cache.encode('model', ['  Python ', 'Docker'], _fake_encoder(calls))
+
+        assert calls == [['Python', 'SQL'], ['Docker']]
+        assert first.shape == (3, 3)
+        np.testing.assert_array_equal(first[0], second[0])
+        assert cache.stats()['memory_hits'] == 1
+
+
+def test_disk_tier_survives_restart():
+    """Un nouveau processus (nouveau cache) relit les vecteurs depuis le disque"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'emb.sqlite3')
+        EmbeddingCache(path).encode('model', ['Docker'], _fake_encoder([]))
+
+        calls = []
+        restarted = EmbeddingCache(path)
+        vectors = restarted.encode('model', ['Docker'], _fake_encoder(calls))
+        assert calls == []
+        assert restarted.stats()['disk_hits'] == 1
+        # La clé inclut le modèle
+        restarted.encode('autre-modele', ['Docker'], _fake_encoder(calls))
+        assert calls == [['Docker']]
+        assert vectors.dtype == np.float32
+
+
+if __name__ == "__main__":
+    test_cache_encodes_each_string_once()
+    test_disk_tier_survives_restart()
+    print("✅ Cache d'embeddings fonctionnel !")
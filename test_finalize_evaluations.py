@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+sys.path.append('.')
+import pytest
+
+from app import db
+from app.constants import PROCESS_STAGES
+from app.models import Appreciation, Candidate, JobBrief, User
+from app.modules.scoring_service import DEFAULT_WEIGHTS
+from app.query_stats import count_queries
+
+
+def _expected(skills, experience, education, culture, interview):
+    weights = DEFAULT_WEIGHTS['final']
+    return (skills * weights['skills'] + experience * weights['experience']
+            + education * weights['education'] + culture * weights['culture']
+            + interview * weights['interview'])
+
+
+SCORES = {
+    1: (90, 85, 80, 95, 90),   # recommandé
+    2: (70, 65, 50, 60, 70),   # en évaluation, formation à risque
+    3: (30, 40, 20, 50, 40),   # à revoir
+    4: (80, 80, 80, 0, 0),     # entretien non évalué : non éligible
+}
+
+
+def _appreciations(candidate_id, *categories):
+    return [Appreciation(candidate_id=candidate_id, question=f"Q{i}", category=category, appreciation="ok", score=3)
+            for i, category in enumerate(categories)]
+
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        db.session.add_all([User(id=1, username='a', email='a@example.com', password='x'),
+                            User(id=2, username='b', email='b@example.com', password='x')])
+        for brief_id, user_id in ((1, 1), (2, 1), (3, 2)):
+            db.session.add(JobBrief(id=brief_id, title="Poste", skills="[]", experience="3 ans",
+                                    description="-", user_id=user_id))
+        for candidate_id, (skills, experience, education, culture, interview) in SCORES.items():
+            db.session.add(Candidate(
+                id=candidate_id, name=f"Candidat {candidate_id}", status="Entretien évalué", user_id=1, brief_id=1,
+                skills_score=skills, experience_score=experience, education_score=education,
+                culture_score=culture, interview_score=interview
+            ))
+        for candidate_id in (1, 2, 3, 5):
+            db.session.add_all(_appreciations(candidate_id, "Culture d'entreprise", "Technique"))
+        # Candidat 4 : seule la partie technique de l'entretien est notée
+        db.session.add_all(_appreciations(4, "Technique"))
+        db.session.add(Candidate(id=5, name="Autre brief", status="Entretien évalué", user_id=1, brief_id=2,
+                                 skills_score=50, experience_score=50, education_score=50,
+                                 culture_score=50, interview_score=50))
+        db.session.commit()
+    return app
+
+
+def test_batch_finalize_scores_every_eligible_candidate_of_the_brief(client):
+    with client.application.app_context():
+        engine = db.engine
+    with count_queries(engine) as counter:
+        response = client.post('/api/job-briefs/1/finalize-evaluations')
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body["count"] == 3
+    assert [r["candidate_id"] for r in body["results"]] == [1, 2, 3]  # score décroissant
+
+    # Lecture du brief, des profils de pondération, des scores, puis un UPDATE groupé
+    assert sum(1 for s in counter.statements if s.lstrip().upper().startswith('UPDATE')) == 1
+    assert counter.count <= 4, counter.statements
+
+    with client.application.app_context():
+        for candidate_id in (1, 2, 3):
+            candidate = db.session.get(Candidate, candidate_id)
+            assert candidate.final_predictive_score == pytest.approx(_expected(*SCORES[candidate_id]))
+            assert candidate.predictive_score == candidate.final_predictive_score
+            assert candidate.process_stage == PROCESS_STAGES['FINAL_EVALUATION']
+        assert [db.session.get(Candidate, i).status for i in (1, 2, 3)] == ["Recommandé", "En évaluation", "À revoir"]
+        assert db.session.get(Candidate, 2).risks == ["Formation académique inadéquate"]
+        assert db.session.get(Candidate, 1).recommendations["level"] == "Excellent"
+        # Non éligible ou d'un autre brief : inchangés
+        assert db.session.get(Candidate, 4).final_predictive_score == 0
+        assert db.session.get(Candidate, 5).final_predictive_score == 0
+
+
+def test_batch_finalize_can_target_candidates(client):
+    response = client.post('/api/job-briefs/1/finalize-evaluations', json={"candidate_ids": [2, 4]})
+    assert [r["candidate_id"] for r in response.get_json()["results"]] == [2]
+    assert client.post('/api/job-briefs/1/finalize-evaluations', json={"candidate_ids": "2"}).status_code == 400
+    assert client.post('/api/job-briefs/3/finalize-evaluations').status_code == 404
+
+
+def test_single_finalize_matches_batch_result(client):
+    response = client.post('/api/candidates/2/finalize-evaluation')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["final_predictive_score"] == pytest.approx(_expected(*SCORES[2]))
+    assert body["status"] == "En évaluation"
+    assert body["radar_data"]["Formation"] == 50
+    assert client.post('/api/candidates/4/finalize-evaluation').status_code == 400
+
+    # Scores non nuls mais aucune appréciation culture enregistrée : même refus explicite, pas d'erreur serveur
+    with client.application.app_context():
+        db.session.get(Candidate, 4).culture_score = -100 / 3
+        db.session.get(Candidate, 4).interview_score = 70
+        db.session.commit()
+    response = client.post('/api/candidates/4/finalize-evaluation')
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "L'entretien doit être évalué avant de finaliser"
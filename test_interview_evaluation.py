@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+sys.path.append('.')
+import pytest
+
+from app import db
+from app.constants import CANDIDATE_STATUS
+from app.interview_evaluation import interview_scores
+from app.models import Appreciation, Candidate, User
+from app.query_stats import count_queries
+
+
+def _evaluations(*pairs):
+    return [{"question": f"Q{i}", "category": category, "appreciation": "ok", "score": score}
+            for i, (category, score) in enumerate(pairs)]
+
+
+def test_scores_match_per_candidate_means():
+    scores = interview_scores({
+        1: _evaluations(("culture", 4), ("Company values", 2), ("technique", 3)),
+        2: _evaluations(("technique", 1), ("motivation", 4)),
+    })
+    assert scores[1] == pytest.approx((200 / 3, 200 / 3))
+    # Sans évaluation culture : 0 %, jamais sous le bas de l'échelle
+    assert scores[2] == pytest.approx((0.0, 50.0))
+    assert interview_scores({1: _evaluations(("Job Description", 3))})[1] == pytest.approx((0.0, 200 / 3))
+
+
+def test_invalid_score_is_rejected():
+    with pytest.raises(ValueError):
+        interview_scores({1: [{"category": "culture", "score": "très bien"}]})
+    for score in (0, 5, -1, None):
+        with pytest.raises(ValueError):
+            interview_scores({1: [{"category": "culture", "score": score}]})
+
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        db.session.add_all([User(id=1, username='a', email='a@example.com', password='x'),
+                            User(id=2, username='b', email='b@example.com', password='x')])
+        for i in range(1, 21):
+            db.session.add(Candidate(id=i, name=f"Candidat {i}", status="CV analysé", user_id=1))
+        db.session.add(Candidate(id=99, name="Autre", status="CV analysé", user_id=2))
+        db.session.commit()
+    return app
+
+
+def test_single_candidate_evaluation(client):
+    response = client.post('/api/candidates/3/evaluate-interview',
+                           json={"evaluations": _evaluations(("culture", 4), ("technique", 3))})
+    assert response.status_code == 200
+    assert response.get_json()["culture_score"] == 100.0
+
+    with client.application.app_context():
+        candidate = db.session.get(Candidate, 3)
+        assert candidate.status == CANDIDATE_STATUS['INTERVIEW_EVALUATED']
+        assert Appreciation.query.filter_by(candidate_id=3).count() == 2
+
+
+def test_batch_evaluation_uses_constant_statements(client):
+    payload = {"candidates": [
+        {"candidate_id": i, "evaluations": _evaluations(("culture", 3), ("technique", 4), ("motivation", 2))}
+        for i in range(1, 21)
+    ]}
+    with client.application.app_context():
+        engine = db.engine
+    with count_queries(engine) as counter:
+        response = client.post('/api/candidates/evaluate-interviews', json=payload)
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body["count"] == 20
+    assert body["results"][0]["interview_score"] == pytest.approx(200 / 3)
+
+    # Vérification de propriété + INSERT groupé + UPDATE groupé, quel que soit le nombre de candidats
+    writes = [s for s in counter.statements if s.lstrip().upper().startswith(('INSERT', 'UPDATE'))]
+    assert len(writes) == 2
+
+    with client.application.app_context():
+        assert Appreciation.query.count() == 60
+        assert [c.culture_score for c in Candidate.query.filter_by(user_id=1)] == pytest.approx([200 / 3] * 20)
+
+
+def test_batch_is_all_or_nothing(client):
+    response = client.post('/api/candidates/evaluate-interviews', json={"candidates": [
+        {"candidate_id": 1, "evaluations": _evaluations(("culture", 3))},
+        {"candidate_id": 99, "evaluations": _evaluations(("culture", 3))},
+    ]})
+    assert response.status_code == 404 and response.get_json()["candidate_ids"] == [99]
+
+    response = client.post('/api/candidates/evaluate-interviews', json={"candidates": [
+        {"candidate_id": 1, "evaluations": _evaluations(("culture", 3))},
+        {"candidate_id": 2, "evaluations": [{"category": "culture", "score": "?"}]},
+    ]})
+    assert response.status_code == 400
+
+    with client.application.app_context():
+        assert Appreciation.query.count() == 0
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+sys.path.append('.')
+
+from app.modules import llms
+
+JOB = {"title": "Développeur Python", "skills": ["Python", "Django"], "required_experience_years": 2}
+CV = {"Compétences": ["Python"], "Formations": [{"diplôme": "Master"}]}
+SCORE = {"experience_score": 50.0}
+
+
+def _fake_category(delays, failures):
+    def generate(prompt, category, model="gemini-1.5-flash", max_attempts=3, deadline=None):
+        time.sleep(delays.get(category, 0.2))
+        if category in failures:
+            return None
+        label = llms.QUESTION_CATEGORY_LABELS[category]
+        return [{"category": label, "question": f"API {category} {i}?", "purpose": "test"} for i in range(5)]
+    return generate
+
+
+def test_categories_run_concurrently_and_fail_individually(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)  # generate_interview_questions écrit interview_questions.json
+    monkeypatch.setattr(llms, 'generate_questions_for_category', _fake_category({}, {"Company_Culture"}))
+
+    started = time.monotonic()
+    result = llms.generate_interview_questions(JOB, CV, SCORE)
+    elapsed = time.monotonic() - started
+
+    questions = result["questions"]
+    assert elapsed < 0.5  # trois appels de 0,2 s en parallèle, pas 0,6 s en série
+    assert len(questions) == 15
+    api = [q for q in questions if q["question"].startswith("API")]
+    assert {q["category"] for q in api} == {"Job Description", "CV/Professional Life"}
+    culture = [q for q in questions if q["category"] == "Company Culture"]
+    assert len(culture) == 5 and not any(q["question"].startswith("API") for q in culture)
+
+
+def test_deadline_falls_back_for_late_categories(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(llms, 'generate_questions_for_category', _fake_category({"Job_Description": 2.0}, set()))
+    monkeypatch.setattr(llms, 'INTERVIEW_QUESTIONS_DEADLINE_SECONDS', 0.5)
+
+    started = time.monotonic()
+    result = llms.generate_interview_questions(JOB, CV, SCORE)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.5
+    questions = result["questions"]
+    assert len(questions) == 15
+    late = [q for q in questions if q["category"] == "Job Description"]
+    assert not any(q["question"].startswith("API") for q in late)
+
+
+def test_categories_are_published_as_they_complete(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    delays = {"Job_Description": 0.3, "Company_Culture": 0.05, "CV_Professional_Life": 0.15}
+    monkeypatch.setattr(llms, 'generate_questions_for_category', _fake_category(delays, {"CV_Professional_Life"}))
+
+    published = []
+    llms.generate_interview_questions(
+        JOB, CV, SCORE, on_category=lambda label, questions, source: published.append((label, source, len(questions)))
+    )
+
+    assert published == [
+        ("Company Culture", "api", 5),
+        ("Job Description", "api", 5),
+        ("CV/Professional Life", "fallback", 5),
+    ]
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+import tempfile
+import os
+sys.path.append('.')
+
+from flask import Flask
+from app.job_queue import JobQueue, JOB_STATUS, _now
+
+
+def _make_queue(backend, path=None, **config):
+    app = Flask(__name__)
+    app.config.update(JOB_QUEUE_BACKEND=backend, JOB_QUEUE_PATH=path, JOB_QUEUE_WORKERS=2, **config)
+    queue = JobQueue(app)
+
+    @queue.task('addition')
+    def addition(payload, progress):
+        progress('calcul')
+        if payload.get('fail'):
+            raise ValueError("échec demandé")
+        return {"total": payload['a'] + payload['b']}
+
+    @queue.task('attente')
+    def attente(payload, progress):
+        queue.runs = getattr(queue, 'runs', 0) + 1
+        time.sleep(payload['seconds'])  # aucune progression écrite pendant l'attente
+        return {"runs": queue.runs}
+
+    return queue
+
+
+def _wait(queue, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get_job(job_id)
+        if job['status'] in (JOB_STATUS['DONE'], JOB_STATUS['FAILED']):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Travail {job_id} non terminé")
+
+
+def test_memory_broker():
+    """Les travaux sont exécutés par les workers et leur résultat est consultable"""
+    queue = _make_queue('memory')
+    job_id = queue.submit('addition', {"a": 2, "b": 3}, user_id=1)
+    job = _wait(queue, job_id)
+    assert job['status'] == JOB_STATUS['DONE']
+    assert job['result'] == {"total": 5}
+    assert job['user_id'] == '1'
+    queue.shutdown()
+
+
+def test_sqlite_broker_and_failure():
+    """Le broker SQLite persiste les travaux et enregistre les erreurs"""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = _make_queue('sqlite', os.path.join(tmp, 'jobs.sqlite3'))
+        ok_id = queue.submit('addition', {"a": 1, "b": 1})
+        ko_id = queue.submit('addition', {"a": 1, "b": 1, "fail": True})
+        assert _wait(queue, ok_id)['result'] == {"total": 2}
+        failed = _wait(queue, ko_id)
+        assert failed['status'] == JOB_STATUS['FAILED']
+        assert "échec demandé" in failed['error']['error']
+        queue.shutdown()
+
+
+
+def test_long_job_is_not_requeued_while_its_worker_is_alive():
+    """Le bail est renouvelé par le worker : un travail long n'est pas exécuté deux fois"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jobs.sqlite3')
+        queue = _make_queue('sqlite', path, JOB_QUEUE_STALE_SECONDS=1, JOB_QUEUE_HEARTBEAT_SECONDS=0.2)
+        job_id = queue.submit('attente', {"seconds": 2.5})
+        # Autre processus qui démarre pendant le travail
+        other = _make_queue('sqlite', path, JOB_QUEUE_STALE_SECONDS=1, JOB_QUEUE_HEARTBEAT_SECONDS=0.2)
+        for _ in range(4):
+            time.sleep(0.5)
+            assert other.broker.requeue_stale(other.stale_after) == 0
+        job = _wait(queue, job_id)
+        assert job['status'] == JOB_STATUS['DONE']
+        assert job['result'] == {"runs": 1}
+        queue.shutdown()
+
+
+def test_resume_pending_restarts_abandoned_and_queued_jobs():
+    """Au démarrage, les travaux en file et ceux dont le bail a expiré reprennent sans nouvelle soumission"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jobs.sqlite3')
+        queue = _make_queue('sqlite', path, JOB_QUEUE_STALE_SECONDS=1, JOB_QUEUE_HEARTBEAT_SECONDS=0.2)
+        created = '2025-01-01T00:00:00'
+        for job_id, status in (('en-file', JOB_STATUS['QUEUED']), ('abandonne', JOB_STATUS['RUNNING'])):
+            queue.broker.enqueue({'id': job_id, 'name': 'addition', 'payload': {"a": 1, "b": 2},
+                                  'status': status, 'stage': None, 'created_at': created, 'updated_at': created})
+        assert not queue._threads
+
+        queue.resume_pending()
+        assert _wait(queue, 'en-file')['result'] == {"total": 3}
+        assert _wait(queue, 'abandonne')['result'] == {"total": 3}
+        queue.shutdown()
+
+
+def test_finished_jobs_are_purged_after_retention():
+    """Les travaux terminés au-delà de la rétention disparaissent avec leurs événements, les autres restent"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ('memory', 'sqlite'):
+            queue = _make_queue(backend, os.path.join(tmp, 'jobs.sqlite3'), JOB_RETENTION_SECONDS=3600)
+            old, recent = '2025-01-01T00:00:00', _now()
+            for job_id, status, updated in (('termine', JOB_STATUS['DONE'], old), ('echoue', JOB_STATUS['FAILED'], old),
+                                            ('en-cours', JOB_STATUS['RUNNING'], old), ('recent', JOB_STATUS['DONE'], recent)):
+                queue.broker.enqueue({'id': job_id, 'name': 'addition', 'payload': {}, 'status': status,
+                                      'stage': None, 'created_at': old, 'updated_at': updated})
+                queue.broker.add_event(job_id, 'stage', {"stage": "calcul"})
+
+            assert queue.purge_finished() == 2
+            assert queue.get_job('termine') is None and queue.get_events('termine') == []
+            assert queue.get_job('echoue') is None
+            for job_id in ('en-cours', 'recent'):
+                assert queue.get_job(job_id) is not None and len(queue.get_events(job_id)) == 1
+
+            queue.retention = 0
+            assert queue.purge_finished() == 0
+
+
+if __name__ == "__main__":
+    test_memory_broker()
+    test_sqlite_broker_and_failure()
+    print("✅ File d'attente fonctionnelle !")
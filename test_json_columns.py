@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import importlib.util
+import json
+import sys
+sys.path.append('.')
+import pytest
+from flask import Flask
+
+from app import db
+from app.models import Candidate, CvDocument, User
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username='u', email='u@example.com', password='x'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+def test_candidate_payloads_round_trip_as_objects(app):
+    candidate = Candidate(
+        name='Jean', status='CV analysé', user_id=1,
+        cv_analysis={"skills": ["Python"], "experience": "3 ans"},
+        score_details={"final_score": 72.5},
+        risks=["Mobilité"], recommendations=[]
+    )
+    db.session.add(candidate)
+    db.session.commit()
+    db.session.expire_all()
+
+    stored = Candidate.query.one()
+    assert stored.cv_analysis == {"skills": ["Python"], "experience": "3 ans"}
+    assert stored.score_details["final_score"] == 72.5
+    assert stored.risks == ["Mobilité"] and stored.recommendations == []
+    assert stored.to_dict()["score_details"] == {"final_score": 72.5}
+
+    # Stockage en JSON au niveau SQL, None reste un NULL
+    raw = db.session.execute(db.text("SELECT score_details, interview_questions FROM candidate")).one()
+    assert json.loads(raw[0]) == {"final_score": 72.5}
+    assert raw[1] is None
+
+
+def test_cv_document_extraction_is_json(app):
+    db.session.add(CvDocument(sha256='a' * 64, file_path='uploads/aa/a.pdf', extraction={"engine": "pypdfium2", "pages": []}))
+    db.session.commit()
+    db.session.expire_all()
+    assert CvDocument.query.one().extraction["engine"] == "pypdfium2"
+
+
+def _migration():
+    spec = importlib.util.spec_from_file_location('json_columns', 'migrations/versions/20250812_json_columns.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_migration_normalizes_legacy_text():
+    normalize = _migration()._normalize
+    assert normalize('{"a": 1}') == '{"a": 1}'
+    assert normalize(json.dumps(json.dumps(["x"]))) == '["x"]'  # encodé deux fois
+    assert normalize('texte libre') == '"texte libre"'
+    assert normalize('') is None and normalize(None) is None and normalize('null') is None
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import sys
+import time
+sys.path.append('.')
+
+from app.modules.json_extract import (
+    CLOSED_TRUNCATED,
+    CODE_FENCE,
+    CUT_TRUNCATED,
+    LEADING_TEXT,
+    TRAILING_COMMA,
+    TRAILING_TEXT,
+    extract_json
+)
+
+QUESTIONS = {"questions": [
+    {"category": "Job Description", "question": f"Question {i} ?", "purpose": "Évaluer"} for i in range(5)
+]}
+
+
+def test_clean_json_needs_no_repair():
+    result = extract_json(json.dumps(QUESTIONS), {"questions": list})
+    assert result.ok and not result.repaired
+    assert result.value == QUESTIONS
+
+
+def test_fences_and_surrounding_prose_are_ignored():
+    text = "Voici le résultat demandé :\n```json\n" + json.dumps(QUESTIONS, indent=2) + "\n```\nBonne chance !"
+    result = extract_json(text, {"questions": list})
+    assert result.ok
+    assert result.value == QUESTIONS
+    assert result.repairs == [CODE_FENCE, LEADING_TEXT, TRAILING_TEXT]
+
+
+def test_first_object_wins_when_the_model_repeats_itself():
+    result = extract_json('{"title": "A", "skills": []}\n{"title": "B", "skills": []}')
+    assert result.value["title"] == "A"
+    assert TRAILING_TEXT in result.repairs
+
+
+def test_trailing_commas_are_removed():
+    result = extract_json('{"risks": ["a", "b",], "recommendations": ["c",],}')
+    assert result.value == {"risks": ["a", "b"], "recommendations": ["c"]}
+    assert result.repairs == [TRAILING_COMMA]
+
+
+def test_braces_inside_strings_are_not_structure():
+    result = extract_json('{"a": "texte avec } et \\" et {", "b": [1]}')
+    assert result.value == {"a": 'texte avec } et " et {', "b": [1]}
+
+
+def test_truncated_string_is_closed():
+    result = extract_json('{"risks": ["Manque d\'expérience"], "recommendations": ["Mentorat pendant 30 jo')
+    assert result.ok
+    assert result.value["recommendations"] == ["Mentorat pendant 30 jo"]
+    assert result.repairs == [CLOSED_TRUNCATED]
+
+
+def test_truncated_element_is_cut():
+    text = json.dumps(QUESTIONS)[:-60]
+    result = extract_json(text, {"questions": list})
+    assert result.ok
+    assert CUT_TRUNCATED in result.repairs or CLOSED_TRUNCATED in result.repairs
+    assert result.value["questions"][:3] == QUESTIONS["questions"][:3]
+
+
+def test_schema_and_check_failures_are_reported():
+    assert extract_json('{"risks": []}', {"risks": list, "recommendations": list}).error == "clé manquante : recommendations"
+    assert not extract_json('{"risks": "aucun", "recommendations": []}', {"risks": list, "recommendations": list}).ok
+
+    truncated = json.dumps(QUESTIONS)[:-120]
+    result = extract_json(truncated, {"questions": list}, check=lambda v: None if len(v["questions"]) == 5 else "incomplet")
+    assert result.error == "incomplet"
+
+
+def test_unrepairable_responses():
+    assert extract_json("").error == "réponse vide"
+    assert extract_json("Je ne peux pas répondre.").error == "aucun JSON dans la réponse"
+    assert not extract_json('{"a": 1]').ok
+
+
+def test_long_response_is_linear():
+    """Pas de retour arrière catastrophique sur une longue réponse sans accolade fermante"""
+    text = "{" + '"k": "' + "x{" * 200000
+    started = time.perf_counter()
+    extract_json(text)
+    assert time.perf_counter() - started < 2.0
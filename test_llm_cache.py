@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+sys.path.append('.')
+
+from app.modules import llm_cache
+from app.modules.llm_cache import LLMResponseCache
+
+
+def _counting(result):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return result
+    return compute, calls
+
+
+def test_identical_input_is_served_from_cache():
+    """Même modèle, même gabarit, même texte (aux espaces près) : un seul appel au LLM"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, 'llm.sqlite3'))
+        compute, calls = _counting({"Compétences": ["Python"]})
+
+        first = cache.cached_call('gemini', 'analyze_cv/v1', 'CV  de\nJean', compute)
+        second = cache.cached_call('gemini', 'analyze_cv/v1', 'CV de Jean', compute)
+        cache.cached_call('gemini', 'analyze_cv/v2', 'CV de Jean', compute)
+
+        assert first == second == {"Compétences": ["Python"]}
+        assert len(calls) == 2
+        assert cache.stats()['hits'] == 1
+
+
+def test_errors_are_not_cached_and_bypass_refreshes():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, 'llm.sqlite3'))
+        failing, failing_calls = _counting({"error": "quota"})
+        cache.cached_call('gemini', 'v1', 'cv', failing)
+        cache.cached_call('gemini', 'v1', 'cv', failing)
+        assert len(failing_calls) == 2
+
+        compute, calls = _counting({"ok": True})
+        cache.cached_call('gemini', 'v1', 'cv', compute)
+        cache.cached_call('gemini', 'v1', 'cv', compute, use_cache=False)
+        assert len(calls) == 2
+        assert cache.stats()['bypassed'] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, 'llm.sqlite3'), ttl_seconds=60)
+        now = [1000.0]
+        monkeypatch.setattr(llm_cache.time, 'time', lambda: now[0])
+        compute, calls = _counting({"ok": True})
+
+        cache.cached_call('gemini', 'v1', 'brief', compute)
+        now[0] += 30
+        cache.cached_call('gemini', 'v1', 'brief', compute)
+        now[0] += 61
+        cache.cached_call('gemini', 'v1', 'brief', compute)
+
+        assert len(calls) == 2
+
+
+def test_size_eviction_drops_least_recently_used(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, 'llm.sqlite3'), max_bytes=250)
+        now = [1000.0]
+        monkeypatch.setattr(llm_cache.time, 'time', lambda: now[0])
+        value = {"text": "x" * 100}
+
+        for name in ('a', 'b'):
+            now[0] += 1
+            cache.cached_call('gemini', 'v1', name, lambda: value)
+        now[0] += 1
+        cache.cached_call('gemini', 'v1', 'a', lambda: value)  # 'a' devient le plus récent
+        now[0] += 1
+        cache.cached_call('gemini', 'v1', 'c', lambda: value)
+
+        compute, calls = _counting(value)
+        cache.cached_call('gemini', 'v1', 'a', compute)
+        cache.cached_call('gemini', 'v1', 'b', compute)
+        assert len(calls) == 1
+        assert cache.stats()['evictions'] >= 1
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import threading
+import time
+sys.path.append('.')
+import pytest
+
+from app.modules.llm_client import CircuitBreaker, CircuitOpenError, LLMClient, LLMDeadlineExceeded
+
+
+class ServiceUnavailable(Exception):
+    """Même nom que l'erreur transitoire de google.api_core"""
+
+
+class _FakeProvider:
+    name = 'fake'
+
+    def __init__(self, outcomes, delay=0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, model, timeout):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _client(model, **options):
+    options.setdefault('base_delay', 0.01)
+    return LLMClient(provider=model, **options)
+
+
+def test_transient_errors_are_retried_with_backoff():
+    model = _FakeProvider([ServiceUnavailable("503"), ServiceUnavailable("503"), '{"ok": true}'])
+    client = _client(model, max_attempts=3)
+
+    assert client.generate("prompt") == '{"ok": true}'
+    assert model.calls == 3
+    assert client.stats()['retries'] == 2
+
+
+def test_non_transient_errors_are_not_retried():
+    model = _FakeProvider([ValueError("prompt refusé")])
+    client = _client(model)
+
+    with pytest.raises(ValueError):
+        client.generate("prompt")
+    assert model.calls == 1
+
+
+def test_circuit_opens_then_half_opens():
+    model = _FakeProvider([ServiceUnavailable("503")] * 4)
+    client = _client(model, max_attempts=1, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.1))
+
+    for _ in range(2):
+        with pytest.raises(ServiceUnavailable):
+            client.generate("prompt")
+    with pytest.raises(CircuitOpenError):
+        client.generate("prompt")
+    assert model.calls == 2
+
+    time.sleep(0.15)
+    model.outcomes = ["rétabli"]
+    assert client.generate("prompt") == "rétabli"
+    assert client.stats()['circuit_state'] == 'closed'
+
+
+def test_deadline_stops_retries():
+    model = _FakeProvider([ServiceUnavailable("503")] * 10)
+    client = _client(model, max_attempts=10, base_delay=0.2)
+
+    started = time.monotonic()
+    with pytest.raises((LLMDeadlineExceeded, ServiceUnavailable)):
+        client.generate("prompt", deadline=client.deadline(0.3))
+    assert time.monotonic() - started < 0.6
+
+
+def test_concurrency_is_limited_across_threads():
+    model = _FakeProvider([], delay=0.05)
+    client = _client(model, max_concurrency=2)
+
+    threads = [threading.Thread(target=client.generate, args=("prompt",)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert model.calls == 6
+    assert model.peak == 2
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import sys
+sys.path.append('.')
+import pytest
+
+from app.modules.llm_client import LLMClient
+from app.modules.llm_providers import StubProvider, ServiceUnavailable, get_llm_provider, parse_latency
+
+
+def _outcomes(provider, prompts):
+    outcomes = []
+    for prompt in prompts:
+        try:
+            provider.generate(prompt, "gemini-1.5-flash", timeout=5)
+            outcomes.append("ok")
+        except ServiceUnavailable:
+            outcomes.append("error")
+    return outcomes
+
+
+def test_prompts_are_routed_to_fixtures():
+    provider = StubProvider()
+
+    cv = json.loads(provider.generate("Analyse le CV suivant et extrais ...", "gemini-1.5-flash", timeout=5))
+    assert "Compétences" in cv
+    brief = json.loads(provider.generate("Générez une fiche de poste structurée au format JSON", "gemini-1.5-flash", timeout=5))
+    assert brief["required_degree"]
+    questions = json.loads(provider.generate('{"category": "Company Culture", "question": ...}', "gemini-1.5-flash", timeout=5))
+    assert len(questions["questions"]) == 5
+    assert {q["category"] for q in questions["questions"]} == {"Company Culture"}
+
+
+def test_unknown_prompt_is_rejected():
+    with pytest.raises(ValueError):
+        StubProvider().generate("Bonjour", "gemini-1.5-flash", timeout=5)
+
+
+def test_injected_errors_are_deterministic():
+    prompts = ["Analyse le CV suivant : candidat %d" % i for i in range(50)]
+
+    first = _outcomes(StubProvider(error_rate=0.3, seed=7), prompts)
+    second = _outcomes(StubProvider(error_rate=0.3, seed=7), prompts)
+    other_seed = _outcomes(StubProvider(error_rate=0.3, seed=8), prompts)
+
+    assert first == second
+    assert first != other_seed
+    assert 5 <= first.count("error") <= 25
+
+
+def test_latency_beyond_timeout_raises_timeout():
+    provider = StubProvider(latency_ms=(200, 200))
+    with pytest.raises(TimeoutError):
+        provider.generate("Analyse le CV suivant", "gemini-1.5-flash", timeout=0.05)
+    assert provider.stats()["timeouts"] == 1
+
+
+def test_client_retries_injected_errors():
+    provider = StubProvider(error_rate=0.5, seed=1)
+    client = LLMClient(provider=provider, max_attempts=10, base_delay=0.001, max_delay=0.001)
+
+    for i in range(10):
+        text = client.generate("Analyse le CV suivant : candidat %d" % i)
+        assert "Compétences" in json.loads(text)
+    assert client.stats()["retries"] == provider.stats()["injected_errors"] > 0
+
+
+def test_provider_is_selected_from_environment(monkeypatch, tmp_path):
+    (tmp_path / "analyze_cv.txt").write_text("réponse enregistrée", encoding="utf-8")
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    monkeypatch.setenv("LLM_STUB_FIXTURES_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_STUB_LATENCY_MS", "0-10")
+
+    provider = get_llm_provider()
+    assert isinstance(provider, StubProvider)
+    assert provider.latency_ms == (0.0, 10.0)
+    assert provider.generate("Analyse le CV suivant", "gemini-1.5-flash", timeout=5) == "réponse enregistrée"
+
+    monkeypatch.setenv("LLM_PROVIDER", "inconnu")
+    with pytest.raises(ValueError):
+        get_llm_provider()
+
+
+def test_parse_latency():
+    assert parse_latency("250") == (250.0, 250.0)
+    assert parse_latency("100-400") == (100.0, 400.0)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+sys.path.append('.')
+import pytest
+
+from app.modules import pdf_extraction
+from app.modules.pdf_extraction import PDFPLUMBER, PYPDFIUM2, extract_pdf
+
+
+class _FakeDocument:
+    def __init__(self, pages, delays=None, failures=()):
+        self.pages = pages
+        self.delays = delays or {}
+        self.failures = failures
+        self.calls = []
+
+    def __len__(self):
+        return len(self.pages)
+
+    def page_text(self, index):
+        self.calls.append(index)
+        time.sleep(self.delays.get(index, 0))
+        if index in self.failures:
+            raise ValueError("page illisible")
+        return self.pages[index]
+
+    def close(self):
+        pass
+
+
+def _engines(monkeypatch, plumber, pdfium):
+    documents = {PDFPLUMBER: plumber, PYPDFIUM2: pdfium}
+    monkeypatch.setattr(pdf_extraction, '_open', lambda engine, path: documents[engine])
+    monkeypatch.setattr(pdf_extraction, 'engine_available', lambda engine: True)
+
+
+PAGES = ["Jean  Dupont\nDéveloppeur   Python", "Expérience :\n3 ans chez DataSoft", "Formation : Master"]
+
+
+def test_pages_are_normalized_and_joined(monkeypatch):
+    _engines(monkeypatch, _FakeDocument(PAGES), _FakeDocument(PAGES))
+
+    result = extract_pdf("cv.pdf", workers=1)
+
+    assert result.ok
+    assert result.text == "Jean Dupont Développeur Python Expérience : 3 ans chez DataSoft Formation : Master"
+    assert result.engine == PDFPLUMBER
+    assert [page["page"] for page in result.pages] == [1, 2, 3]
+    assert all("text" not in page and page["seconds"] >= 0 for page in result.pages)
+    assert result.to_dict()["pages_extracted"] == 3 and not result.truncated
+
+
+def test_page_and_character_budgets(monkeypatch):
+    plumber = _FakeDocument(["a" * 100] * 10)
+    _engines(monkeypatch, plumber, _FakeDocument(["a" * 100] * 10))
+
+    result = extract_pdf("cv.pdf", max_pages=4, max_chars=0, workers=1)
+    assert len(result.pages) == 4 and result.page_count == 10 and result.truncated
+
+    plumber.calls.clear()
+    result = extract_pdf("cv.pdf", max_pages=10, max_chars=250, workers=1)
+    assert plumber.calls == [0, 1, 2]  # arrêt dès que le budget est atteint
+    assert len(result.text) == 250 and result.truncated
+
+
+def test_long_documents_are_split_across_processes(monkeypatch):
+    pages = [f"Page {i}" for i in range(8)]
+    _engines(monkeypatch, _FakeDocument(pages), _FakeDocument(pages))
+    monkeypatch.setattr(pdf_extraction, 'PDF_PARALLEL_MIN_PAGES', 4)
+
+    result = extract_pdf("long.pdf", workers=3)
+
+    assert result.text == " ".join(pages)
+    assert [page["page"] for page in result.pages] == list(range(1, 9))
+
+
+def test_slow_pdfplumber_switches_to_pdfium(monkeypatch):
+    plumber = _FakeDocument(PAGES, delays={0: 0.2})
+    pdfium = _FakeDocument(PAGES)
+    _engines(monkeypatch, plumber, pdfium)
+
+    result = extract_pdf("cv.pdf", workers=1, slow_page_seconds=0.1)
+
+    assert plumber.calls == [0]
+    assert pdfium.calls == [1, 2]
+    assert result.engine == 'mixed'
+    assert [page["engine"] for page in result.pages] == [PDFPLUMBER, PYPDFIUM2, PYPDFIUM2]
+
+
+def test_pdfplumber_failure_falls_back(monkeypatch):
+    _engines(monkeypatch, _FakeDocument(PAGES, failures={1}), _FakeDocument(PAGES))
+    result = extract_pdf("cv.pdf", workers=1)
+    assert result.ok and "DataSoft" in result.text
+
+
+def test_errors_are_reported_not_raised(monkeypatch):
+    _engines(monkeypatch, _FakeDocument(["", ""]), _FakeDocument(["", ""]))
+    assert "Aucun texte" in extract_pdf("scan.pdf", workers=1).error
+
+    def broken(engine, path):
+        raise OSError("fichier corrompu")
+    monkeypatch.setattr(pdf_extraction, '_open', broken)
+    result = extract_pdf("corrompu.pdf", workers=1)
+    assert not result.ok and "fichier corrompu" in result.error
+
+
+def test_real_pdf_with_pdfium(tmp_path):
+    pytest.importorskip('pypdfium2')
+    from reportlab.pdfgen import canvas
+
+    path = str(tmp_path / "cv.pdf")
+    pdf = canvas.Canvas(path)
+    for line in ("Jean Dupont", "Compétences : Python, Django"):
+        pdf.drawString(72, 720, line)
+        pdf.showPage()
+    pdf.save()
+
+    result = extract_pdf(path, workers=1)
+    assert result.ok and result.page_count == 2
+    assert "Python" in result.text
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+sys.path.append('.')
+import pytest
+
+from app import create_app, db
+from app.models import Appreciation, Candidate, User
+from app.query_stats import count_queries
+from conftest import TestConfig, authenticated_client, drop_app
+
+# Plafond de requêtes SQL par liste : comptage total + page + appréciations (selectinload)
+LIST_QUERY_BUDGET = 3
+LIST_ENDPOINTS = [
+    '/candidates',
+    '/api/candidates',
+    '/api/v2/candidates',
+    '/candidates?limit=5',
+    '/api/candidates?fields=name,appreciations',
+]
+
+
+def _make_app(candidates, config=TestConfig):
+    app = create_app(config)
+    with app.app_context():
+        db.session.add(User(id=1, username='a', email='a@example.com', password='x'))
+        for i in range(candidates):
+            candidate = Candidate(name=f"Candidat {i}", status="Évalué", user_id=1, final_predictive_score=float(i))
+            db.session.add(candidate)
+            db.session.flush()
+            for category in ('technique', 'culture', 'motivation'):
+                db.session.add(Appreciation(candidate_id=candidate.id, question="Q ?", category=category,
+                                            appreciation="Bien", score=3.0))
+        db.session.commit()
+    return app, authenticated_client(app)
+
+
+def _queries(app, client, url):
+    with app.app_context():
+        engine = db.engine
+    with count_queries(engine) as counter:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_json()
+    return counter.count
+
+
+@pytest.mark.parametrize('url', LIST_ENDPOINTS)
+def test_list_query_count_does_not_grow_with_rows(url):
+    counts = []
+    for size in (2, 30):
+        app, client = _make_app(size)
+        counts.append(_queries(app, client, url))
+        drop_app(app)
+    assert counts[0] == counts[1], f"{url} : {counts[0]} requêtes pour 2 candidats, {counts[1]} pour 30"
+    assert counts[1] <= LIST_QUERY_BUDGET, f"{url} : {counts[1]} requêtes (plafond {LIST_QUERY_BUDGET})"
+
+
+def test_appreciations_are_still_returned():
+    app, client = _make_app(3)
+    candidates = client.get('/candidates').get_json()
+    assert all(len(c['appreciations']) == 3 for c in candidates)
+    drop_app(app)
+
+
+def test_request_query_count_header():
+    class Config(TestConfig):
+        QUERY_COUNT_LOG_THRESHOLD = 1
+
+    app, client = _make_app(2, Config)
+    response = client.get('/api/v2/candidates')
+    assert int(response.headers['X-Query-Count']) >= 2
+    drop_app(app)
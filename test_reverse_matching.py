@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import sys
+from types import SimpleNamespace
+sys.path.append('.')
+import pytest
+
+from config import Config
+from app import db
+from app import reverse_matching
+from app.models import Candidate, CandidateMatch, JobBrief, User
+from conftest import TestConfig
+
+JOB_DESCRIPTION = {"skills": [], "required_experience_years": 4, "required_degree": "Master"}
+DEGREES = ["Bac", "Licence", "Master", "Doctorat"]
+
+
+class _TestConfig(TestConfig):
+    REVERSE_MATCH_WORKERS = 2
+    REVERSE_MATCH_POOL_MIN_ITEMS = 4
+
+
+def _cv_data(i):
+    return {
+        "Compétences": [],
+        "Expériences professionnelles": [{"poste": "Développeur", "durée": f"{i} ans"}],
+        "Formations": [{"diplôme": DEGREES[i % len(DEGREES)]}]
+    }
+
+
+@pytest.fixture
+def app_config():
+    return _TestConfig
+
+
+@pytest.fixture
+def app(app, monkeypatch):
+    monkeypatch.setattr(reverse_matching, 'get_embedding_backend', lambda: SimpleNamespace(model_id='modele'))
+    with app.app_context():
+        db.session.add(User(id=1, username='a', email='a@example.com', password='x'))
+        db.session.add(JobBrief(id=1, title="Poste", skills="[]", experience="4 ans", description="-", user_id=1,
+                                full_data=json.dumps(JOB_DESCRIPTION)))
+        for i in range(1, 9):
+            db.session.add(Candidate(id=i, name=f"Candidat {i}", status="-", user_id=1, cv_analysis=_cv_data(i)))
+        db.session.commit()
+    return app
+
+
+def test_pool_settings_are_configured():
+    assert Config.REVERSE_MATCH_WORKERS >= 1
+    assert Config.REVERSE_MATCH_POOL_MIN_ITEMS >= 1
+
+
+def test_structured_scores_go_through_the_process_pool(app, monkeypatch):
+    pools = []
+
+    class RecordingPool(reverse_matching.ProcessPoolExecutor):
+        def __init__(self, max_workers=None):
+            pools.append(max_workers)
+            super().__init__(max_workers=max_workers)
+
+    monkeypatch.setattr(reverse_matching, 'ProcessPoolExecutor', RecordingPool)
+    cv_datas = [_cv_data(i) for i in range(1, 10)]
+    with app.app_context():
+        scores = reverse_matching._structured_scores(JOB_DESCRIPTION, cv_datas)
+        assert pools == [2]
+        assert scores == reverse_matching._score_structured(JOB_DESCRIPTION, cv_datas)
+
+        # Sous le seuil : calcul dans le processus courant
+        reverse_matching._structured_scores(JOB_DESCRIPTION, cv_datas[:3])
+        assert pools == [2]
+
+
+def test_concurrently_inserted_matches_are_recovered(app, monkeypatch):
+    original = reverse_matching.score_candidates_for_brief
+    calls = []
+
+    def racing(brief, candidates, weights=None):
+        matches = original(brief, candidates, weights)
+        if not calls:
+            # Un autre appel a enregistré le score du premier candidat entre la lecture et le commit
+            duplicate = original(brief, candidates[:1], weights)
+            matches = matches + duplicate
+        calls.append(len(candidates))
+        return matches
+
+    monkeypatch.setattr(reverse_matching, 'score_candidates_for_brief', racing)
+    with app.app_context():
+        brief = db.session.get(JobBrief, 1)
+        assert reverse_matching.refresh_brief_matches(brief) == 8
+        assert calls == [8, 8]
+        assert CandidateMatch.query.count() == 8
+        assert reverse_matching.refresh_brief_matches(brief) == 0
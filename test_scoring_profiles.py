@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import time
+sys.path.append('.')
+import numpy as np
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.constants import PROCESS_STAGES
+from app.job_queue import JOB_STATUS, job_queue
+from app.models import Candidate, CandidateMatch, JobBrief, ScoringProfile, User
+from app.modules.scoring_service import DEFAULT_WEIGHTS, DIMENSIONS, ScoringService
+from app.query_stats import count_queries
+from app.scoring import create_profile, rescore_candidates
+
+
+# id -> (brief, étape, compétences, expérience, formation, culture, entretien)
+CANDIDATES = {
+    1: (1, PROCESS_STAGES['FINAL_EVALUATION'], 90, 60, 40, 80, 70),
+    2: (1, PROCESS_STAGES['CV_ANALYSIS'], 50, 100, 0, 0, 0),
+    3: (2, PROCESS_STAGES['FINAL_EVALUATION'], 20, 40, 60, 80, 100),
+}
+
+
+def _weighted(candidate_id, weights, stage):
+    scores = dict(zip(DIMENSIONS, CANDIDATES[candidate_id][2:]))
+    return sum(scores[dimension] * weight for dimension, weight in weights[stage].items())
+
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        db.session.add_all([User(id=1, username='a', email='a@example.com', password='x'),
+                            User(id=2, username='b', email='b@example.com', password='x')])
+        for brief_id, user_id in ((1, 1), (2, 1), (3, 2)):
+            db.session.add(JobBrief(id=brief_id, title="Poste", skills="[]", experience="3 ans",
+                                    description="-", user_id=user_id))
+        for candidate_id, (brief_id, stage, *scores) in CANDIDATES.items():
+            db.session.add(Candidate(id=candidate_id, name=f"Candidat {candidate_id}", status="-", user_id=1,
+                                     brief_id=brief_id, process_stage=stage,
+                                     **{f'{dimension}_score': score for dimension, score in zip(DIMENSIONS, scores)}))
+        db.session.add(CandidateMatch(brief_id=2, candidate_id=2, user_id=1, brief_version="v",
+                                      skills_score=50, experience_score=100, education_score=0, final_score=55))
+        db.session.commit()
+        rescore_candidates(1)
+        db.session.commit()
+    return app
+
+
+def _wait(job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = job_queue.get_job(job_id)
+        if job['status'] in (JOB_STATUS['DONE'], JOB_STATUS['FAILED']):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Travail {job_id} non terminé")
+
+
+def test_normalize_weights():
+    weights = ScoringService.normalize_weights({"final": {"skills": 2, "interview": 2}})
+    assert weights["cv"] == pytest.approx(DEFAULT_WEIGHTS["cv"])
+    assert weights["final"] == pytest.approx({"skills": 0.5, "experience": 0, "education": 0, "culture": 0, "interview": 0.5})
+
+    for invalid in ({"cv": {"culture": 1}}, {"final": {"skills": -1}}, {"final": {"skills": 0}},
+                    {"final": {"skills": "1"}}, {"bonus": {}}, {"cv": [0.5]}):
+        with pytest.raises(ValueError):
+            ScoringService.normalize_weights(invalid)
+
+
+def test_weighted_scores_matches_scalar_score():
+    rng = np.random.default_rng(0)
+    scores = rng.uniform(0, 100, size=(20, len(DIMENSIONS)))
+    scores[3, 2] = np.nan  # score NULL compté 0
+    expected = [ScoringService.weighted_score(dict(zip(DIMENSIONS, np.nan_to_num(row)))) for row in scores]
+    vector = ScoringService.weight_vector(DEFAULT_WEIGHTS, 'final')
+    assert ScoringService.weighted_scores(scores, vector) == pytest.approx(expected)
+
+
+def test_default_weights_are_applied_to_stored_scores(client):
+    with client.application.app_context():
+        finalized = db.session.get(Candidate, 1)
+        assert finalized.final_predictive_score == pytest.approx(_weighted(1, DEFAULT_WEIGHTS, 'final'))
+        assert finalized.predictive_score == pytest.approx(finalized.final_predictive_score)
+        assert finalized.scoring_profile_id is None
+        pending = db.session.get(Candidate, 2)
+        assert pending.predictive_score == pytest.approx(_weighted(2, DEFAULT_WEIGHTS, 'cv'))
+        assert pending.final_predictive_score == 0
+
+
+def test_new_profile_version_rescores_only_its_brief(client):
+    response = client.post('/api/scoring-profiles', json={"brief_id": 1, "weights": {"final": {"skills": 1, "interview": 1}}})
+    assert response.status_code == 201, response.get_json()
+    body = response.get_json()
+    assert body["profile"]["version"] == 1
+    assert body["profile"]["weights"]["cv"] == pytest.approx(DEFAULT_WEIGHTS["cv"])
+    job = _wait(body["job_id"])
+    assert job["status"] == JOB_STATUS["DONE"], job
+    assert job["result"]["updated"] == 2  # candidats du brief 1 uniquement (score final, profil appliqué)
+
+    response = client.post('/api/scoring-profiles', json={"brief_id": 1, "weights": {"cv": {"experience": 1}}})
+    body = response.get_json()
+    assert body["profile"]["version"] == 2
+    # Étape non fournie : reprise de la version précédente
+    assert body["profile"]["weights"]["final"]["skills"] == pytest.approx(0.5)
+    assert _wait(body["job_id"])["status"] == JOB_STATUS["DONE"]
+
+    with client.application.app_context():
+        profile = db.session.get(ScoringProfile, body["profile"]["id"])
+        finalized = db.session.get(Candidate, 1)
+        assert finalized.final_predictive_score == pytest.approx((90 + 70) / 2)
+        assert finalized.scoring_profile_id == profile.id
+        pending = db.session.get(Candidate, 2)
+        assert pending.predictive_score == pytest.approx(100)
+        # Le détail affiché par la fiche suit le même profil que la liste
+        assert pending.score_details["final_score"] == pytest.approx(pending.predictive_score)
+        assert pending.score_details["weights"] == profile.weights
+        assert finalized.score_details["final_score"] == pytest.approx(60)
+        other_brief = db.session.get(Candidate, 3)
+        assert other_brief.final_predictive_score == pytest.approx(_weighted(3, DEFAULT_WEIGHTS, 'final'))
+        assert other_brief.scoring_profile_id is None
+
+    listing = client.get('/api/scoring-profiles?brief_id=1').get_json()
+    assert [version["version"] for version in listing["versions"]] == [2, 1]
+    assert listing["active"]["id"] == body["profile"]["id"]
+
+
+def test_user_default_profile_applies_to_briefs_without_their_own(client):
+    with client.application.app_context():
+        brief_profile = create_profile(1, 1, {"final": {"culture": 1}})
+        user_profile = create_profile(1, None, {"final": {"education": 1}, "cv": {"education": 1}})
+        db.session.commit()
+        engine = db.engine
+        with count_queries(engine) as counter:
+            result = rescore_candidates(1)
+            db.session.commit()
+        # Profils, candidats, UPDATE candidats, matchs, UPDATE matchs : indépendant du nombre de lignes
+        assert counter.count <= 5, counter.statements
+        assert result == {"candidates": 3, "updated": 3, "matches": 1, "matches_updated": 1}
+
+        assert db.session.get(Candidate, 1).final_predictive_score == pytest.approx(80)
+        assert db.session.get(Candidate, 1).scoring_profile_id == brief_profile.id
+        assert db.session.get(Candidate, 3).final_predictive_score == pytest.approx(60)
+        assert db.session.get(Candidate, 3).scoring_profile_id == user_profile.id
+        assert db.session.get(CandidateMatch, 1).final_score == pytest.approx(0)
+
+        # Rien n'a changé : aucune écriture
+        assert rescore_candidates(1)["updated"] == 0
+
+
+def test_profile_and_rescore_validation(client):
+    assert client.post('/api/scoring-profiles', json={"brief_id": 1}).status_code == 400
+    assert client.post('/api/scoring-profiles', json={"weights": {"final": {"salary": 1}}}).status_code == 400
+    assert client.post('/api/scoring-profiles', json={"brief_id": 3, "weights": {}}).status_code == 404
+    assert client.post('/api/candidates/rescore', json={"brief_id": "1"}).status_code == 400
+    assert client.post('/api/candidates/rescore', json={"brief_id": 3}).status_code == 404
+
+    response = client.post('/api/candidates/rescore', json={"brief_id": 2})
+    assert response.status_code == 202
+    job = _wait(response.get_json()["job_id"])
+    assert job["result"] == {"candidates": 1, "updated": 0, "matches": 1, "matches_updated": 0}
+
+
+@pytest.mark.parametrize("brief_id", [1, None])
+def test_profile_versions_are_unique(client, brief_id):
+    with client.application.app_context():
+        for _ in range(2):
+            db.session.add(ScoringProfile(user_id=1, brief_id=brief_id, version=1, weights=DEFAULT_WEIGHTS))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+        # Même version pour un autre brief ou un autre utilisateur : autorisée
+        db.session.add_all([ScoringProfile(user_id=1, brief_id=brief_id, version=1, weights=DEFAULT_WEIGHTS),
+                            ScoringProfile(user_id=1, brief_id=2, version=1, weights=DEFAULT_WEIGHTS),
+                            ScoringProfile(user_id=2, brief_id=brief_id, version=1, weights=DEFAULT_WEIGHTS)])
+        db.session.commit()
+
+
+def test_concurrent_profile_version_is_rejected_with_409(client, monkeypatch):
+    with client.application.app_context():
+        create_profile(1, 1, {})
+        db.session.commit()
+    # Version lue avant l'enregistrement concurrent : même numéro
+    monkeypatch.setattr('app.scoring.func.max', lambda column: db.literal(0))
+    response = client.post('/api/scoring-profiles', json={"brief_id": 1, "weights": {}})
+    assert response.status_code == 409
+    assert client.get('/api/scoring-profiles?brief_id=1').get_json()["active"]["version"] == 1
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+sys.path.append('.')
+import numpy as np
+
+
+def test_similarity_matrix_best_match():
+    """La matrice vectorisée donne la meilleure compétence du poste pour chaque compétence CV"""
+    from app.modules.llms import similarity_matrix
+
+    cv_skills = ['Python', 'Docker', 'Anglais']
+    job_skills = ['Django', 'Kubernetes']
+    # Embeddings factices : Python ~ Django, Docker ~ Kubernetes, Anglais orthogonal
+    cv_embeddings = np.array([[1.0, 0.1, 0.0], [0.1, 2.0, 0.0], [0.0, 0.0, 3.0]])
+    job_embeddings = np.array([[0.9, 0.0, 0.0], [0.0, 1.0, 0.2]])
+
+    result = similarity_matrix(cv_skills, job_skills, cv_embeddings, job_embeddings)
+    matches = result['matches']
+
+    assert result['matrix'].shape == (3, 2)
+    assert [m['job_skill'] for m in matches[:2]] == ['Django', 'Kubernetes']
+
+    # Même résultat que le calcul cosinus paire par paire
+    for i, match in enumerate(matches):
+        expected = max(
+            float(np.dot(cv_embeddings[i], job) / (np.linalg.norm(cv_embeddings[i]) * np.linalg.norm(job)))
+            for job in job_embeddings
+        )
+        assert abs(match['score'] - expected) < 1e-5
+
+
+def test_similarity_matrix_empty():
+    from app.modules.llms import similarity_matrix
+
+    assert similarity_matrix([], ['Python'])['matches'] == []
+
+
+if __name__ == "__main__":
+    test_similarity_matrix_best_match()
+    test_similarity_matrix_empty()
+    print("✅ Matrice de similarité correcte !")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import sys
+import time
+sys.path.append('.')
+import pytest
+
+from app.job_queue import JobFailed, job_queue
+from app.streaming import job_event_response, last_event_id, wants_event_stream
+from conftest import TestConfig
+
+
+class _TestConfig(TestConfig):
+    SSE_POLL_SECONDS = 0.01
+
+
+@job_queue.task('test_sse_pipeline')
+def _pipeline(payload, progress):
+    progress('extracting')
+    progress.emit('extracted', {"characters": 1200})
+    time.sleep(payload.get('delay', 0))
+    progress.emit('analyzed', {"cv_analysis": {"Compétences": ["Python"]}})
+    return {"candidate": {"id": 1}}
+
+
+@job_queue.task('test_sse_failure')
+def _failure(payload, progress):
+    progress.emit('extracted', {})
+    if payload.get('status'):
+        raise JobFailed({"error": "PDF illisible"}, payload['status'])
+    raise RuntimeError("panne")
+
+
+def _parse(body):
+    events = []
+    for block in body.split("\n\n"):
+        lines = [line for line in block.strip().splitlines() if not line.startswith((":", "id: "))]
+        if lines and lines[0].startswith("event: "):
+            events.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+    return events
+
+
+@pytest.fixture
+def app_config():
+    return _TestConfig
+
+
+@pytest.fixture
+def app(app):
+    @app.route('/pipeline/<name>', methods=['POST'])
+    def pipeline(name):
+        if wants_event_stream():
+            return job_event_response(job_queue.submit(name, dict(app.config['PAYLOAD']), user_id='1'), last_event_id())
+        return {"mode": "json"}
+
+    app.config['PAYLOAD'] = {}
+    return app
+
+
+def test_job_events_are_relayed_then_done(app):
+    response = app.test_client().post('/pipeline/test_sse_pipeline?stream=1')
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    body = response.get_data(as_text=True)
+    events = _parse(body)
+    assert events[0][0] == 'job'
+    assert events[1:] == [
+        ('stage', {"stage": "extracting"}),
+        ('extracted', {"characters": 1200}),
+        ('analyzed', {"cv_analysis": {"Compétences": ["Python"]}}),
+        ('done', {"candidate": {"id": 1}, "status": 200}),
+    ]
+    # Chaque événement du travail porte son numéro, pour la reprise
+    assert body.count("id: ") == 3
+
+
+def test_job_failures_become_error_events(app):
+    app.config['PAYLOAD'] = {"status": 400}
+    events = _parse(app.test_client().post('/pipeline/test_sse_failure?stream=1').get_data(as_text=True))
+    assert events[-1] == ('error', {"error": "PDF illisible", "status": 400})
+
+    app.config['PAYLOAD'] = {}
+    events = _parse(app.test_client().post('/pipeline/test_sse_failure?stream=1').get_data(as_text=True))
+    assert events[-2][0] == 'extracted'
+    assert events[-1] == ('error', {"error": "panne", "status": 500})
+
+
+def test_heartbeat_while_a_stage_is_running(app):
+    app.config.update(SSE_HEARTBEAT_SECONDS=0.1, PAYLOAD={"delay": 0.35})
+    body = app.test_client().post('/pipeline/test_sse_pipeline?stream=1').get_data(as_text=True)
+    assert body.count(": keep-alive") >= 2
+    assert _parse(body)[-1][0] == 'done'
+
+
+def test_relay_hands_back_the_worker_and_resumes(app):
+    app.config.update(SSE_RELAY_MAX_SECONDS=0.1, PAYLOAD={"delay": 0.5})
+    events = _parse(app.test_client().post('/pipeline/test_sse_pipeline?stream=1').get_data(as_text=True))
+    assert events[-1][0] == 'reconnect'
+    job_id, after = events[-1][1]["job_id"], events[-1][1]["after"]
+
+    app.config['SSE_RELAY_MAX_SECONDS'] = 10
+    with app.test_request_context(headers={"Last-Event-ID": str(after)}):
+        resumed = _parse(job_event_response(job_id, last_event_id()).get_data(as_text=True))
+    # Aucun événement perdu ni répété entre les deux connexions
+    assert [event for event, _ in events[1:-1] + resumed[1:]] == ['stage', 'extracted', 'analyzed', 'done']
+
+
+def test_stream_mode_selection(app):
+    client = app.test_client()
+    assert client.post('/pipeline/test_sse_pipeline').get_json() == {"mode": "json"}
+    assert client.post('/pipeline/test_sse_pipeline?stream=0', headers={"Accept": "text/event-stream"}).get_json() == {"mode": "json"}
+    response = client.post('/pipeline/test_sse_pipeline', headers={"Accept": "text/event-stream"})
+    assert response.mimetype == 'text/event-stream'
+    assert _parse(response.get_data(as_text=True))[-1][0] == 'done'
@@ -0,0 +1,149 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from app import create_app, db
+from app.job_queue import JOB_STATUS, job_queue
+from app.models import Candidate, JobBrief, User
+from app.modules import llms, vector_index
+from app.modules.vector_index import CandidateSearchIndex, FlatIndex, cv_sections
+from conftest import TestConfig, authenticated_client, drop_app
+
+
+class TestFlatIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = FlatIndex()
+        self.index.add(1, [[1, 0, 0], [0, 1, 0]], ["Compétences", "Expérience"])
+        self.index.add(2, [[0, 0, 1]], ["Formations"])
+
+    def test_search_returns_best_section_per_candidate(self):
+        results = self.index.search(np.array([0.1, 1.0, 0.0]), k=2)
+        self.assertEqual(results[0][0], 1)
+        self.assertEqual(results[0][2], "Expérience")
+        self.assertEqual(len(results), 2)
+
+    def test_allowed_ids_filter(self):
+        results = self.index.search(np.array([0.1, 1.0, 0.0]), k=5, allowed_ids=[2])
+        self.assertEqual([r[0] for r in results], [2])
+
+    def test_add_replaces_and_remove(self):
+        self.index.add(1, [[0, 0, 1]], ["Compétences"])
+        self.assertEqual(self.index.vectors.shape[0], 2)
+        self.index.remove([2])
+        self.assertEqual(len(self.index), 1)
+
+    def test_add_many_matches_successive_adds(self):
+        batched = FlatIndex()
+        batched.add_many([
+            (1, [[1, 0, 0], [0, 1, 0]], ["Compétences", "Expérience"]),
+            (2, [[0, 0, 1]], ["Formations"])
+        ])
+        np.testing.assert_array_equal(batched.ids, self.index.ids)
+        np.testing.assert_allclose(batched.vectors, self.index.vectors)
+        self.assertEqual(list(batched.labels), list(self.index.labels))
+
+        # Les sections des candidats déjà indexés sont remplacées en une passe
+        batched.add_many([(1, [[0, 0, 1]], ["Compétences"]), (3, [[0, 1, 0]], ["Expérience"])])
+        self.assertEqual(sorted(batched.ids.tolist()), [1, 2, 3])
+        self.assertEqual(batched.search(np.array([0, 0, 1.0]), k=3, allowed_ids=[1])[0][2], "Compétences")
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "user_1.npz")
+            self.index.save(path)
+            loaded = FlatIndex.load(path)
+        self.assertEqual(loaded.search(np.array([0, 0, 1.0]), k=1)[0][:1], (2,))
+        self.assertEqual(list(loaded.labels), list(self.index.labels))
+
+    def test_cv_sections(self):
+        sections = cv_sections({
+            "Compétences": ["Python", "SQL"],
+            "Expériences professionnelles": [{"poste": "Développeur", "entreprise": "ACME", "description": "API"}],
+            "Formations": [{"diplôme": "Master", "institution": "UAC"}]
+        })
+        self.assertEqual([label for label, _ in sections], ["Compétences", "Expérience", "Formations"])
+        self.assertEqual(cv_sections("pas du json"), [])
+
+
+def _fake_embeddings(texts, use_cache=True):
+    return np.array([[len(text), 1.0, 0.0] for text in texts], dtype=np.float32)
+
+
+class _FakeEmbeddingsMixin:
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.search_index = CandidateSearchIndex(directory=self.directory.name)
+        patcher = mock.patch.object(llms, 'get_embeddings', side_effect=_fake_embeddings)
+        self.get_embeddings = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+
+
+class TestCandidateSearchIndex(_FakeEmbeddingsMixin, unittest.TestCase):
+    def test_rebuild_encodes_all_sections_in_one_call(self):
+        documents = [(i, [("Compétences", "Python" * (i % 5 + 1)), ("Formations", "Master")]) for i in range(500)]
+        self.assertFalse(self.search_index.exists(1))
+        self.assertEqual(self.search_index.rebuild(1, documents + [(999, [])]), 500)
+        self.assertTrue(self.search_index.exists(1))
+        self.assertEqual(self.get_embeddings.call_count, 1)
+        index = self.search_index._get(1)
+        self.assertEqual(len(index), 500)
+        self.assertEqual(index.vectors.shape, (1000, 3))
+
+        self.search_index.update(1, documents=documents[:10], removed_ids=[499])
+        index = self.search_index._get(1)
+        self.assertEqual(len(index), 499)
+        self.assertEqual(index.vectors.shape, (998, 3))
+
+
+class TestSearchIndexJob(_FakeEmbeddingsMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(vector_index, '_search_index', self.search_index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.app = create_app(TestConfig)
+        with self.app.app_context():
+            db.session.add(User(id=1, username='a', email='a@example.com', password='x'))
+            db.session.add(JobBrief(id=1, title="Poste", skills="[]", experience="3 ans", description="-", user_id=1))
+            for candidate_id in (1, 2):
+                db.session.add(Candidate(id=candidate_id, name=f"Candidat {candidate_id}", status="-", user_id=1, brief_id=1,
+                                         cv_analysis={"Compétences": ["Python"] * candidate_id}))
+            db.session.commit()
+        self.client = authenticated_client(self.app)
+
+    def tearDown(self):
+        drop_app(self.app)
+
+    def _wait(self, job_id):
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            job = job_queue.get_job(job_id)
+            if job['status'] in (JOB_STATUS['DONE'], JOB_STATUS['FAILED']):
+                return job
+            time.sleep(0.02)
+        self.fail(f"Travail {job_id} non terminé")
+
+    def test_first_search_builds_the_index_on_the_job_queue(self):
+        response = self.client.get('/api/v2/candidates/search?q=Python')
+        self.assertEqual(response.status_code, 202)
+        job = self._wait(response.get_json()["job_id"])
+        self.assertEqual(job["result"], {"user_id": 1, "indexed": 2})
+
+        response = self.client.get('/api/v2/candidates/search?q=Python')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(result["id"] for result in response.get_json()["results"]), [1, 2])
+
+    def test_upload_without_index_queues_a_full_build(self):
+        with self.app.app_context():
+            vector_index.index_candidates([db.session.get(Candidate, 2)])
+        # Tous les CV de l'utilisateur, pas seulement celui qui vient d'arriver
+        self.assertEqual(self._wait(vector_index._build_jobs[1])["result"]["indexed"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()